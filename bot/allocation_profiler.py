@@ -0,0 +1,200 @@
+"""
+Sampled allocation and GC pause instrumentation for `MyBot.on_step`.
+
+Every `sample_every` steps `tracemalloc` is switched on for the whole step
+and `enter` closes the running section and opens the next one. For each
+section we keep the peak traced bytes above what was live when it started
+(short-lived churn such as `Point2` and `Units` temporaries shows up here
+even when it is freed before the section ends) and the net change in
+allocated blocks. GC pauses are timed on every step through `gc.callbacks`.
+"""
+import gc
+import json
+import statistics
+import sys
+import tracemalloc
+from collections import defaultdict
+from os import makedirs, path
+from time import perf_counter_ns
+
+from bot.consts import StepSection
+
+# a section is flagged when its churn correlates with unit count at least
+# this strongly and grows by at least `GROWTH_MIN_BYTES_PER_UNIT`
+GROWTH_MIN_CORRELATION: float = 0.6
+GROWTH_MIN_BYTES_PER_UNIT: float = 64.0
+GROWTH_MIN_SAMPLES: int = 8
+
+
+class AllocationProfiler:
+    def __init__(self, sample_every: int = 32):
+        """Set up the profiler, nothing is measured until `start` is called.
+
+        Parameters
+        ----------
+        sample_every :
+            Trace allocations on one step out of this many.
+        """
+        self.sample_every: int = sample_every
+        self.enabled: bool = False
+        self._sampling: bool = False
+        self._section: StepSection = StepSection.NONE
+        self._section_start_bytes: int = 0
+        self._section_start_blocks: int = 0
+        self._unit_count: int = 0
+        # section -> [(unit count, churn bytes, net blocks)]
+        self._samples: dict[StepSection, list[tuple[int, int, int]]] = defaultdict(list)
+        self._gc_start_ns: int = 0
+        self._gc_step_ns: int = 0
+        self._gc_step_collections: int = 0
+        # (game loop, pause ns, collections) for steps that collected
+        self._gc_pauses: list[tuple[int, int, int]] = []
+        self._gc_collections: list[int] = [0, 0, 0]
+        self._steps: int = 0
+
+    def start(self) -> None:
+        if self.enabled:
+            return
+        self.enabled = True
+        gc.callbacks.append(self._on_gc)
+
+    def stop(self) -> None:
+        if not self.enabled:
+            return
+        self.enabled = False
+        gc.callbacks.remove(self._on_gc)
+        if self._sampling:
+            tracemalloc.stop()
+            self._sampling = False
+
+    def _on_gc(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self._gc_start_ns = perf_counter_ns()
+        else:
+            self._gc_step_ns += perf_counter_ns() - self._gc_start_ns
+            self._gc_step_collections += 1
+            self._gc_collections[info["generation"]] += 1
+
+    def begin_step(self, iteration: int, unit_count: int) -> None:
+        """Call at the top of `on_step`.
+
+        Parameters
+        ----------
+        iteration :
+            The `on_step` iteration.
+        unit_count :
+            Own plus visible enemy units this step.
+        """
+        if not self.enabled:
+            return
+        self._steps += 1
+        self._unit_count = unit_count
+        if iteration % self.sample_every == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._sampling = True
+            self._section = StepSection.NONE
+            self._mark()
+
+    def enter(self, section: StepSection) -> None:
+        """Close the running section and start attributing to `section`."""
+        if not self._sampling:
+            return
+        self._close_section()
+        self._section = section
+        self._mark()
+
+    def end_step(self, game_loop: int) -> None:
+        """Call at the bottom of `on_step`."""
+        if not self.enabled:
+            return
+        if self._sampling:
+            self._close_section()
+            tracemalloc.stop()
+            self._sampling = False
+        if self._gc_step_collections:
+            self._gc_pauses.append(
+                (game_loop, self._gc_step_ns, self._gc_step_collections)
+            )
+            self._gc_step_ns = 0
+            self._gc_step_collections = 0
+
+    def _mark(self) -> None:
+        tracemalloc.reset_peak()
+        self._section_start_bytes = tracemalloc.get_traced_memory()[0]
+        self._section_start_blocks = sys.getallocatedblocks()
+
+    def _close_section(self) -> None:
+        peak: int = tracemalloc.get_traced_memory()[1]
+        self._samples[self._section].append(
+            (
+                self._unit_count,
+                peak - self._section_start_bytes,
+                sys.getallocatedblocks() - self._section_start_blocks,
+            )
+        )
+
+    def report(self) -> dict:
+        """Summarise everything recorded so far.
+
+        Returns
+        -------
+        dict :
+            Per section allocation stats, with `growth_flagged` set for
+            sections whose churn grows with unit count, plus GC pause stats.
+        """
+        sections: dict = {}
+        for section, samples in self._samples.items():
+            unit_counts: list[int] = [s[0] for s in samples]
+            churn: list[int] = [s[1] for s in samples]
+            entry: dict = {
+                "samples": len(samples),
+                "mean_churn_bytes": statistics.fmean(churn),
+                "max_churn_bytes": max(churn),
+                "mean_net_blocks": statistics.fmean(s[2] for s in samples),
+                "bytes_per_unit": None,
+                "correlation": None,
+                "growth_flagged": False,
+            }
+            if (
+                len(samples) >= GROWTH_MIN_SAMPLES
+                and len(set(unit_counts)) > 1
+                and len(set(churn)) > 1
+            ):
+                slope: float = statistics.linear_regression(unit_counts, churn).slope
+                correlation: float = statistics.correlation(unit_counts, churn)
+                entry["bytes_per_unit"] = slope
+                entry["correlation"] = correlation
+                entry["growth_flagged"] = (
+                    correlation >= GROWTH_MIN_CORRELATION
+                    and slope >= GROWTH_MIN_BYTES_PER_UNIT
+                )
+            sections[section.name] = entry
+
+        pauses_ms: list[float] = [p[1] / 1e6 for p in self._gc_pauses]
+        worst: list[tuple[int, int, int]] = sorted(
+            self._gc_pauses, key=lambda p: p[1], reverse=True
+        )[:10]
+        return {
+            "steps": self._steps,
+            "sample_every": self.sample_every,
+            "sections": sections,
+            "gc": {
+                "collections_per_generation": self._gc_collections,
+                "steps_with_collection": len(pauses_ms),
+                "total_pause_ms": sum(pauses_ms),
+                "max_step_pause_ms": max(pauses_ms, default=0.0),
+                "mean_step_pause_ms": statistics.fmean(pauses_ms) if pauses_ms else 0.0,
+                "worst_steps": [
+                    {"game_loop": loop, "pause_ms": ns / 1e6, "collections": n}
+                    for loop, ns, n in worst
+                ],
+            },
+        }
+
+    def write_report(self, file_path: str) -> str:
+        directory: str = path.dirname(file_path)
+        if directory:
+            makedirs(directory, exist_ok=True)
+        with open(file_path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        return file_path
@@ -0,0 +1,229 @@
+"""
+Checkpoints of a single frame, so `on_step` can be run on a slow moment over
+and over without playing the game up to it.
+
+A checkpoint holds the raw responses python-sc2 built the frame from: the
+observation, the game info with that frame's pathing grid, and the game
+data. It also keeps the start location and expansions python-sc2 worked
+out at game start, the mediator's unit roles, and the bot-side state that
+carries over between steps (enemy memory, creep plan progress, queen spell
+claims, combat sim stats, flow fields and finished background plans).
+`capture` pickles all of it while the step runs and `write` compresses
+it to disk, which is slow enough to belong on the planner.
+
+`restore` starts a fresh bot on a checkpoint the way python-sc2 starts a
+game, against a `StandInServer` serving the saved frame through a
+`LocalClient`, so `on_start` runs as usual before the saved state is put
+back. `run_step` then plays the frame again, as often as needed.
+"""
+import gzip
+import pickle
+from dataclasses import dataclass
+from os import makedirs, path
+from typing import Any, Optional
+
+import sc2.main
+from s2clientprotocol import sc2api_pb2 as sc_pb
+from sc2.bot_ai import BotAI
+from sc2.data import Race
+from sc2.position import Point2
+
+from bot.stand_in_server import LocalClient, StandInServer
+
+CHECKPOINT_VERSION: int = 1
+# bot attributes restored field by field, with the fields that are not
+# saved: callbacks, thread pools and work still in flight
+BOT_STATE: dict[str, frozenset[str]] = {
+    "enemy_memory": frozenset({"_supply_of", "_row_slots"}),
+    "queen_allocator": frozenset(),
+    "combat_sim": frozenset(),
+    "flow_fields": frozenset({"_planner", "_requested"}),
+    "planner": frozenset({"_executor", "_pending"}),
+}
+# bot attributes saved and restored whole, the checkpoint triggers so a
+# replayed frame doesn't checkpoint itself again
+BOT_OBJECTS: tuple[str, ...] = ("creep_plan", "_checkpoint_loops", "_checkpoint_units")
+
+
+@dataclass
+class Checkpoint:
+    version: int
+    game_loop: int
+    player_id: int
+    base_build: int
+    game_step: int
+    # serialized ResponseObservation, ResponseGameInfo and ResponseData
+    observation: bytes
+    game_info: bytes
+    game_data: bytes
+    start_location: Point2
+    expansions: list[Point2]
+    resource_expansions: dict[Point2, Point2]
+    # unit role to the tags holding it
+    roles: dict[Any, list[int]]
+    # bot attribute to its saved fields, or to the object for `BOT_OBJECTS`
+    bot_state: dict[str, Any]
+
+
+def capture(bot: BotAI) -> bytes:
+    """This frame of `bot`, pickled. Call at the start of `on_step`, before
+    anything carried over between steps changes."""
+    game_info = sc_pb.ResponseGameInfo()
+    game_info.CopyFrom(bot.game_info._proto)
+    game_info.start_raw.pathing_grid.CopyFrom(bot.game_info.pathing_grid._proto)
+    game_data = sc_pb.ResponseData(
+        abilities=[a._proto for a in bot.game_data.abilities.values()],
+        units=[u._proto for u in bot.game_data.units.values()],
+        upgrades=[u._proto for u in bot.game_data.upgrades.values()],
+    )
+    roles: dict[Any, list[int]] = {}
+    if mediator := getattr(bot, "mediator", None):
+        roles = {
+            role: sorted(tags) for role, tags in mediator.get_unit_role_dict.items()
+        }
+    bot_state: dict[str, Any] = {
+        name: {k: v for k, v in vars(getattr(bot, name)).items() if k not in skipped}
+        for name, skipped in BOT_STATE.items()
+        if hasattr(bot, name)
+    }
+    bot_state.update(
+        {name: getattr(bot, name) for name in BOT_OBJECTS if hasattr(bot, name)}
+    )
+    checkpoint = Checkpoint(
+        version=CHECKPOINT_VERSION,
+        game_loop=bot.state.game_loop,
+        player_id=bot.player_id,
+        base_build=bot.base_build,
+        game_step=bot.client.game_step,
+        observation=bot.state.response_observation.SerializeToString(),
+        game_info=game_info.SerializeToString(),
+        game_data=game_data.SerializeToString(),
+        start_location=bot.game_info.player_start_location,
+        expansions=list(bot._expansion_positions_list),
+        resource_expansions=dict(bot._resource_location_to_expansion_position_dict),
+        roles=roles,
+        bot_state=bot_state,
+    )
+    return pickle.dumps(checkpoint, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def write(file_path: str, data: bytes) -> str:
+    """Compress a `capture` to `file_path`, parent directories are created."""
+    directory: str = path.dirname(file_path)
+    if directory:
+        makedirs(directory, exist_ok=True)
+    with gzip.open(file_path, "wb", compresslevel=6) as f:
+        f.write(data)
+    return file_path
+
+
+def load(file_path: str) -> Optional[Checkpoint]:
+    """The checkpoint at `file_path`, None if it is from another version."""
+    with gzip.open(file_path, "rb") as f:
+        checkpoint: Checkpoint = pickle.load(f)
+    if checkpoint.version != CHECKPOINT_VERSION:
+        return None
+    return checkpoint
+
+
+class CheckpointGame:
+    def __init__(self, checkpoint: Checkpoint):
+        """A `StandInServer` game that is the checkpoint's frame forever:
+        steps don't advance it and it never ends."""
+        self.checkpoint: Checkpoint = checkpoint
+        self.player_id: int = checkpoint.player_id
+        self.loop: int = checkpoint.game_loop
+        self.actions: int = 0
+        self.finished: bool = False
+        self._observation = sc_pb.ResponseObservation()
+        self._observation.ParseFromString(checkpoint.observation)
+        self._game_info = sc_pb.ResponseGameInfo()
+        self._game_info.ParseFromString(checkpoint.game_info)
+        self._data = sc_pb.ResponseData()
+        self._data.ParseFromString(checkpoint.game_data)
+
+    def reset(self, race: int) -> None:
+        self.actions = 0
+
+    def step(self, count: int) -> None:
+        pass
+
+    def data(self) -> sc_pb.ResponseData:
+        return self._data
+
+    def game_info(self) -> sc_pb.ResponseGameInfo:
+        return self._game_info
+
+    def observation(self) -> sc_pb.ResponseObservation:
+        return self._observation
+
+
+async def restore(bot: BotAI, checkpoint: Checkpoint) -> LocalClient:
+    """Start `bot` on the checkpoint's frame.
+
+    Parameters
+    ----------
+    bot :
+        A new bot, `on_start` is run on it.
+    checkpoint :
+        Frame to start on.
+
+    Returns
+    -------
+    LocalClient :
+        Client serving the frame, pass it to `run_step`.
+    """
+    client = LocalClient(StandInServer(CheckpointGame(checkpoint)))
+    client.game_step = checkpoint.game_step
+    game_info = sc_pb.ResponseGameInfo()
+    game_info.ParseFromString(checkpoint.game_info)
+    races: dict[int, int] = {
+        p.player_id: p.race_actual or p.race_requested for p in game_info.player_info
+    }
+    race: int = races.get(checkpoint.player_id) or Race.Random.value
+    await client.join_game(race=Race(race))
+
+    # python-sc2's game start, see `sc2.main._play_game_ai`
+    bot._initialize_variables()
+    game_data = await client.get_game_data()
+    game_info = await client.get_game_info()
+    bot._prepare_start(
+        client,
+        checkpoint.player_id,
+        game_info,
+        game_data,
+        base_build=checkpoint.base_build,
+    )
+    state = await client.observation()
+    proto_game_info = await client._execute(game_info=sc_pb.RequestGameInfo())
+    bot._prepare_step(sc2.main.GameState(state.observation), proto_game_info)
+    await bot.on_before_start()
+    bot._prepare_first_step()
+    # worked out from the townhalls and resources of the first frame
+    bot.game_info.player_start_location = checkpoint.start_location
+    bot._expansion_positions_list = list(checkpoint.expansions)
+    bot._resource_location_to_expansion_position_dict = dict(
+        checkpoint.resource_expansions
+    )
+    await bot.on_start()
+
+    for role, tags in checkpoint.roles.items():
+        for tag in tags:
+            bot.mediator.assign_role(tag=tag, role=role)
+    for name, saved in checkpoint.bot_state.items():
+        if name in BOT_STATE:
+            vars(getattr(bot, name)).update(saved)
+        else:
+            setattr(bot, name, saved)
+    return client
+
+
+async def run_step(bot: BotAI, client: LocalClient, iteration: int) -> None:
+    """Play the frame once the way python-sc2 plays a step: observation and
+    game info requests, events, `on_step`, then the actions."""
+    state = await client.observation()
+    proto_game_info = await client._execute(game_info=sc_pb.RequestGameInfo())
+    bot._prepare_step(sc2.main.GameState(state.observation), proto_game_info)
+    await bot.issue_events()
+    await bot.on_step(iteration)
+    await bot._after_step()
@@ -0,0 +1,189 @@
+"""
+Lanchester square law estimate of a fight between two armies.
+
+Each side's fighting strength is its damage per second against the other
+side's mix of ground and air hit points, times its own hit points; the
+stronger side wins with sqrt(1 - weaker / stronger) of its army left.
+Per type stats are read once from the first unit of a type we see and kept
+in arrays indexed by type id, so an estimate is a few bincounts. Estimates
+are memoized on army compositions quantized by type, unit count and hit
+points, so squads can be re-evaluated every step.
+"""
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import numpy as np
+from sc2.unit import Unit
+
+from bot.unit_snapshot import UnitColumns
+
+# larger than any UnitTypeId value
+MAX_TYPE_ID: int = 4096
+# extra strength per range unit of ranged units, up to `MAX_RANGE_BONUS_RANGE`
+RANGE_BONUS: float = 0.05
+MAX_RANGE_BONUS_RANGE: float = 6.0
+# composition quantization, hit points are summed per type
+HP_QUANTUM: float = 25.0
+COUNT_QUANTUM: float = 0.5
+MAX_CACHED_RESULTS: int = 4096
+
+
+class CombatResult(NamedTuple):
+    win: bool
+    # fraction of each army's value left when the fight is over
+    own_remaining: float
+    enemy_remaining: float
+    own_value_left: float
+
+
+class CombatSimulator:
+    def __init__(self):
+        """Empty type tables, filled by `register_types`."""
+        self.known: np.ndarray = np.zeros(MAX_TYPE_ID, dtype=bool)
+        self.hit_points: np.ndarray = np.zeros(MAX_TYPE_ID, dtype=np.float64)
+        self.ground_dps: np.ndarray = np.zeros(MAX_TYPE_ID, dtype=np.float64)
+        self.air_dps: np.ndarray = np.zeros(MAX_TYPE_ID, dtype=np.float64)
+        self.ground_range: np.ndarray = np.zeros(MAX_TYPE_ID, dtype=np.float64)
+        self.air_range: np.ndarray = np.zeros(MAX_TYPE_ID, dtype=np.float64)
+        self.range_factor: np.ndarray = np.ones(MAX_TYPE_ID, dtype=np.float64)
+        self.flying: np.ndarray = np.zeros(MAX_TYPE_ID, dtype=bool)
+        # structures without a weapon take no part in fights
+        self.fights: np.ndarray = np.zeros(MAX_TYPE_ID, dtype=bool)
+        self.value: np.ndarray = np.zeros(MAX_TYPE_ID, dtype=np.float64)
+        self._cache: OrderedDict[tuple, CombatResult] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def _register(self, unit: Unit) -> None:
+        type_id: int = unit.type_id.value
+        self.known[type_id] = True
+        self.hit_points[type_id] = unit.health_max + unit.shield_max
+        self.ground_dps[type_id] = unit.ground_dps
+        self.air_dps[type_id] = unit.air_dps
+        self.ground_range[type_id] = unit.ground_range if unit.can_attack_ground else 0
+        self.air_range[type_id] = unit.air_range if unit.can_attack_air else 0
+        weapon_range: float = max(unit.ground_range, unit.air_range)
+        if weapon_range > 1:
+            self.range_factor[type_id] = 1 + RANGE_BONUS * min(
+                weapon_range, MAX_RANGE_BONUS_RANGE
+            )
+        self.flying[type_id] = unit.is_flying
+        self.fights[type_id] = (
+            not unit.is_structure or unit.ground_dps + unit.air_dps > 0
+        )
+        cost = unit._type_data.cost_zerg_corrected
+        self.value[type_id] = cost.minerals + cost.vespene
+
+    def register_types(self, columns: UnitColumns) -> None:
+        """Read stats for every type in `columns` not seen before."""
+        for row in np.flatnonzero(~self.known[columns.type_ids]):
+            if not self.known[columns.type_ids[row]]:
+                self._register(columns.units[row])
+
+    def _composition(
+        self, type_ids: np.ndarray, hit_points: np.ndarray, weights: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, tuple]:
+        """Per type count and hit points of the units that fight, and the
+        quantized composition used as cache key."""
+        fighting: np.ndarray = self.fights[type_ids]
+        types, inverse = np.unique(type_ids[fighting], return_inverse=True)
+        counts: np.ndarray = np.bincount(
+            inverse, weights=weights[fighting], minlength=len(types)
+        )
+        hp: np.ndarray = np.bincount(
+            inverse, weights=(hit_points * weights)[fighting], minlength=len(types)
+        )
+        key: tuple = tuple(
+            zip(
+                types.tolist(),
+                np.rint(counts / COUNT_QUANTUM).astype(int).tolist(),
+                np.rint(hp / HP_QUANTUM).astype(int).tolist(),
+            )
+        )
+        return types, counts, hp, key
+
+    def _strength(
+        self,
+        types: np.ndarray,
+        counts: np.ndarray,
+        hp: np.ndarray,
+        target_types: np.ndarray,
+        target_hp: np.ndarray,
+    ) -> float:
+        target_total: float = target_hp.sum()
+        if target_total <= 0:
+            return 0.0
+        air_share: float = target_hp[self.flying[target_types]].sum() / target_total
+        dps: np.ndarray = (
+            self.ground_dps[types] * (1 - air_share) + self.air_dps[types] * air_share
+        ) * self.range_factor[types]
+        return float((counts * dps).sum() * hp.sum())
+
+    def estimate(
+        self,
+        own_type_ids: np.ndarray,
+        own_hit_points: np.ndarray,
+        enemy_type_ids: np.ndarray,
+        enemy_hit_points: Optional[np.ndarray] = None,
+        enemy_weights: Optional[np.ndarray] = None,
+    ) -> CombatResult:
+        """Predict the outcome of our units fighting the enemy units.
+
+        Parameters
+        ----------
+        own_type_ids :
+            Type id of each own unit.
+        own_hit_points :
+            Current health plus shields of each own unit.
+        enemy_type_ids :
+            Type id of each enemy unit.
+        enemy_hit_points :
+            Current health plus shields of each enemy unit, full hit points
+            of the type if not given.
+        enemy_weights :
+            How sure we are each enemy unit takes part, eg. the confidence
+            of a remembered unit, 1 if not given.
+
+        Returns
+        -------
+        CombatResult :
+            Who wins and how much of each army is left.
+        """
+        own_types, own_counts, own_hp, own_key = self._composition(
+            own_type_ids, own_hit_points, np.ones(len(own_type_ids))
+        )
+        if enemy_hit_points is None:
+            enemy_hit_points = self.hit_points[enemy_type_ids]
+        if enemy_weights is None:
+            enemy_weights = np.ones(len(enemy_type_ids))
+        enemy_types, enemy_counts, enemy_hp, enemy_key = self._composition(
+            enemy_type_ids, enemy_hit_points, enemy_weights
+        )
+
+        key: tuple = (own_key, enemy_key)
+        if (result := self._cache.get(key)) is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return result
+        self.misses += 1
+
+        own_value: float = float((own_counts * self.value[own_types]).sum())
+        own: float = self._strength(
+            own_types, own_counts, own_hp, enemy_types, enemy_hp
+        )
+        enemy: float = self._strength(
+            enemy_types, enemy_counts, enemy_hp, own_types, own_hp
+        )
+        if not len(enemy_types):
+            result = CombatResult(True, 1.0, 0.0, own_value)
+        elif own > enemy:
+            left: float = float(np.sqrt(1 - enemy / own))
+            result = CombatResult(True, left, 0.0, own_value * left)
+        else:
+            left = float(np.sqrt(1 - own / enemy)) if enemy > 0 else 1.0
+            result = CombatResult(False, 0.0, left, 0.0)
+
+        self._cache[key] = result
+        if len(self._cache) > MAX_CACHED_RESULTS:
+            self._cache.popitem(last=False)
+        return result
@@ -0,0 +1,70 @@
+from enum import IntEnum
+
+DATA_DIR: str = "data"
+
+# Custom config keys (see `config.yml`)
+DECISION_TRACE: str = "DecisionTrace"
+ALLOCATION_PROFILER: str = "AllocationProfiler"
+TELEMETRY: str = "Telemetry"
+TELEMETRY_TARGET: str = "TelemetryTarget"
+REALTIME_GOVERNOR: str = "RealtimeGovernor"
+LAZY_OBSERVATIONS: str = "LazyObservations"
+LOG_PIPELINE: str = "LogPipeline"
+LOG_LEVEL: str = "LogLevel"
+CHECKPOINT_LOOPS: str = "CheckpointLoops"
+CHECKPOINT_UNITS: str = "CheckpointUnits"
+
+# run.py exits once everything before connecting to the game is done,
+# see `scripts/benchmark_startup.py`
+STARTUP_PROBE: str = "--startup-probe"
+STARTUP_PROBE_READY: str = "STARTUP_PROBE_READY"
+
+# Background planner keys and timings, in game loops
+CREEP_FRONT_PLAN: str = "creep_front"
+CREEP_SPOTS_PLAN: str = "creep_tumor_spots"
+CREEP_PLAN: str = "creep_plan"
+CHECKPOINT_PLAN: str = "checkpoint"
+PLAN_INTERVAL: int = 16
+PLAN_MAX_STALENESS: int = 112
+# remembered enemy army supply that keeps scouts away from a scouting spot
+SCOUT_ARMY_SUPPLY: float = 4.0
+# attack once the combat estimate leaves at least this much of our army,
+# and keep attacking while it predicts a win
+ATTACK_MARGIN: float = 0.3
+MIN_ATTACK_UNITS: int = 6
+# the estimate only fights enemies remembered this close to the attack target
+ATTACK_RADIUS: float = 25.0
+# without a look at the attack target this recent the estimate knows nothing
+# of what defends it, attack on numbers alone from this many units
+SCOUTING_MAX_AGE: int = 1344
+MIN_BLIND_ATTACK_UNITS: int = 25
+# drones to build, and the drone count to take the natural at
+MAX_DRONES: int = 38
+EXPANSION_DRONES: int = 16
+# don't send two creep queens to tumor spots closer than this
+CREEP_SPOT_SPACING: float = 5.0
+# creep plan spots offered to the queen allocator per creep queen
+CREEP_SPOTS_PER_QUEEN: int = 4
+
+
+class StepSection(IntEnum):
+    """Sections of `MyBot.on_step`, used to tag diagnostics output."""
+
+    NONE = 0
+    MACRO_BEHAVIORS = 1
+    OVERSEER_SCOUTING = 2
+    OVERLORD_SCOUTING = 3
+    OVERLORD_SPREAD = 4
+    CREEP_SPREAD = 5
+    ECONOMY = 6
+    INJECT_QUEENS = 7
+    CREEP_QUEENS = 8
+    STRUCTURES = 9
+    UPGRADES = 10
+    PRODUCTION = 11
+    DRONE_DEFENCE = 12
+    DEFENDING = 13
+    ATTACKING = 14
+    OFFENSIVE_QUEENS = 15
+    ALL_IN = 16
+    FRAMEWORK = 17
@@ -0,0 +1,60 @@
+"""
+Creep computations that only read grids, so they can run on the planner.
+
+All grids are indexed [y, x] as returned by `PixelMap.data_numpy`.
+"""
+from typing import Optional
+
+import numpy as np
+from sc2.position import Point2
+
+from bot.grids import dilate
+
+
+def closest_creep_tile(creep: np.ndarray, target: Point2) -> Optional[Point2]:
+    """The creep tile closest to `target`.
+
+    Parameters
+    ----------
+    creep :
+        Creep grid.
+    target :
+        Point we want to get close to.
+
+    Returns
+    -------
+    Optional[Point2] :
+        Tile position, None if there is no creep.
+    """
+    ys, xs = np.nonzero(creep)
+    if not len(xs):
+        return None
+    closest: int = int(np.argmin((xs - target[0]) ** 2 + (ys - target[1]) ** 2))
+    return Point2((float(xs[closest]), float(ys[closest])))
+
+
+def creep_edge_spots(
+    creep: np.ndarray, pathing: np.ndarray, placement: np.ndarray
+) -> np.ndarray:
+    """Placeable creep tiles next to pathable ground without creep.
+
+    Parameters
+    ----------
+    creep :
+        Creep grid.
+    pathing :
+        Pathing grid.
+    placement :
+        Placement grid.
+
+    Returns
+    -------
+    np.ndarray :
+        (n, 2) array of tile centres, where a creep tumor would push
+        creep onto new ground.
+    """
+    has_creep: np.ndarray = creep != 0
+    frontier: np.ndarray = (pathing != 0) & ~has_creep
+    spots: np.ndarray = has_creep & (placement != 0) & dilate(frontier)
+    ys, xs = np.nonzero(spots)
+    return np.column_stack((xs + 0.5, ys + 0.5))
@@ -0,0 +1,365 @@
+"""
+Ordered creep tumor placement plan for a map and spawn pair.
+
+The plan follows ground lanes from our main toward our next expansions and
+the enemy natural, with one tumor spot every `CREEP_PLAN_SPACING` tiles.
+Each spot knows the spot before it on its lane, so the plan forms a tree
+rooted at the main, ordered by ground distance from the main. Plans only
+depend on the map grids, so they are built once, cached under
+`data/creep_plans/` and reused in every later game on that map and spawn.
+Map grids are cached under `data/maps/` too, so
+`scripts/build_creep_plans.py` can build every spawn pair offline.
+"""
+import re
+from os import makedirs, path
+from typing import Optional
+
+import numpy as np
+from sc2.position import Point2
+
+from bot.flow_field import descend, distance_field
+
+CREEP_PLAN_VERSION: int = 2
+CREEP_PLAN_SPACING: int = 8
+# own expansions, closest first, that get a creep lane
+CREEP_PLAN_OWN_BASES: int = 3
+# how far from a lane tile a placeable spot may be snapped to
+SNAP_RADIUS: int = 2
+# a spot is done once a tumor is this close
+TUMOR_RADIUS: float = 1.5
+# game loops a queen gets to place an assigned tumor before the spot is retried
+SPOT_TIMEOUT: int = 448
+# failed attempts before a spot is given up on
+MAX_SPOT_ATTEMPTS: int = 2
+
+PENDING: int = 0
+DONE: int = 1
+BLOCKED: int = 2
+
+
+def _tile(point: tuple[float, float]) -> tuple[int, int]:
+    return int(point[0]), int(point[1])
+
+
+def _safe_name(map_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_]+", "_", map_name).strip("_")
+
+
+def map_grids_path(data_dir: str, map_name: str) -> str:
+    return path.join(data_dir, "maps", f"{_safe_name(map_name)}.npz")
+
+
+def creep_plan_path(
+    data_dir: str, map_name: str, start: Point2, enemy_start: Point2
+) -> str:
+    sx, sy = _tile(start)
+    ex, ey = _tile(enemy_start)
+    return path.join(
+        data_dir,
+        "creep_plans",
+        f"{_safe_name(map_name)}-{sx}x{sy}-{ex}x{ey}.npz",
+    )
+
+
+def save_map_grids(
+    file_path: str,
+    pathing: np.ndarray,
+    placement: np.ndarray,
+    start_locations: list[Point2],
+    expansions: list[Point2],
+) -> str:
+    """Store what `build_creep_plan` needs, so plans can be built offline."""
+    makedirs(path.dirname(file_path), exist_ok=True)
+    np.savez_compressed(
+        file_path,
+        pathing=pathing.astype(np.uint8),
+        placement=placement.astype(np.uint8),
+        start_locations=np.array(start_locations, dtype=np.float32),
+        expansions=np.array(expansions, dtype=np.float32),
+    )
+    return file_path
+
+
+def creep_plan_targets(
+    expansions: list[Point2], start: Point2, enemy_start: Point2
+) -> list[tuple[int, int]]:
+    """Lane end points: our closest expansions, then the enemy natural."""
+    points: np.ndarray = np.array(expansions, dtype=np.float64).reshape(-1, 2)
+    from_start: np.ndarray = np.hypot(points[:, 0] - start[0], points[:, 1] - start[1])
+    from_enemy: np.ndarray = np.hypot(
+        points[:, 0] - enemy_start[0], points[:, 1] - enemy_start[1]
+    )
+    # the mains themselves are expansion locations too, skip them
+    own: list[int] = [i for i in np.argsort(from_start) if from_start[i] > 5]
+    targets: list[tuple[int, int]] = [
+        _tile(points[i]) for i in own[:CREEP_PLAN_OWN_BASES]
+    ]
+    enemy: list[int] = [i for i in np.argsort(from_enemy) if from_enemy[i] > 5]
+    if enemy:
+        targets.append(_tile(points[enemy[0]]))
+    return targets
+
+
+def _trace_lane(
+    field: np.ndarray, start: tuple[int, int], target: tuple[int, int]
+) -> list[tuple[int, int]]:
+    """Tiles from `start` down a padded distance field to `target`."""
+    x: np.ndarray = np.array([start[0]])
+    y: np.ndarray = np.array([start[1]])
+    lane: list[tuple[int, int]] = []
+    while np.isfinite(field[y[0] + 1, x[0] + 1]) and field[y[0] + 1, x[0] + 1] > 0:
+        next_x, next_y, _ = descend(field, x, y, target, 1)
+        if next_x[0] == x[0] and next_y[0] == y[0]:
+            break
+        x, y = next_x, next_y
+        lane.append((int(x[0]), int(y[0])))
+    return lane
+
+
+def _lane_start(field: np.ndarray, seeds: np.ndarray) -> tuple[int, int]:
+    """The seed tile closest to a lane's target along the padded `field`."""
+    distances: np.ndarray = field[seeds[:, 1] + 1, seeds[:, 0] + 1]
+    x, y = seeds[int(np.argmin(distances))]
+    return int(x), int(y)
+
+
+def _snap(tile: tuple[int, int], placeable: np.ndarray) -> Optional[tuple[int, int]]:
+    x, y = tile
+    height, width = placeable.shape
+    x0, x1 = max(x - SNAP_RADIUS, 0), min(x + SNAP_RADIUS + 1, width)
+    y0, y1 = max(y - SNAP_RADIUS, 0), min(y + SNAP_RADIUS + 1, height)
+    ys, xs = np.nonzero(placeable[y0:y1, x0:x1])
+    if not len(xs):
+        return None
+    closest: int = int(np.argmin((xs + x0 - x) ** 2 + (ys + y0 - y) ** 2))
+    return int(xs[closest] + x0), int(ys[closest] + y0)
+
+
+def build_creep_plan(
+    pathing: np.ndarray,
+    placement: np.ndarray,
+    start: Point2,
+    enemy_start: Point2,
+    expansions: list[Point2],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Compute tumor spots along the lanes out of our main.
+
+    Parameters
+    ----------
+    pathing :
+        Pathing grid, indexed [y, x].
+    placement :
+        Placement grid, indexed [y, x].
+    start :
+        Our start location.
+    enemy_start :
+        Enemy start location.
+    expansions :
+        Every expansion location on the map.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray] :
+        (n, 2) spot tile centres ordered by ground distance from our main,
+        and for each spot the index of the spot before it on its lane,
+        -1 for the first spot of a lane.
+    """
+    pathable: np.ndarray = pathing != 0
+    placeable: np.ndarray = pathable & (placement != 0)
+    start_tile: tuple[int, int] = _tile(start)
+    from_start: np.ndarray = distance_field(pathable, start_tile)
+    # our townhall makes its own tiles unpathable, lanes leave from the
+    # tiles around it the start field was seeded with
+    seeds: np.ndarray = np.argwhere(from_start[1:-1, 1:-1] == 0)[:, ::-1]
+    if not len(seeds):
+        return np.zeros((0, 2), dtype=np.float32), np.zeros(0, dtype=np.int16)
+
+    spots: list[tuple[int, int]] = []
+    parents: list[int] = []
+    for target in creep_plan_targets(expansions, start, enemy_start):
+        field: np.ndarray = distance_field(pathable, target)
+        lane: list[tuple[int, int]] = _trace_lane(
+            field, _lane_start(field, seeds), target
+        )
+        parent: int = -1
+        for tile in lane[CREEP_PLAN_SPACING::CREEP_PLAN_SPACING]:
+            spot: Optional[tuple[int, int]] = _snap(tile, placeable)
+            if spot is None:
+                continue
+            # lanes share their first stretch, reuse spots already planned
+            existing: list[int] = [
+                i
+                for i, (x, y) in enumerate(spots)
+                if (x - spot[0]) ** 2 + (y - spot[1]) ** 2
+                < (CREEP_PLAN_SPACING / 2) ** 2
+            ]
+            if existing:
+                parent = existing[0]
+                continue
+            spots.append(spot)
+            parents.append(parent)
+            parent = len(spots) - 1
+
+    if not spots:
+        return np.zeros((0, 2), dtype=np.float32), np.zeros(0, dtype=np.int16)
+
+    tiles: np.ndarray = np.array(spots)
+    order: np.ndarray = np.argsort(
+        from_start[tiles[:, 1] + 1, tiles[:, 0] + 1], kind="stable"
+    )
+    new_index: np.ndarray = np.empty(len(order), dtype=np.int16)
+    new_index[order] = np.arange(len(order))
+    old_parents: np.ndarray = np.array(parents)[order]
+    ordered_parents: np.ndarray = np.where(
+        old_parents >= 0, new_index[old_parents], -1
+    ).astype(np.int16)
+    return (tiles[order] + 0.5).astype(np.float32), ordered_parents
+
+
+def build_and_save_creep_plan(
+    file_path: str,
+    pathing: np.ndarray,
+    placement: np.ndarray,
+    start: Point2,
+    enemy_start: Point2,
+    expansions: list[Point2],
+) -> "CreepPlan":
+    spots, parents = build_creep_plan(
+        pathing, placement, start, enemy_start, expansions
+    )
+    plan = CreepPlan(spots, parents)
+    plan.save(file_path)
+    return plan
+
+
+class CreepPlan:
+    def __init__(self, spots: np.ndarray, parents: np.ndarray):
+        """Planned spots plus their per-game progress.
+
+        Parameters
+        ----------
+        spots :
+            (n, 2) spot positions, in placement order.
+        parents :
+            Index of the previous spot on each spot's lane, -1 if none.
+        """
+        self.spots: np.ndarray = spots
+        self.parents: np.ndarray = parents
+        self.status: np.ndarray = np.full(len(spots), PENDING, dtype=np.int8)
+        self.attempts: np.ndarray = np.zeros(len(spots), dtype=np.int8)
+        self.assigned_frame: np.ndarray = np.full(len(spots), -1, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.spots)
+
+    @classmethod
+    def load(cls, file_path: str) -> Optional["CreepPlan"]:
+        with np.load(file_path) as data:
+            if int(data["version"]) != CREEP_PLAN_VERSION:
+                return None
+            return cls(data["spots"], data["parents"])
+
+    def save(self, file_path: str) -> str:
+        makedirs(path.dirname(file_path), exist_ok=True)
+        np.savez_compressed(
+            file_path,
+            version=CREEP_PLAN_VERSION,
+            spots=self.spots,
+            parents=self.parents,
+        )
+        return file_path
+
+    def update(self, frame: int, tumor_x: np.ndarray, tumor_y: np.ndarray) -> None:
+        """Mark spots with a tumor on them done, and expire stale assignments.
+
+        Parameters
+        ----------
+        frame :
+            Current game loop.
+        tumor_x :
+            X positions of our creep tumors.
+        tumor_y :
+            Y positions of our creep tumors.
+        """
+        if len(tumor_x):
+            near_tumor: np.ndarray = (
+                np.hypot(
+                    self.spots[:, 0, None] - tumor_x[None, :],
+                    self.spots[:, 1, None] - tumor_y[None, :],
+                ).min(axis=1)
+                < TUMOR_RADIUS
+            )
+            self.status[near_tumor] = DONE
+
+        expired: np.ndarray = (
+            (self.status == PENDING)
+            & (self.assigned_frame >= 0)
+            & (frame - self.assigned_frame > SPOT_TIMEOUT)
+        )
+        self.assigned_frame[expired] = -1
+        self.status[expired & (self.attempts >= MAX_SPOT_ATTEMPTS)] = BLOCKED
+
+    def available(self, creep: np.ndarray, limit: Optional[int] = None) -> np.ndarray:
+        """Pending spots on creep that aren't assigned, in placement order.
+
+        Parameters
+        ----------
+        creep :
+            Creep grid, indexed [y, x].
+        limit :
+            Return at most this many spots.
+
+        Returns
+        -------
+        np.ndarray :
+            Spot indices.
+        """
+        tiles: np.ndarray = self.spots.astype(np.intp)
+        return np.flatnonzero(
+            (self.status == PENDING)
+            & (self.assigned_frame < 0)
+            & (creep[tiles[:, 1], tiles[:, 0]] != 0)
+        )[:limit]
+
+    def assign(self, spot: int, frame: int) -> Point2:
+        """Mark `spot` as taken by a queen, it is retried if no tumor shows
+        up within `SPOT_TIMEOUT`."""
+        self.assigned_frame[spot] = frame
+        self.attempts[spot] += 1
+        return self.position(spot)
+
+    def position(self, spot: int) -> Point2:
+        return Point2((float(self.spots[spot, 0]), float(self.spots[spot, 1])))
+
+    def next_spot(self, position: Point2) -> Optional[int]:
+        """Where a creep tumor at `position` should spread to, without
+        assigning it.
+
+        The tumor counts as being on the spot closest to it. The first open
+        child of that spot on its lane comes first, then the first open spot
+        after it in placement order.
+
+        Parameters
+        ----------
+        position :
+            Position of the creep tumor.
+
+        Returns
+        -------
+        Optional[int] :
+            Spot index, or None if no pending, unassigned spot is left
+            beyond the tumor.
+        """
+        open_spots: np.ndarray = (self.status == PENDING) & (self.assigned_frame < 0)
+        if not open_spots.any():
+            return None
+        here: int = int(
+            np.hypot(
+                self.spots[:, 0] - position[0], self.spots[:, 1] - position[1]
+            ).argmin()
+        )
+        children: np.ndarray = np.flatnonzero(open_spots & (self.parents == here))
+        if len(children):
+            return int(children[0])
+        later: np.ndarray = np.flatnonzero(open_spots[here + 1 :])
+        return here + 1 + int(later[0]) if len(later) else None
@@ -0,0 +1,190 @@
+"""
+Fixed size binary record of the decisions `MyBot.on_step` makes.
+
+Records are packed straight into a preallocated ring buffer so recording
+never allocates, and the buffer is written to a memory-mapped file under
+`data/` at the end of the game. Use `scripts/decision_trace_timeline.py`
+to turn a dump back into a per-frame timeline.
+"""
+import mmap
+import struct
+from os import makedirs, path
+from typing import Iterator, NamedTuple
+
+# frame, section, tag, ability, target tag, target x, target y
+RECORD: struct.Struct = struct.Struct("<IHxxQIQff")
+# magic, version, record size, capacity, records in dump, records dropped,
+# total step time (ns), steps timed
+HEADER: struct.Struct = struct.Struct("<4sHHIIQQQ")
+MAGIC: bytes = b"JTRC"
+VERSION: int = 1
+
+
+class TraceRecord(NamedTuple):
+    frame: int
+    section: int
+    tag: int
+    ability: int
+    target_tag: int
+    x: float
+    y: float
+
+
+class TraceHeader(NamedTuple):
+    capacity: int
+    count: int
+    dropped: int
+    step_time_ns: int
+    steps: int
+
+
+class DecisionTrace:
+    def __init__(self, capacity: int = 65536):
+        """Preallocate the ring buffer.
+
+        Parameters
+        ----------
+        capacity :
+            Number of records kept, once full the oldest records are
+            overwritten.
+        """
+        self.capacity: int = capacity
+        self._buffer: bytearray = bytearray(RECORD.size * capacity)
+        self._pack_into = RECORD.pack_into
+        self._index: int = 0
+        self._written: int = 0
+        self.step_time_ns: int = 0
+        self.steps: int = 0
+
+    def __len__(self) -> int:
+        return min(self._written, self.capacity)
+
+    def record(
+        self,
+        frame: int,
+        section: int,
+        tag: int,
+        ability: int,
+        target_tag: int = 0,
+        x: float = 0.0,
+        y: float = 0.0,
+    ) -> None:
+        """Write one record over the oldest slot in the ring buffer.
+
+        Parameters
+        ----------
+        frame :
+            Game loop the decision was made on.
+        section :
+            `StepSection` value the decision belongs to.
+        tag :
+            Tag of the unit receiving the command.
+        ability :
+            `AbilityId` value issued, 0 for behaviors that pick their own.
+        target_tag :
+            Tag of the target unit, 0 if the target is a position.
+        x :
+            Target x coordinate.
+        y :
+            Target y coordinate.
+        """
+        index: int = self._index
+        self._pack_into(
+            self._buffer,
+            index * RECORD.size,
+            frame,
+            section,
+            tag,
+            ability,
+            target_tag,
+            x,
+            y,
+        )
+        index += 1
+        self._index = 0 if index == self.capacity else index
+        self._written += 1
+
+    def add_step_time(self, step_time_ns: int) -> None:
+        self.step_time_ns += step_time_ns
+        self.steps += 1
+
+    def dump(self, file_path: str) -> str:
+        """Write the buffer, oldest record first, to a memory-mapped file.
+
+        Parameters
+        ----------
+        file_path :
+            Where to write the dump, parent directories are created.
+
+        Returns
+        -------
+        str :
+            The path written to.
+        """
+        directory: str = path.dirname(file_path)
+        if directory:
+            makedirs(directory, exist_ok=True)
+
+        count: int = len(self)
+        size: int = HEADER.size + count * RECORD.size
+        with open(file_path, "w+b") as f:
+            f.truncate(size)
+            with mmap.mmap(f.fileno(), size) as mm:
+                HEADER.pack_into(
+                    mm,
+                    0,
+                    MAGIC,
+                    VERSION,
+                    RECORD.size,
+                    self.capacity,
+                    count,
+                    self._written - count,
+                    self.step_time_ns,
+                    self.steps,
+                )
+                view: memoryview = memoryview(self._buffer)
+                split: int = self._index * RECORD.size
+                offset: int = HEADER.size
+                if self._written >= self.capacity:
+                    # buffer has wrapped, oldest records start at the write index
+                    tail: int = len(self._buffer) - split
+                    mm[offset : offset + tail] = view[split:]
+                    offset += tail
+                mm[offset : offset + split] = view[:split]
+                mm.flush()
+                view.release()
+        return file_path
+
+
+def read_trace(file_path: str) -> tuple[TraceHeader, Iterator[TraceRecord]]:
+    """Load a dump written by `DecisionTrace.dump`.
+
+    Parameters
+    ----------
+    file_path :
+        Path of the dump.
+
+    Returns
+    -------
+    tuple[TraceHeader, Iterator[TraceRecord]] :
+        The dump header and its records, oldest first.
+    """
+    with open(file_path, "rb") as f:
+        data: bytes = f.read()
+
+    (
+        magic,
+        version,
+        record_size,
+        capacity,
+        count,
+        dropped,
+        step_time_ns,
+        steps,
+    ) = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{file_path} is not a version {VERSION} decision trace")
+
+    header = TraceHeader(capacity, count, dropped, step_time_ns, steps)
+    body: memoryview = memoryview(data)[HEADER.size : HEADER.size + count * RECORD.size]
+    return header, (TraceRecord(*r) for r in RECORD.iter_unpack(body))
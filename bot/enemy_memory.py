@@ -0,0 +1,270 @@
+"""
+Last seen position, type and time of every enemy unit we have spotted.
+
+Entries live in preallocated arrays, one slot per tag, so queries over
+everything we remember are numpy reductions. Confidence in an entry halves
+every half-life since it was last seen, an entry is forgotten once
+confidence runs out, when its last position is in vision and it isn't
+there, or when the unit is confirmed dead.
+"""
+from typing import Callable, Optional
+
+import numpy as np
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+
+from bot.observation_delta import ColumnDelta
+from bot.unit_snapshot import STRUCTURE, UnitColumns
+
+# game loops for confidence in a unit's last position to halve
+UNIT_HALF_LIFE: int = 672
+STRUCTURE_HALF_LIFE: int = 6720
+MIN_CONFIDENCE: float = 0.05
+# value of visible tiles in `state.visibility`
+VISIBLE: int = 2
+
+WORKER_TYPES: frozenset[int] = frozenset(
+    t.value
+    for t in (UnitTypeId.SCV, UnitTypeId.PROBE, UnitTypeId.DRONE, UnitTypeId.MULE)
+)
+
+
+class EnemyMemory:
+    def __init__(self, supply_of: Callable[[int], float], capacity: int = 512):
+        """Allocate the slots.
+
+        Parameters
+        ----------
+        supply_of :
+            Supply a unit of the given type id takes up.
+        capacity :
+            Slots allocated up front, doubled whenever they run out.
+        """
+        self._supply_of: Callable[[int], float] = supply_of
+        self._supply_by_type: dict[int, float] = {}
+        self.tags: np.ndarray = np.zeros(capacity, dtype=np.uint64)
+        self.type_ids: np.ndarray = np.zeros(capacity, dtype=np.int32)
+        self.x: np.ndarray = np.zeros(capacity, dtype=np.float32)
+        self.y: np.ndarray = np.zeros(capacity, dtype=np.float32)
+        self.last_seen: np.ndarray = np.zeros(capacity, dtype=np.int32)
+        self.supply: np.ndarray = np.zeros(capacity, dtype=np.float32)
+        self.is_structure: np.ndarray = np.zeros(capacity, dtype=bool)
+        self.is_army: np.ndarray = np.zeros(capacity, dtype=bool)
+        self.active: np.ndarray = np.zeros(capacity, dtype=bool)
+        self.slot_of: dict[int, int] = {}
+        self._free: list[int] = list(range(capacity - 1, -1, -1))
+        # slot of every row of the columns passed to the last `update`
+        self._row_slots: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.slot_of)
+
+    def _grow(self) -> None:
+        capacity: int = len(self.tags)
+        for name in (
+            "tags",
+            "type_ids",
+            "x",
+            "y",
+            "last_seen",
+            "supply",
+            "is_structure",
+            "is_army",
+            "active",
+        ):
+            column: np.ndarray = getattr(self, name)
+            setattr(self, name, np.concatenate((column, np.zeros_like(column))))
+        self._free.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def _type_supply(self, type_id: int) -> float:
+        if type_id not in self._supply_by_type:
+            self._supply_by_type[type_id] = self._supply_of(type_id)
+        return self._supply_by_type[type_id]
+
+    def _set_type(self, slot: int, type_id: int, structure: bool) -> None:
+        self.type_ids[slot] = type_id
+        self.is_structure[slot] = structure
+        self.is_army[slot] = not structure and type_id not in WORKER_TYPES
+        self.supply[slot] = 0.0 if structure else self._type_supply(type_id)
+
+    def update(
+        self,
+        enemy: UnitColumns,
+        frame: int,
+        visibility: Optional[np.ndarray] = None,
+        delta: Optional[ColumnDelta] = None,
+    ) -> None:
+        """Store every visible enemy, call once per step.
+
+        Parameters
+        ----------
+        enemy :
+            This frame's enemy columns.
+        frame :
+            Current game loop.
+        visibility :
+            Visibility grid indexed [y, x], remembered units whose last
+            position is visible but weren't seen this frame are forgotten.
+        delta :
+            Changes since the columns passed to the previous call, so only
+            new units have to be looked up by tag.
+        """
+        if delta is not None and self._row_slots is not None:
+            slots: np.ndarray = np.full(len(enemy), -1, dtype=np.intp)
+            slots[delta.matched_current] = self._row_slots[delta.matched_previous]
+            added: np.ndarray = delta.added
+            slots[added] = [
+                self.slot_of.get(tag, -1) for tag in enemy.tags[added].tolist()
+            ]
+            # units back in vision may have morphed while they were out of it
+            back: np.ndarray = added[slots[added] >= 0]
+            morphed: np.ndarray = np.concatenate(
+                (
+                    delta.morphed,
+                    back[self.type_ids[slots[back]] != enemy.type_ids[back]],
+                )
+            )
+        else:
+            slots = np.fromiter(
+                (self.slot_of.get(tag, -1) for tag in enemy.tags.tolist()),
+                dtype=np.intp,
+                count=len(enemy),
+            )
+            morphed = None
+        structures: np.ndarray = enemy.has_flag(STRUCTURE)
+        for row in np.flatnonzero(slots < 0):
+            if not self._free:
+                self._grow()
+            slot: int = self._free.pop()
+            tag: int = int(enemy.tags[row])
+            self.slot_of[tag] = slot
+            self.tags[slot] = tag
+            self.active[slot] = True
+            self._set_type(slot, int(enemy.type_ids[row]), bool(structures[row]))
+            slots[row] = slot
+
+        # morphs keep their tag
+        if morphed is None:
+            morphed = np.flatnonzero(self.type_ids[slots] != enemy.type_ids)
+        for row in morphed:
+            self._set_type(
+                int(slots[row]), int(enemy.type_ids[row]), bool(structures[row])
+            )
+
+        self.x[slots] = enemy.x
+        self.y[slots] = enemy.y
+        self.last_seen[slots] = frame
+        self._row_slots = slots
+
+        stale: np.ndarray = self.active & (self.last_seen != frame)
+        forget: np.ndarray = stale & (self.confidence(frame) < MIN_CONFIDENCE)
+        if visibility is not None and stale.any():
+            tile_x: np.ndarray = np.clip(
+                self.x.astype(np.intp), 0, visibility.shape[1] - 1
+            )
+            tile_y: np.ndarray = np.clip(
+                self.y.astype(np.intp), 0, visibility.shape[0] - 1
+            )
+            forget |= stale & (visibility[tile_y, tile_x] == VISIBLE)
+        for slot in np.flatnonzero(forget):
+            self.remove(int(self.tags[slot]))
+
+    def remove(self, tag: int) -> None:
+        """Forget `tag`, eg. once it is confirmed dead."""
+        slot: Optional[int] = self.slot_of.pop(tag, None)
+        if slot is None:
+            return
+        self.active[slot] = False
+        self._free.append(slot)
+
+    def confidence(self, frame: int) -> np.ndarray:
+        """Per slot confidence that the entry is still where it was seen."""
+        half_life: np.ndarray = np.where(
+            self.is_structure, STRUCTURE_HALF_LIFE, UNIT_HALF_LIFE
+        )
+        return np.where(self.active, 0.5 ** ((frame - self.last_seen) / half_life), 0.0)
+
+    def army_supply_near(self, position: Point2, distance: float, frame: int) -> float:
+        """Remembered enemy army supply within `distance` of `position`,
+        weighted by confidence.
+
+        Parameters
+        ----------
+        position :
+            Centre of the area.
+        distance :
+            Radius of the area.
+        frame :
+            Current game loop.
+
+        Returns
+        -------
+        float :
+            Expected army supply in the area.
+        """
+        dx: np.ndarray = self.x - position[0]
+        dy: np.ndarray = self.y - position[1]
+        near: np.ndarray = self.is_army & (dx * dx + dy * dy < distance * distance)
+        return float((self.supply * self.confidence(frame))[near].sum())
+
+    def combatants(
+        self,
+        frame: int,
+        position: Optional[Point2] = None,
+        distance: float = np.inf,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Type ids and confidence of every remembered army unit and structure.
+
+        Parameters
+        ----------
+        frame :
+            Current game loop.
+        position :
+            Only return entries last seen within `distance` of this.
+        distance :
+            Radius around `position`.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray] :
+            Type ids, and confidence that each is still where it was seen.
+        """
+        keep: np.ndarray = self.active & (self.is_army | self.is_structure)
+        if position is not None:
+            dx: np.ndarray = self.x - position[0]
+            dy: np.ndarray = self.y - position[1]
+            keep &= dx * dx + dy * dy < distance * distance
+        slots: np.ndarray = np.flatnonzero(keep)
+        return self.type_ids[slots], self.confidence(frame)[slots]
+
+    def seen_near(
+        self, position: Point2, distance: float, frame: int, max_age: int
+    ) -> bool:
+        """Whether we saw any enemy within `distance` of `position` in the
+        last `max_age` game loops."""
+        dx: np.ndarray = self.x - position[0]
+        dy: np.ndarray = self.y - position[1]
+        return bool(
+            (
+                self.active
+                & (frame - self.last_seen <= max_age)
+                & (dx * dx + dy * dy < distance * distance)
+            ).any()
+        )
+
+    def nearest_structure(self, position: Point2) -> Optional[Point2]:
+        """Last seen position of the remembered structure closest to `position`.
+
+        Returns
+        -------
+        Optional[Point2] :
+            The position, None if we don't know of any enemy structure.
+        """
+        slots: np.ndarray = np.flatnonzero(self.active & self.is_structure)
+        if not len(slots):
+            return None
+        distance: np.ndarray = np.hypot(
+            self.x[slots] - position[0], self.y[slots] - position[1]
+        )
+        slot: int = int(slots[distance.argmin()])
+        return Point2((float(self.x[slot]), float(self.y[slot])))
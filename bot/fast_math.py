@@ -0,0 +1,50 @@
+"""
+Distance queries on the bot's hot paths.
+
+Uses the compiled `cython_extensions` functions when they are installed,
+as they are in the ladder zip and the exe, and the `Units` / `Point2`
+methods otherwise, so results are the same either way. Single distances
+stay in Python, where `math.hypot` beats the call into the extension.
+"""
+from sc2.position import Point2
+from sc2.unit import Unit
+from sc2.units import Units
+
+try:
+    from cython_extensions import cy_center, cy_closer_than, cy_closest_to
+
+    HAVE_CYTHON: bool = True
+except ImportError:
+    HAVE_CYTHON: bool = False
+
+
+def _position(target: Unit | Point2) -> Point2:
+    return target.position if isinstance(target, Unit) else target
+
+
+def closer_than(units: Units, distance: float, target: Unit | Point2) -> Units:
+    """`Units.closer_than`, units strictly closer than `distance` to `target`."""
+    if not units:
+        return units
+    if HAVE_CYTHON:
+        return units.subgroup(cy_closer_than(units, distance, _position(target)))
+    return units.closer_than(distance, target)
+
+
+def closest_to(units: Units, target: Unit | Point2) -> Unit:
+    """`Units.closest_to`, `units` must not be empty."""
+    if HAVE_CYTHON:
+        return cy_closest_to(_position(target), units)
+    return units.closest_to(target)
+
+
+def center(units: Units) -> Point2:
+    """`Units.center`, `units` must not be empty."""
+    if HAVE_CYTHON:
+        return Point2(cy_center(units))
+    return units.center
+
+
+def distance_to(a: Unit | Point2, b: Unit | Point2) -> float:
+    """Distance between the positions of `a` and `b`."""
+    return _position(a).distance_to_point2(_position(b))
@@ -0,0 +1,302 @@
+"""
+Shared flow fields toward common move targets.
+
+One distance field is computed per (target tile, grid type) with a
+vectorized breadth first search over the grid, on the background planner,
+and cached until a change to the grid, such as a new structure, alters
+its distances. Every unit heading to that target then reads its next
+waypoint from the same field, so the cost of a field does not grow with
+the number of units using it. Diagonal steps never cut between two
+unpathable tiles.
+"""
+from collections import OrderedDict
+from enum import IntEnum
+from typing import Optional
+
+import numpy as np
+from sc2.position import Point2
+
+from bot.grids import NEIGHBOURS, dilate, dilate_steps, step_masks
+from bot.planner import BackgroundPlanner
+
+# when the target tile isn't pathable (eg. a townhall), start the search from
+# pathable tiles this close to it
+SEED_RADIUS: int = 4
+# tiles a waypoint is placed ahead of the unit along the field
+WAYPOINT_LOOKAHEAD: int = 6
+MAX_CACHED_FIELDS: int = 8
+# weight of straight line distance when breaking ties between neighbours,
+# small enough to never outweigh a whole step
+TIE_BREAK: float = 1e-3
+
+
+class GridType(IntEnum):
+    GROUND = 0
+
+
+def distance_field(pathable: np.ndarray, target: tuple[int, int]) -> np.ndarray:
+    """Breadth first search distances to `target`, one wavefront per iteration.
+
+    Parameters
+    ----------
+    pathable :
+        Boolean grid of tiles that can be walked through.
+    target :
+        (x, y) tile to reach.
+
+    Returns
+    -------
+    np.ndarray :
+        Steps to the target for every tile, padded with one tile of inf on
+        every side so neighbour lookups never leave the array. Unreachable
+        tiles are inf.
+    """
+    height, width = pathable.shape
+    x: int = min(max(target[0], 0), width - 1)
+    y: int = min(max(target[1], 0), height - 1)
+
+    frontier: np.ndarray = np.zeros_like(pathable)
+    if pathable[y, x]:
+        frontier[y, x] = True
+    else:
+        ys, xs = np.ogrid[:height, :width]
+        squared_distance: np.ndarray = (xs - x) ** 2 + (ys - y) ** 2
+        frontier = pathable & (squared_distance <= SEED_RADIUS**2)
+        if not frontier.any() and pathable.any():
+            # fall back to the closest pathable tile
+            closest: int = int(np.argmin(np.where(pathable, squared_distance, np.inf)))
+            frontier.flat[closest] = True
+
+    distance: np.ndarray = np.full((height + 2, width + 2), np.inf, dtype=np.float32)
+    inner: np.ndarray = distance[1:-1, 1:-1]
+    inner[frontier] = 0
+    unvisited: np.ndarray = pathable & ~frontier
+    masks: np.ndarray = step_masks(pathable)
+    step: int = 0
+    while frontier.any():
+        step += 1
+        frontier = dilate_steps(frontier, masks) & unvisited
+        inner[frontier] = step
+        unvisited &= ~frontier
+    return distance
+
+
+def field_changed(
+    field: np.ndarray,
+    before: np.ndarray,
+    after: np.ndarray,
+    target: tuple[int, int],
+) -> bool:
+    """Whether `distance_field` on `after` would give any tile still pathable
+    another distance than `field`.
+
+    Tiles becoming unpathable only change distances if some tile next to
+    them loses every neighbour one step closer to the target, so most new
+    structures leave a field as it is, apart from their own tiles. Tiles
+    becoming pathable change it if they are next to a reachable tile.
+
+    Parameters
+    ----------
+    field :
+        Padded distance field computed on `before`.
+    before :
+        Boolean pathable grid `field` was computed on.
+    after :
+        The current boolean pathable grid.
+    target :
+        (x, y) tile the field leads to.
+    """
+    height, width = after.shape
+    x: int = min(max(target[0], 0), width - 1)
+    y: int = min(max(target[1], 0), height - 1)
+    if before[y, x] != after[y, x]:
+        return True
+    inner: np.ndarray = field[1:-1, 1:-1]
+    reached: np.ndarray = np.isfinite(inner)
+    opened: np.ndarray = after & ~before
+    if opened.any():
+        if dilate(opened)[reached].any():
+            return True
+        if not after[y, x]:
+            # the search may be seeded from the opened tiles
+            ys, xs = np.ogrid[:height, :width]
+            near: np.ndarray = (xs - x) ** 2 + (ys - y) ** 2 <= SEED_RADIUS**2
+            if (opened & near).any() or not (before & near).any():
+                return True
+
+    blocked: np.ndarray = before & ~after
+    if not blocked.any():
+        return False
+    if not (after & (inner == 0)).any():
+        # every tile the search started from is blocked
+        return True
+    ys, xs = np.nonzero(dilate(blocked) & after & reached & (inner > 0))
+    padded: np.ndarray = np.pad(after, 1)
+    # padded coordinates of every neighbour of every tile next to a blocked one
+    nx: np.ndarray = xs[:, None] + 1 + NEIGHBOURS[:, 0]
+    ny: np.ndarray = ys[:, None] + 1 + NEIGHBOURS[:, 1]
+    closer: np.ndarray = (field[ny, nx] == inner[ys, xs][:, None] - 1) & padded[ny, nx]
+    # the step back to a closer tile must not cut between blocked tiles
+    passable: np.ndarray = padded[ys[:, None] + 1, nx] | padded[ny, xs[:, None] + 1]
+    return not (closer & passable).any(axis=1).all()
+
+
+def descend(
+    field: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    target: tuple[int, int],
+    steps: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Walk every (x, y) tile `steps` tiles down a padded distance field.
+
+    Breadth first search distances tie often, ties are broken toward the
+    straight line distance to `target` so units don't zig-zag. Like the
+    search, diagonal steps don't cut between two unreachable tiles.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray] :
+        End tile x and y, and whether the start tile could reach the target.
+    """
+    rows: np.ndarray = np.arange(len(x))
+    # padded field, tile (x, y) lives at [y + 1, x + 1]
+    px: np.ndarray = np.clip(x, 0, field.shape[1] - 3) + 1
+    py: np.ndarray = np.clip(y, 0, field.shape[0] - 3) + 1
+    reachable: np.ndarray = np.isfinite(field[py, px])
+    for _ in range(steps):
+        nx: np.ndarray = px[:, None] + NEIGHBOURS[:, 0]
+        ny: np.ndarray = py[:, None] + NEIGHBOURS[:, 1]
+        costs: np.ndarray = field[ny, nx] + TIE_BREAK * np.hypot(
+            nx - (target[0] + 1), ny - (target[1] + 1)
+        )
+        # diagonal neighbours have one of the tiles beside the step reachable
+        costs[
+            np.isinf(field[py[:, None], nx]) & np.isinf(field[ny, px[:, None]])
+        ] = np.inf
+        best: np.ndarray = costs.argmin(axis=1)
+        downhill: np.ndarray = field[ny[rows, best], nx[rows, best]] < field[py, px]
+        px = np.where(downhill, nx[rows, best], px)
+        py = np.where(downhill, ny[rows, best], py)
+    return px - 1, py - 1, reachable
+
+
+class FlowFieldCache:
+    def __init__(self, planner: BackgroundPlanner):
+        """Cache of padded distance fields, computed on `planner`.
+
+        Parameters
+        ----------
+        planner :
+            Planner the searches run on.
+        """
+        self._planner: BackgroundPlanner = planner
+        self._fields: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._grids: dict[GridType, np.ndarray] = {}
+        self._versions: dict[GridType, int] = {}
+        self._requested: dict[GridType, set[str]] = {}
+
+    def update_grid(self, grid_type: GridType, grid: np.ndarray) -> None:
+        """Call every step with the current grid.
+
+        When the grid changed, cached fields it alters are dropped and
+        searches still running on the old grid are discarded.
+
+        Parameters
+        ----------
+        grid_type :
+            Which grid this is.
+        grid :
+            Grid where non-zero tiles are pathable.
+        """
+        pathable: np.ndarray = grid != 0
+        previous: Optional[np.ndarray] = self._grids.get(grid_type)
+        if previous is not None and np.array_equal(previous, pathable):
+            return
+        self._grids[grid_type] = pathable
+        self._versions[grid_type] = self._versions.get(grid_type, -1) + 1
+        for key in [k for k in self._fields if k[0] == grid_type]:
+            field: np.ndarray = self._fields[key]
+            if previous is None or field_changed(field, previous, pathable, key[1]):
+                del self._fields[key]
+            else:
+                field[1:-1, 1:-1][previous & ~pathable] = np.inf
+        for planner_key in self._requested.pop(grid_type, ()):
+            self._planner.discard(planner_key)
+
+    def _field(
+        self, grid_type: GridType, target: tuple[int, int], frame: int
+    ) -> Optional[np.ndarray]:
+        version: int = self._versions[grid_type]
+        key: tuple = (grid_type, target)
+        field: Optional[np.ndarray] = self._fields.get(key)
+        if field is not None:
+            self._fields.move_to_end(key)
+            return field
+
+        planner_key: str = f"flow:{grid_type.name}:{target[0]},{target[1]}:{version}"
+        if plan := self._planner.latest(planner_key, frame):
+            self._planner.discard(planner_key)
+            # nothing is requested after a checkpoint restore
+            self._requested.get(grid_type, set()).discard(planner_key)
+            self._fields[key] = plan.result
+            if len(self._fields) > MAX_CACHED_FIELDS:
+                self._fields.popitem(last=False)
+            return plan.result
+
+        if not self._planner.is_pending(planner_key):
+            self._planner.submit(
+                planner_key, frame, distance_field, self._grids[grid_type], target
+            )
+            self._requested.setdefault(grid_type, set()).add(planner_key)
+        return None
+
+    def waypoints(
+        self,
+        grid_type: GridType,
+        target: Point2,
+        x: np.ndarray,
+        y: np.ndarray,
+        frame: int,
+        lookahead: int = WAYPOINT_LOOKAHEAD,
+    ) -> Optional[np.ndarray]:
+        """Next waypoint toward `target` for every position.
+
+        Parameters
+        ----------
+        grid_type :
+            Grid the units move on.
+        target :
+            Where the units are heading.
+        x :
+            Unit x positions.
+        y :
+            Unit y positions.
+        frame :
+            Current game loop.
+        lookahead :
+            How many tiles ahead along the field the waypoint is.
+
+        Returns
+        -------
+        Optional[np.ndarray] :
+            (n, 2) waypoints, None while the field is still being computed.
+            Units that can't reach the target, or are about to arrive,
+            get the target itself.
+        """
+        if grid_type not in self._grids:
+            return None
+        field: Optional[np.ndarray] = self._field(
+            grid_type, (int(target[0]), int(target[1])), frame
+        )
+        if field is None:
+            return None
+        tile: tuple[int, int] = (int(target[0]), int(target[1]))
+        wx, wy, reachable = descend(
+            field, x.astype(np.intp), y.astype(np.intp), tile, lookahead
+        )
+        waypoints: np.ndarray = np.column_stack((wx + 0.5, wy + 0.5))
+        # head straight for the target once the field runs out
+        arrived: np.ndarray = field[wy + 1, wx + 1] == 0
+        waypoints[~reachable | arrived] = (target[0], target[1])
+        return waypoints
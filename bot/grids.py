@@ -0,0 +1,59 @@
+"""
+Helpers for numpy grids indexed [y, x], as returned by `PixelMap.data_numpy`.
+"""
+import numpy as np
+
+# (dx, dy) of the eight neighbours of a tile
+NEIGHBOURS: np.ndarray = np.array(
+    [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+)
+
+
+def dilate(grid: np.ndarray) -> np.ndarray:
+    """Boolean grid grown by one tile in all eight directions."""
+    padded: np.ndarray = np.pad(grid, 1)
+    height, width = grid.shape
+    grown: np.ndarray = grid.copy()
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            grown |= padded[dy : dy + height, dx : dx + width]
+    return grown
+
+
+def step_masks(pathable: np.ndarray) -> np.ndarray:
+    """For each step in `NEIGHBOURS`, the tiles that step can move into.
+
+    A diagonal step may not cut between two unpathable tiles.
+
+    Parameters
+    ----------
+    pathable :
+        Boolean grid of tiles that can be walked through.
+
+    Returns
+    -------
+    np.ndarray :
+        (8, height, width) boolean masks, in `NEIGHBOURS` order.
+    """
+    padded: np.ndarray = np.pad(pathable, 1)
+    height, width = pathable.shape
+    masks: np.ndarray = np.empty((len(NEIGHBOURS), height, width), dtype=bool)
+    for k, (dx, dy) in enumerate(NEIGHBOURS):
+        masks[k] = pathable
+        if dx and dy:
+            # a step into (x, y) passes (x - dx, y) and (x, y - dy)
+            masks[k] &= (
+                padded[1 : 1 + height, 1 - dx : 1 - dx + width]
+                | padded[1 - dy : 1 - dy + height, 1 : 1 + width]
+            )
+    return masks
+
+
+def dilate_steps(grid: np.ndarray, masks: np.ndarray) -> np.ndarray:
+    """Boolean grid grown by one step wherever `masks` from `step_masks` allow."""
+    padded: np.ndarray = np.pad(grid, 1)
+    height, width = grid.shape
+    grown: np.ndarray = grid.copy()
+    for k, (dx, dy) in enumerate(NEIGHBOURS):
+        grown |= padded[1 - dy : 1 - dy + height, 1 - dx : 1 - dx + width] & masks[k]
+    return grown
@@ -0,0 +1,145 @@
+"""
+Weapon cooldown aware kiting for a whole group of ranged units at once.
+
+Units whose weapon is ready attack, preferring the weakest enemy they can
+already hit. Units on cooldown step back from the closest enemy when they
+outrange it or are hurt, and step toward their target otherwise. Units
+that can't hit any of the enemies step back from the closest one. Every
+choice is a numpy operation over the (units, enemies) distance matrix, and
+units attacking the same target are returned as one group, to be sent as
+a single command.
+"""
+from typing import NamedTuple
+
+import numpy as np
+from sc2.position import Point2
+from sc2.unit import Unit
+
+from bot.unit_snapshot import FLYING, UnitColumns, distance_matrix, towards
+
+# weapon cooldown, in game loops, under which a weapon counts as ready
+COOLDOWN_READY: float = 2.0
+# units below this health fraction step back while on cooldown
+RETREAT_HEALTH: float = 0.5
+# distance of a step back or forward
+STEP_DISTANCE: float = 2.0
+# added to weapon range, a rough stand-in for unit radii
+RANGE_SLACK: float = 1.0
+
+
+class KitingCommand(NamedTuple):
+    units: list[Unit]
+    attack: bool
+    target: Unit | Point2
+
+
+def kite(
+    own: UnitColumns,
+    rows: np.ndarray,
+    enemy: UnitColumns,
+    enemy_rows: np.ndarray,
+    ground_range: np.ndarray,
+    air_range: np.ndarray,
+) -> list[KitingCommand]:
+    """Pick an attack or a step for every unit in `rows`.
+
+    Parameters
+    ----------
+    own :
+        This frame's own columns.
+    rows :
+        Rows of `own` to control.
+    enemy :
+        This frame's enemy columns.
+    enemy_rows :
+        Rows of `enemy` the units are fighting, must not be empty.
+    ground_range :
+        Weapon range against ground units, indexed by type id.
+    air_range :
+        Weapon range against air units, indexed by type id.
+
+    Returns
+    -------
+    list[KitingCommand] :
+        One command per attacked target and one per stepping unit.
+    """
+    distance: np.ndarray = distance_matrix(
+        own.x[rows], own.y[rows], enemy.x[enemy_rows], enemy.y[enemy_rows]
+    )
+    own_types: np.ndarray = own.type_ids[rows]
+    enemy_types: np.ndarray = enemy.type_ids[enemy_rows]
+    enemy_flying: np.ndarray = enemy.has_flag(FLYING)[enemy_rows]
+    own_flying: np.ndarray = own.has_flag(FLYING)[rows]
+
+    # (units, enemies) ranges we hit them from, and they hit us from
+    reach: np.ndarray = np.where(
+        enemy_flying[None, :],
+        air_range[own_types][:, None],
+        ground_range[own_types][:, None],
+    )
+    threat: np.ndarray = np.where(
+        own_flying[:, None],
+        air_range[enemy_types][None, :],
+        ground_range[enemy_types][None, :],
+    )
+    can_hit: np.ndarray = reach > 0
+    in_range: np.ndarray = can_hit & (distance <= reach + RANGE_SLACK)
+
+    # weakest enemy in range, otherwise the closest one we can hit at all
+    unit_index: np.ndarray = np.arange(len(rows))
+    weakest: np.ndarray = np.where(
+        in_range, enemy.hit_points[enemy_rows][None, :], np.inf
+    ).argmin(axis=1)
+    closest_hittable: np.ndarray = np.where(can_hit, distance, np.inf).argmin(axis=1)
+    target: np.ndarray = np.where(in_range.any(axis=1), weakest, closest_hittable)
+    closest: np.ndarray = distance.argmin(axis=1)
+
+    # without a hittable enemy `target` is just the first one
+    hittable: np.ndarray = can_hit.any(axis=1)
+    ready: np.ndarray = hittable & (own.weapon_cooldown[rows] <= COOLDOWN_READY)
+    outranged: np.ndarray = (
+        threat[unit_index, closest] >= reach[unit_index, target]
+    ) & (threat[unit_index, closest] > 0)
+    back: np.ndarray = ~ready & (
+        ~hittable | (own.health[rows] < RETREAT_HEALTH) | ~outranged
+    )
+    forward: np.ndarray = ~ready & ~back
+
+    back_x, back_y = towards(
+        own.x[rows],
+        own.y[rows],
+        enemy.x[enemy_rows][closest],
+        enemy.y[enemy_rows][closest],
+        -STEP_DISTANCE,
+    )
+    forward_x, forward_y = towards(
+        own.x[rows],
+        own.y[rows],
+        enemy.x[enemy_rows][target],
+        enemy.y[enemy_rows][target],
+        STEP_DISTANCE,
+    )
+    step_x: np.ndarray = np.where(back, back_x, forward_x)
+    step_y: np.ndarray = np.where(back, back_y, forward_y)
+
+    commands: list[KitingCommand] = []
+    attacking: np.ndarray = np.flatnonzero(ready)
+    if len(attacking):
+        targets, groups = np.unique(target[attacking], return_inverse=True)
+        for group, target_index in enumerate(targets):
+            commands.append(
+                KitingCommand(
+                    [own.units[rows[i]] for i in attacking[groups == group]],
+                    True,
+                    enemy.units[enemy_rows[target_index]],
+                )
+            )
+    for i in np.flatnonzero(back | forward):
+        commands.append(
+            KitingCommand(
+                [own.units[rows[i]]],
+                False,
+                Point2((float(step_x[i]), float(step_y[i]))),
+            )
+        )
+    return commands
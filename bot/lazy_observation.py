@@ -0,0 +1,128 @@
+"""
+Decode observations on first access instead of every step.
+
+python-sc2 turns every parsed `ResponseObservation` into Python objects as
+soon as it arrives: the visibility and creep grids, the pathing grid of
+the per-step `RequestGameInfo`, effects, upgrades and power sources,
+whether the bot reads them that step or not. `LazyGameState` and
+`LazyPixelMap` keep the parsed protobuf and build each of those on first
+access. Bit-packed grids are unpacked once per distinct content and the
+array is reused on later steps while the grid is unchanged, so those
+arrays are read-only. `lazy_decoding` swaps them into python-sc2 for the
+duration of a game.
+
+Units are unchanged: `Unit` already reads its fields from the protobuf on
+access.
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import cached_property
+from typing import Iterator, Optional
+
+import numpy as np
+import sc2.bot_ai_internal
+import sc2.main
+from sc2.game_state import Common, EffectData, GameState
+from sc2.ids.upgrade_id import UpgradeId
+from sc2.pixel_map import PixelMap
+from sc2.power_source import PsionicMatrix
+from sc2.score import ScoreDetails
+
+# distinct bit-packed grids kept unpacked, pathing and creep of the last
+# few steps
+MAX_CACHED_GRIDS: int = 8
+
+_unpacked: OrderedDict[tuple[int, int, bytes], np.ndarray] = OrderedDict()
+
+
+def _unpack(width: int, height: int, data: bytes) -> np.ndarray:
+    key: tuple[int, int, bytes] = (width, height, data)
+    grid: Optional[np.ndarray] = _unpacked.get(key)
+    if grid is not None:
+        _unpacked.move_to_end(key)
+        return grid
+    grid = np.unpackbits(np.frombuffer(data, dtype=np.uint8)).reshape(height, width)
+    grid.flags.writeable = False
+    _unpacked[key] = grid
+    if len(_unpacked) > MAX_CACHED_GRIDS:
+        _unpacked.popitem(last=False)
+    return grid
+
+
+class LazyPixelMap(PixelMap):
+    def __init__(self, proto, in_bits: bool = False):
+        """Keep `proto`, the grid is decoded by the first `data_numpy` access."""
+        self._proto = proto
+        self._in_bits: bool = in_bits
+
+    @cached_property
+    def data_numpy(self) -> np.ndarray:
+        if self._in_bits:
+            return _unpack(self.width, self.height, self._proto.data)
+        return np.frombuffer(self._proto.data, dtype=np.uint8).reshape(
+            self.height, self.width
+        )
+
+
+class LazyGameState(GameState):
+    def __init__(self, response_observation, previous_observation=None):
+        """Set what every step reads, the rest is decoded when first used.
+
+        Parameters
+        ----------
+        response_observation :
+            Parsed `ResponseObservation`.
+        previous_observation :
+            Observation of a skipped step, realtime only.
+        """
+        self.previous_observation = previous_observation
+        self.response_observation = response_observation
+        self.observation = response_observation.observation
+        self.observation_raw = self.observation.raw_data
+        self.player_result = response_observation.player_result
+        self.common: Common = Common(self.observation.player_common)
+        self.game_loop: int = self.observation.game_loop
+        self.abilities = self.observation.abilities
+
+    @cached_property
+    def psionic_matrix(self) -> PsionicMatrix:
+        return PsionicMatrix.from_proto(self.observation_raw.player.power_sources)
+
+    # not saved in practice: python-sc2's game loop formats
+    # `gs.score.score` into a debug log every step
+    @cached_property
+    def score(self) -> ScoreDetails:
+        return ScoreDetails(self.observation.score)
+
+    @cached_property
+    def upgrades(self) -> set[UpgradeId]:
+        return {
+            UpgradeId(upgrade) for upgrade in self.observation_raw.player.upgrade_ids
+        }
+
+    @cached_property
+    def visibility(self) -> PixelMap:
+        return LazyPixelMap(self.observation_raw.map_state.visibility)
+
+    @cached_property
+    def creep(self) -> PixelMap:
+        return LazyPixelMap(self.observation_raw.map_state.creep, in_bits=True)
+
+    @cached_property
+    def effects(self) -> set[EffectData]:
+        return {EffectData(effect) for effect in self.observation_raw.effects}
+
+
+@contextmanager
+def lazy_decoding() -> Iterator[None]:
+    """Have python-sc2 build `LazyGameState` and the per-step pathing grid
+    as `LazyPixelMap` while the context is open."""
+    game_state, pixel_map = sc2.main.GameState, sc2.bot_ai_internal.PixelMap
+    sc2.main.GameState = LazyGameState
+    sc2.bot_ai_internal.PixelMap = LazyPixelMap
+    try:
+        yield
+    finally:
+        sc2.main.GameState = game_state
+        sc2.bot_ai_internal.PixelMap = pixel_map
+        _unpacked.clear()
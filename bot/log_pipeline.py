@@ -0,0 +1,160 @@
+"""
+Loguru sink that never blocks the game loop on I/O.
+
+Logging calls only format the record and append it to a bounded deque;
+a background thread writes whatever is queued in batches and flushes once
+per batch. Every call site gets a token bucket, so a message logged every
+step can't crowd out the rest, and records over the limit or arriving
+while the buffer is full are dropped and counted. Drop counts are written
+to the stream by the writer thread every `report_interval` seconds while
+records are being dropped, and once more on `stop`.
+"""
+import sys
+import threading
+from collections import deque
+from time import monotonic
+from typing import Optional, TextIO
+
+from loguru import logger
+
+LOG_FORMAT: str = (
+    "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | "
+    "{name}:{function}:{line} - {message}"
+)
+# records per second each call site may log, and the burst it may save up
+RATE_LIMIT: float = 20.0
+RATE_BURST: float = 50.0
+
+
+class LogPipeline:
+    def __init__(
+        self,
+        capacity: int = 4096,
+        batch_size: int = 256,
+        flush_interval: float = 0.25,
+        report_interval: float = 30.0,
+    ):
+        """Set up the buffer, nothing is written until `install` is called.
+
+        Parameters
+        ----------
+        capacity :
+            Records buffered before new ones are dropped.
+        batch_size :
+            Records written per write call.
+        flush_interval :
+            Seconds the writer waits for more records before writing.
+        report_interval :
+            Minimum seconds between two drop reports.
+        """
+        self.capacity: int = capacity
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.report_interval: float = report_interval
+        self.written: int = 0
+        self.dropped_full: int = 0
+        # call site to records dropped by its rate limit
+        self.dropped_rate: dict[str, int] = {}
+        self._buffer: deque[str] = deque()
+        self._buckets: dict[str, list[float]] = {}
+        self._wake: threading.Event = threading.Event()
+        self._stop: threading.Event = threading.Event()
+        self._stream: TextIO = sys.stderr
+        self._handler_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def install(self, stream: TextIO = sys.stderr, level: str = "DEBUG") -> None:
+        """Replace loguru's handlers with this pipeline writing `level` and
+        above to `stream`."""
+        if self._thread is not None:
+            return
+        self._stream = stream
+        self._thread = threading.Thread(
+            target=self._run, name="log-pipeline", daemon=True
+        )
+        self._thread.start()
+        logger.remove()
+        self._handler_id = logger.add(self._sink, level=level, format=LOG_FORMAT)
+
+    def _allowed(self, site: str, now: float) -> bool:
+        bucket: Optional[list[float]] = self._buckets.get(site)
+        if bucket is None:
+            # [tokens, last refill]
+            self._buckets[site] = [RATE_BURST - 1, now]
+            return True
+        bucket[0] = min(RATE_BURST, bucket[0] + (now - bucket[1]) * RATE_LIMIT)
+        bucket[1] = now
+        if bucket[0] < 1:
+            return False
+        bucket[0] -= 1
+        return True
+
+    def _sink(self, message) -> None:
+        record: dict = message.record
+        site: str = f"{record['name']}:{record['function']}:{record['line']}"
+        if not self._allowed(site, monotonic()):
+            self.dropped_rate[site] = self.dropped_rate.get(site, 0) + 1
+            return
+        if len(self._buffer) >= self.capacity:
+            self.dropped_full += 1
+            return
+        self._buffer.append(message)
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    def _drop_report(self) -> str:
+        sites: str = ", ".join(
+            f"{site} {count}"
+            for site, count in sorted(self.dropped_rate.items(), key=lambda i: -i[1])
+        )
+        return (
+            f"log pipeline: {self.written} written, {self.dropped_full} dropped "
+            f"with the buffer full, rate limited: {sites or 'none'}\n"
+        )
+
+    def _write_batch(self) -> None:
+        batch: list[str] = []
+        while self._buffer and len(batch) < self.batch_size:
+            batch.append(self._buffer.popleft())
+        if not batch:
+            return
+        try:
+            self._stream.write("".join(batch))
+            self._stream.flush()
+        except (OSError, ValueError):
+            # closed or broken stream, the records are lost either way
+            pass
+        self.written += len(batch)
+
+    def _run(self) -> None:
+        reported_at: float = monotonic()
+        reported_drops: int = 0
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            while self._buffer:
+                self._write_batch()
+            drops: int = self.dropped_full + sum(self.dropped_rate.values())
+            if (
+                drops > reported_drops
+                and monotonic() - reported_at >= self.report_interval
+            ):
+                self._buffer.append(self._drop_report())
+                reported_at, reported_drops = monotonic(), drops
+        while self._buffer:
+            self._write_batch()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Write what is still queued plus the drop counts, and restore
+        loguru's default handler."""
+        if self._thread is None:
+            return
+        if self._handler_id is not None:
+            logger.remove(self._handler_id)
+            self._handler_id = None
+        self._buffer.append(self._drop_report())
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+        logger.add(sys.stderr)
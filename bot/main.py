@@ -1,17 +1,24 @@
+from os import getpid, path
+from time import perf_counter_ns, strftime
 from typing import Optional, Tuple
+
+import numpy as np
 from ares import AresBot
+from ares.behaviors.combat.group import GroupUseAbility
+from ares.behaviors.combat.individual import TumorSpreadCreep
+from ares.behaviors.macro import (
+    BuildStructure,
+    ExpansionController,
+    GasBuildingController,
+    Mining,
+)
 from ares.consts import UnitRole
-from ares.behaviors.macro import Mining
-from ares.behaviors.macro import BuildStructure
-from ares.behaviors.macro import ExpansionController
-from ares.behaviors.macro import GasBuildingController
-from ares.behaviors.combat.individual import TumorSpreadCreep, StutterUnitForward, AMove, StutterUnitBack
-from ares.behaviors.macro import AutoSupply
-
+from loguru import logger
 from sc2 import maps
 from sc2.bot_ai import BotAI
-from sc2.data import Difficulty, Race
+from sc2.data import Difficulty, Race, Result, race_townhalls
 from sc2.ids.ability_id import AbilityId
+from sc2.ids.buff_id import BuffId
 from sc2.ids.unit_typeid import UnitTypeId
 from sc2.ids.upgrade_id import UpgradeId
 from sc2.main import run_game
@@ -20,6 +27,77 @@ from sc2.position import Point2
 from sc2.unit import Unit
 from sc2.units import Units
 
+from bot.allocation_profiler import AllocationProfiler
+from bot.checkpoint import capture, write
+from bot.combat_sim import CombatResult, CombatSimulator
+from bot.consts import (
+    ALLOCATION_PROFILER,
+    ATTACK_MARGIN,
+    ATTACK_RADIUS,
+    CHECKPOINT_LOOPS,
+    CHECKPOINT_PLAN,
+    CHECKPOINT_UNITS,
+    CREEP_FRONT_PLAN,
+    CREEP_PLAN,
+    CREEP_SPOT_SPACING,
+    CREEP_SPOTS_PER_QUEEN,
+    CREEP_SPOTS_PLAN,
+    DATA_DIR,
+    DECISION_TRACE,
+    EXPANSION_DRONES,
+    MAX_DRONES,
+    MIN_ATTACK_UNITS,
+    MIN_BLIND_ATTACK_UNITS,
+    PLAN_INTERVAL,
+    PLAN_MAX_STALENESS,
+    REALTIME_GOVERNOR,
+    SCOUT_ARMY_SUPPLY,
+    SCOUTING_MAX_AGE,
+    TELEMETRY,
+    TELEMETRY_TARGET,
+    StepSection,
+)
+from bot.creep import closest_creep_tile, creep_edge_spots
+from bot.creep_plan import (
+    PENDING,
+    CreepPlan,
+    build_and_save_creep_plan,
+    creep_plan_path,
+    map_grids_path,
+    save_map_grids,
+)
+from bot.decision_trace import DecisionTrace
+from bot.enemy_memory import EnemyMemory
+from bot.fast_math import center, closer_than, closest_to, distance_to
+from bot.flow_field import FlowFieldCache, GridType
+from bot.kiting import kite
+from bot.observation_delta import ColumnDelta
+from bot.planner import BackgroundPlanner, Plan
+from bot.production_forecast import (
+    HATCHERY_SECONDS,
+    HATCHERY_SUPPLY,
+    LARVA_ABILITIES,
+    LOOPS_PER_SECOND,
+    OVERLORD_SECONDS,
+    OVERLORD_SUPPLY,
+    Economy,
+    ProductionForecast,
+    ProductionPlan,
+)
+from bot.queen_allocator import QUEEN_SPELL_SECTIONS, TRANSFUSE_HEALTH, QueenAllocator
+from bot.realtime_governor import RealtimeGovernor
+from bot.telemetry import Counter, Gauge, TelemetryExporter
+from bot.unit_snapshot import (
+    IDLE,
+    READY,
+    STRUCTURE,
+    UnitColumns,
+    UnitSnapshot,
+    nearest,
+    towards,
+)
+
+
 class MyBot(AresBot):
     def __init__(self, game_step_override: Optional[int] = None):
         """Initiate custom bot
@@ -31,12 +109,474 @@ class MyBot(AresBot):
             specified elsewhere
         """
         super().__init__(game_step_override)
+        self.decision_trace: DecisionTrace = DecisionTrace()
+        self.trace_decisions: bool = True
+        self.allocation_profiler: AllocationProfiler = AllocationProfiler()
+        self.telemetry: TelemetryExporter = TelemetryExporter()
+        self.realtime_governor: RealtimeGovernor = RealtimeGovernor()
+        self.snapshot: Optional[UnitSnapshot] = None
+        self.enemy_delta: Optional[ColumnDelta] = None
+        self.planner: BackgroundPlanner = BackgroundPlanner()
+        self.flow_fields: FlowFieldCache = FlowFieldCache(self.planner)
+        self.creep_plan: Optional[CreepPlan] = None
+        self.combat_sim: CombatSimulator = CombatSimulator()
+        self.queen_allocator: QueenAllocator = QueenAllocator()
+        self.enemy_memory: EnemyMemory = EnemyMemory(
+            lambda type_id: self.game_data.units[type_id]._proto.food_required
+        )
+        self.production_forecast: ProductionForecast = ProductionForecast(
+            self.calculate_cost, self.calculate_supply_cost
+        )
+        # behaviors are built once and updated in place every step
+        self.mining: Mining = Mining()
+        self.tumor_behaviors: dict[int, TumorSpreadCreep] = {}
+        # creep plan spot each tumor was sent to
+        self.tumor_spots: dict[int, int] = {}
+        self.group_behaviors: dict[tuple[StepSection, int], GroupUseAbility] = {}
+        # group behaviors used by each section this step
+        self._groups_used: dict[StepSection, int] = {}
+        # structures ordered this step, their cost already left the bank
+        self._ordered_structures: set[UnitTypeId] = set()
+        # game loops still to checkpoint, and the unit count that triggers one
+        self._checkpoint_loops: list[int] = []
+        self._checkpoint_units: int = 0
+
+    def _trace(
+        self,
+        section: StepSection,
+        unit: Unit,
+        ability: Optional[AbilityId] = None,
+        target: Unit | Point2 | None = None,
+    ) -> None:
+        """Record a decision in the decision trace.
+
+        Parameters
+        ----------
+        section :
+            Part of `on_step` the decision was made in.
+        unit :
+            Unit receiving the command.
+        ability :
+            Ability issued, None when a behavior picks it.
+        target :
+            Unit or position targeted, if any.
+        """
+        self.telemetry.inc(Counter.ACTIONS)
+        if not self.trace_decisions:
+            return
+        ability_id: int = ability.value if ability else 0
+        if isinstance(target, Unit):
+            x, y = target.position_tuple
+            self.decision_trace.record(
+                self.state.game_loop, section, unit.tag, ability_id, target.tag, x, y
+            )
+        elif target is not None:
+            self.decision_trace.record(
+                self.state.game_loop,
+                section,
+                unit.tag,
+                ability_id,
+                0,
+                target[0],
+                target[1],
+            )
+        else:
+            self.decision_trace.record(
+                self.state.game_loop, section, unit.tag, ability_id
+            )
+
+    def _closest_enemy_pairs(
+        self, units: list[Unit], enemy_mask: np.ndarray
+    ) -> list[Tuple[Unit, Unit]]:
+        """Pair each unit with the closest enemy in `enemy_mask`.
+
+        Parameters
+        ----------
+        units :
+            Own units, all of them must be in this frame's snapshot.
+        enemy_mask :
+            Mask over `self.snapshot.enemy` of enemies to consider.
+
+        Returns
+        -------
+        list[Tuple[Unit, Unit]] :
+            (unit, closest enemy) for every unit, empty if there are no
+            enemies in the mask.
+        """
+        own: UnitColumns = self.snapshot.own
+        enemy: UnitColumns = self.snapshot.enemy
+        enemy_rows: np.ndarray = np.flatnonzero(enemy_mask)
+        if not units or not len(enemy_rows):
+            return []
+        own_rows: np.ndarray = np.fromiter(
+            (own.row_of[unit.tag] for unit in units), dtype=np.intp, count=len(units)
+        )
+        closest, _ = nearest(
+            own.x[own_rows], own.y[own_rows], enemy.x[enemy_rows], enemy.y[enemy_rows]
+        )
+        return [
+            (unit, enemy.units[row]) for unit, row in zip(units, enemy_rows[closest])
+        ]
+
+    def _command_group(
+        self,
+        section: StepSection,
+        units: list[Unit],
+        ability: AbilityId,
+        target: Unit | Point2,
+    ) -> None:
+        """Give every unit in `units` the same command as one group behavior.
+
+        Group behaviors are kept per section and reused from step to step,
+        only their ability, group, tags and target change.
+
+        Parameters
+        ----------
+        section :
+            Part of `on_step` issuing the command, for the decision trace.
+        units :
+            Units receiving the command.
+        ability :
+            Ability to use.
+        target :
+            Unit or position targeted.
+        """
+        if not units:
+            return
+        slot: int = self._groups_used.get(section, 0)
+        self._groups_used[section] = slot + 1
+        behavior: Optional[GroupUseAbility] = self.group_behaviors.get((section, slot))
+        tags: set[int] = {unit.tag for unit in units}
+        if behavior is None:
+            behavior = GroupUseAbility(ability, units, tags, target)
+            self.group_behaviors[(section, slot)] = behavior
+        else:
+            behavior.ability = ability
+            behavior.group = units
+            behavior.group_tags = tags
+            behavior.target = target
+        self.register_behavior(behavior)
+        for unit in units:
+            self._trace(section, unit, ability, target)
+
+    def _attack_closest(
+        self, section: StepSection, units: list[Unit], enemy_mask: np.ndarray
+    ) -> None:
+        """Attack the closest enemy in `enemy_mask` with each unit, one
+        group command per target."""
+        groups: dict[int, list[Unit]] = {}
+        targets: dict[int, Unit] = {}
+        for unit, closest_enemy in self._closest_enemy_pairs(units, enemy_mask):
+            groups.setdefault(closest_enemy.tag, []).append(unit)
+            targets[closest_enemy.tag] = closest_enemy
+        for tag, group in groups.items():
+            self._command_group(section, group, AbilityId.ATTACK_ATTACK, targets[tag])
+
+    def _predict_fight(self, units: list[Unit], target: Point2) -> CombatResult:
+        """Estimate `units` fighting the enemies we remember around `target`.
+
+        Parameters
+        ----------
+        units :
+            Own units, all of them must be in this frame's snapshot.
+        target :
+            Where the fight would be, enemies within `ATTACK_RADIUS` of it
+            take part.
+
+        Returns
+        -------
+        CombatResult :
+            The predicted outcome.
+        """
+        own: UnitColumns = self.snapshot.own
+        rows: np.ndarray = np.fromiter(
+            (own.row_of[unit.tag] for unit in units), dtype=np.intp, count=len(units)
+        )
+        enemy_types, confidence = self.enemy_memory.combatants(
+            self.state.game_loop, target, ATTACK_RADIUS
+        )
+        return self.combat_sim.estimate(
+            own.type_ids[rows],
+            own.hit_points[rows],
+            enemy_types,
+            enemy_weights=confidence,
+        )
+
+    def _ready_to_attack(self, army: list[Unit], target: Point2) -> bool:
+        """Whether `army` is expected to beat what defends `target` with at
+        least `ATTACK_MARGIN` of it left.
+
+        With nothing recently seen around the target the estimate always
+        predicts a win, then the army needs `MIN_BLIND_ATTACK_UNITS` units.
+        """
+        if len(army) < MIN_BLIND_ATTACK_UNITS and not self.enemy_memory.seen_near(
+            target, ATTACK_RADIUS, self.state.game_loop, SCOUTING_MAX_AGE
+        ):
+            return False
+        return self._predict_fight(army, target).own_remaining >= ATTACK_MARGIN
+
+    def _submit_plans(self, frame: int) -> None:
+        """Queue background planning for plans that have aged out."""
+        if self.planner.is_due(CREEP_FRONT_PLAN, frame, PLAN_INTERVAL):
+            self.planner.submit(
+                CREEP_FRONT_PLAN,
+                frame,
+                closest_creep_tile,
+                self.state.creep.data_numpy.copy(),
+                self._creep_rally_target,
+            )
+        if self.planner.is_due(CREEP_SPOTS_PLAN, frame, PLAN_INTERVAL):
+            self.planner.submit(
+                CREEP_SPOTS_PLAN,
+                frame,
+                creep_edge_spots,
+                self.state.creep.data_numpy.copy(),
+                self.game_info.pathing_grid.data_numpy.copy(),
+                self.game_info.placement_grid.data_numpy.copy(),
+            )
+
+    def _creep_spots(
+        self, frame: int, queens: int
+    ) -> tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+        """Tumor spots for this step's creep queens.
+
+        Parameters
+        ----------
+        frame :
+            Current game loop.
+        queens :
+            Creep queens that may place a tumor.
+
+        Returns
+        -------
+        tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]] :
+            (n, 2) spots, their priority, and their index in the creep plan.
+            Spots come from the creep plan, in placement order, while it has
+            any on creep, from the planner's creep edge spots otherwise,
+            which have no priority or plan index.
+        """
+        if not queens:
+            return np.zeros((0, 2)), None, None
+        if self.creep_plan:
+            available: np.ndarray = self.creep_plan.available(
+                self.state.creep.data_numpy, CREEP_SPOTS_PER_QUEEN * queens
+            )
+            if len(available):
+                return (
+                    self.creep_plan.spots[available],
+                    np.arange(len(available)),
+                    available,
+                )
+        creep_spots: Optional[Plan] = self.planner.latest(
+            CREEP_SPOTS_PLAN, frame, PLAN_MAX_STALENESS
+        )
+        if creep_spots and len(creep_spots.result):
+            return creep_spots.result, None, None
+        return np.zeros((0, 2)), None, None
+
+    def _follow_flow_field(
+        self,
+        units: list[Unit],
+        target: Point2,
+        section: StepSection,
+        attack: bool = False,
+    ) -> None:
+        """Send ground units toward `target` along its shared flow field.
+
+        Parameters
+        ----------
+        units :
+            Units heading to `target`, all of them must be in this frame's
+            snapshot.
+        target :
+            Where the units are heading.
+        section :
+            Part of `on_step` issuing the command, for the decision trace.
+        attack :
+            Attack move instead of move.
+        """
+        if not units:
+            return
+        own: UnitColumns = self.snapshot.own
+        rows: np.ndarray = np.fromiter(
+            (own.row_of[unit.tag] for unit in units), dtype=np.intp, count=len(units)
+        )
+        # head straight for the target until the field has been computed
+        waypoints: Optional[np.ndarray] = self.flow_fields.waypoints(
+            GridType.GROUND, target, own.x[rows], own.y[rows], self.state.game_loop
+        )
+        ability: AbilityId = AbilityId.ATTACK_ATTACK if attack else AbilityId.MOVE_MOVE
+        if waypoints is None:
+            self._command_group(section, units, ability, target)
+            return
+        # units on the same tile share a waypoint and a command
+        points, groups = np.unique(waypoints, axis=0, return_inverse=True)
+        groups = groups.ravel()
+        for group, point in enumerate(points):
+            self._command_group(
+                section,
+                [units[i] for i in np.flatnonzero(groups == group)],
+                ability,
+                Point2((float(point[0]), float(point[1]))),
+            )
+
+    def _economy(self, own: UnitColumns) -> Economy:
+        """This frame's resources, saturation, larvae, injects and pending
+        supply, for the production forecast."""
+        townhalls: Units = self.townhalls.ready
+        gas_buildings: Units = self.gas_buildings.ready
+        pending_seconds: list[float] = []
+        pending_supply: list[float] = []
+        for egg in self.units(UnitTypeId.EGG):
+            if egg.orders and egg.orders[0].ability.id == AbilityId.LARVATRAIN_OVERLORD:
+                pending_seconds.append((1 - egg.orders[0].progress) * OVERLORD_SECONDS)
+                pending_supply.append(OVERLORD_SUPPLY)
+        for townhall in self.townhalls.not_ready:
+            pending_seconds.append((1 - townhall.build_progress) * HATCHERY_SECONDS)
+            pending_supply.append(HATCHERY_SUPPLY)
+        return Economy(
+            minerals=self.minerals,
+            vespene=self.vespene,
+            supply_used=self.supply_used,
+            supply_cap=self.supply_cap,
+            mineral_workers=np.array([t.assigned_harvesters for t in townhalls]),
+            mineral_slots=np.array([t.ideal_harvesters for t in townhalls]),
+            gas_workers=np.array([g.assigned_harvesters for g in gas_buildings]),
+            gas_slots=np.array([g.ideal_harvesters for g in gas_buildings]),
+            larvae=len(self.larva),
+            inject_remaining=np.array(
+                [
+                    t.buff_duration_remain / LOOPS_PER_SECOND
+                    if t.has_buff(BuffId.QUEENSPAWNLARVATIMER)
+                    else np.nan
+                    for t in townhalls
+                ],
+                dtype=np.float64,
+            ),
+            inject_queen_energy=own.energy[
+                (own.type_ids == UnitTypeId.QUEEN.value)
+                & own.with_role(UnitRole.QUEEN_INJECT)
+            ],
+            pending_seconds=np.array(pending_seconds, dtype=np.float64),
+            pending_supply=np.array(pending_supply, dtype=np.float64),
+        )
+
+    def _planned_structures(self, expanding: bool) -> list[UnitTypeId]:
+        """Structures the build order wants that are not started yet, and
+        can be once they are paid for. Structures ordered this step are
+        paid for already."""
+        pool: Units = self.structures(UnitTypeId.SPAWNINGPOOL)
+        planned: list[UnitTypeId] = []
+        if expanding:
+            planned.append(UnitTypeId.HATCHERY)
+        if (
+            not pool
+            and not self.already_pending(UnitTypeId.SPAWNINGPOOL)
+            and self.already_pending(UnitTypeId.HATCHERY) == 1
+        ):
+            planned.append(UnitTypeId.SPAWNINGPOOL)
+        if (
+            pool.ready
+            and self.already_pending_upgrade(UpgradeId.ZERGLINGMOVEMENTSPEED) > 0
+            and self.units(UnitTypeId.QUEEN)
+            and not self.townhalls(UnitTypeId.LAIR)
+            and not self.already_pending(UnitTypeId.LAIR)
+        ):
+            planned.append(UnitTypeId.LAIR)
+        if (
+            pool.ready
+            and not self.structures(UnitTypeId.HYDRALISKDEN)
+            and not self.already_pending(UnitTypeId.HYDRALISKDEN)
+            and self.tech_requirement_progress(UnitTypeId.HYDRALISKDEN) == 1
+        ):
+            planned.append(UnitTypeId.HYDRALISKDEN)
+        return [s for s in planned if s not in self._ordered_structures]
+
+    def _checkpoint(self, frame: int) -> None:
+        """Save this frame for `scripts/benchmark_checkpoint.py` when it is at
+        a configured game loop, or the first time the unit count is reached.
+        The frame is captured here and written on the planner."""
+        due: bool = bool(self._checkpoint_loops) and frame >= self._checkpoint_loops[0]
+        while self._checkpoint_loops and frame >= self._checkpoint_loops[0]:
+            self._checkpoint_loops.pop(0)
+        if self._checkpoint_units and (
+            len(self.all_own_units) + len(self.enemy_units) >= self._checkpoint_units
+        ):
+            self._checkpoint_units = 0
+            due = True
+        if not due:
+            return
+        file_path: str = path.join(
+            DATA_DIR, "checkpoints", f"{self.opponent_id}-{frame}.ckpt"
+        )
+        self.planner.submit(
+            f"{CHECKPOINT_PLAN}:{frame}", frame, write, file_path, capture(self)
+        )
+        logger.info(f"Writing checkpoint of game loop {frame} to {file_path}")
+
+    def _load_creep_plan(self) -> None:
+        """Load the creep plan for this map and spawn, or build it on the planner."""
+        map_name: str = self.game_info.map_name
+        plan_path: str = creep_plan_path(
+            DATA_DIR, map_name, self.start_location, self.enemy_start_locations[0]
+        )
+        if path.isfile(plan_path):
+            self.creep_plan = CreepPlan.load(plan_path)
+            if self.creep_plan:
+                logger.info(f"Loaded creep plan with {len(self.creep_plan)} spots")
+                return
+
+        pathing: np.ndarray = self.game_info.pathing_grid.data_numpy.copy()
+        placement: np.ndarray = self.game_info.placement_grid.data_numpy.copy()
+        expansions: list[Point2] = list(self.expansion_locations_list)
+        self.planner.submit(
+            CREEP_PLAN,
+            self.state.game_loop,
+            build_and_save_creep_plan,
+            plan_path,
+            pathing,
+            placement,
+            self.start_location,
+            self.enemy_start_locations[0],
+            expansions,
+        )
+        # keep the grids so plans for every spawn pair can be built offline
+        grids_path: str = map_grids_path(DATA_DIR, map_name)
+        if not path.isfile(grids_path):
+            self.planner.submit(
+                f"{CREEP_PLAN}:grids",
+                self.state.game_loop,
+                save_map_grids,
+                grids_path,
+                pathing,
+                placement,
+                [self.start_location] + self.enemy_start_locations,
+                expansions,
+            )
+
+    def _update_telemetry(self, step_time_ns: int) -> None:
+        """Write this step's values, the exporter thread publishes them."""
+        self.telemetry.observe_step(step_time_ns / 1e6)
+        self.telemetry.set(Gauge.GAME_LOOP, self.state.game_loop)
+        self.telemetry.set(Gauge.MINERALS, self.minerals)
+        self.telemetry.set(Gauge.VESPENE, self.vespene)
+        self.telemetry.set(Gauge.SUPPLY_USED, self.supply_used)
+        self.telemetry.set(Gauge.OWN_UNITS, len(self.snapshot.own))
+        self.telemetry.set(Gauge.ENEMY_UNITS, len(self.snapshot.enemy))
+
+    @property
+    def _creep_rally_target(self) -> Point2:
+        return (self.enemy_start_locations[0] + self.game_info.map_center) / 2
 
     # Get creep edge towards enemy base
     def get_location_towards_enemy_on_creep(self, unit: Unit) -> None | Point2:
-        target1 = self.enemy_start_locations[0]
-        target2 = self.game_info.map_center
-        target = (target1 + target2) / 2
+        # Use the creep front from the planner when there is a recent one
+        if plan := self.planner.latest(
+            CREEP_FRONT_PLAN, self.state.game_loop, PLAN_MAX_STALENESS
+        ):
+            if plan.result:
+                return plan.result
+        target = self._creep_rally_target
         creep_tile = self.mediator.get_closest_creep_tile(
             pos=unit.position.towards(target, 6)
         )
@@ -47,238 +587,517 @@ class MyBot(AresBot):
             return
 
     async def on_step(self, iteration: int) -> None:
+        step_start: int = perf_counter_ns()
+        self.allocation_profiler.begin_step(
+            iteration, len(self.all_own_units) + len(self.enemy_units)
+        )
+        self.allocation_profiler.enter(StepSection.FRAMEWORK)
+        self.realtime_governor.begin_step(
+            self.state.game_loop, getattr(self.client, "observation_received", None)
+        )
+        self._checkpoint(self.state.game_loop)
         await super(MyBot, self).on_step(iteration)
+        self._groups_used.clear()
+        self._ordered_structures.clear()
+        previous: Optional[UnitSnapshot] = self.snapshot
+        self.snapshot = UnitSnapshot(
+            self.all_own_units,
+            self.enemy_units + self.enemy_structures,
+            self.mediator.get_unit_role_dict,
+        )
+        own: UnitColumns = self.snapshot.own
+        enemy: UnitColumns = self.snapshot.enemy
+        frame: int = self.state.game_loop
+        self.enemy_delta = ColumnDelta(previous.enemy if previous else None, enemy)
+        self.enemy_memory.update(
+            enemy, frame, self.state.visibility.data_numpy, self.enemy_delta
+        )
+        self.combat_sim.register_types(own)
+        self.combat_sim.register_types(enemy)
+        self.planner.collect(frame)
+        self._submit_plans(frame)
+        self.flow_fields.update_grid(
+            GridType.GROUND, self.game_info.pathing_grid.data_numpy
+        )
+        if self.creep_plan is None and (plan := self.planner.latest(CREEP_PLAN, frame)):
+            self.creep_plan = plan.result
+            self.planner.discard(CREEP_PLAN)
         larvae: Units = self.larva
         hq: Unit = self.townhalls.first if self.townhalls else None
-        enemy_pos = self.enemy_start_locations[0]
+        # Closest enemy structure we know of, the enemy main until we scouted one
+        enemy_pos: Point2 = (
+            self.enemy_memory.nearest_structure(self.start_location)
+            or self.enemy_start_locations[0]
+        )
         time = self.time_formatted + " "
         clumping_distance = 7
 
-        self.register_behavior(Mining())
-        self.register_behavior(AutoSupply(self.start_location))
+        self.allocation_profiler.enter(StepSection.MACRO_BEHAVIORS)
+        self.register_behavior(self.mining)
 
         ### SCOUTING LOGIC ###
         game_minute = int(self.time_formatted[1])
         enemy_base_position: Point2 = self.mediator.get_enemy_expansions[0][0]
         enemy_natural_position: Point2 = self.mediator.get_enemy_expansions[1][0]
 
-        # Scout with overseers
-        overseer = self.units(UnitTypeId.OVERSEER)
-        for os in overseer:
-            # Follow ranged ally if nearby
-            attacking_nearby = self.mediator.get_units_from_role(role=UnitRole.ATTACKING).closer_than(15, os)
-            if attacking_nearby:
-                os.move(attacking_nearby.closest_to(os).position)
-                break
-            # Scout with overseer to enemy base
-            if os.is_idle:
-                if (enemy_natural_position):
-                    os.move((enemy_natural_position + enemy_base_position) / 2)
-                else:
-                    os.move(enemy_pos)
-            # If enemy is detected nearby, stay at range
-            enemy_nearby = self.enemy_units.closer_than(15, os)
-            if enemy_nearby:
-                closest_enemy = enemy_nearby.closest_to(os)
-                os.move(os.position.towards(closest_enemy.position, -2))
-            if os.health_percentage < 1 and enemy_nearby:
-                # Retreat damaged overseer
-                # Use the scouting ability before moving back
-                os.move(os.position.towards(closest_enemy.position, -10))
-                if os.energy >= 30:
-                    os(AbilityId.SPAWNCHANGELING_SPAWNCHANGELING)
-
-        # Scout natural with overlord
-        # Add starting overlord as scout
-        if self.units(UnitTypeId.OVERLORD).amount == 1:
-            self.mediator.assign_role(
-                tag=self.units(UnitTypeId.OVERLORD).first.tag,
-                role=UnitRole.SCOUTING
+        self.allocation_profiler.enter(StepSection.OVERSEER_SCOUTING)
+        if self.realtime_governor.should_run(StepSection.OVERSEER_SCOUTING, frame):
+            # Scout with overseers
+            overseer = self.units(UnitTypeId.OVERSEER)
+            attackers: Units = self.mediator.get_units_from_role(
+                role=UnitRole.ATTACKING
             )
-        scouts = self.mediator.get_units_from_role(role=UnitRole.SCOUTING)
-        for scout in scouts:
-            if scout.is_idle:
-                if (enemy_natural_position):
-                    scout.move((enemy_natural_position + enemy_base_position) / 2)
-                else:
-                    scout.move(enemy_pos)
-            # If enemy is detected nearby, stay at range
-            enemy_nearby = self.enemy_units.closer_than(15, scout)
-            if enemy_nearby:
-                closest_enemy = enemy_nearby.closest_to(scout)
-                scout.move(scout.position.towards(closest_enemy.position, -2))
+            for os in overseer:
+                # Follow ranged ally if nearby
+                attacking_nearby = closer_than(attackers, 15, os)
+                if attacking_nearby:
+                    follow_target: Unit = closest_to(attacking_nearby, os)
+                    os.move(follow_target.position)
+                    self._trace(
+                        StepSection.OVERSEER_SCOUTING,
+                        os,
+                        AbilityId.MOVE_MOVE,
+                        follow_target,
+                    )
+                    break
+                # Scout with overseer to enemy base
+                if os.is_idle:
+                    if enemy_natural_position:
+                        scout_target: Point2 = (
+                            enemy_natural_position + enemy_base_position
+                        ) / 2
+                    else:
+                        scout_target: Point2 = enemy_pos
+                    # Hang back if we know of an army at the scouting spot
+                    if (
+                        self.enemy_memory.army_supply_near(scout_target, 12, frame)
+                        > SCOUT_ARMY_SUPPLY
+                    ):
+                        scout_target = scout_target.towards(self.start_location, 15)
+                    os.move(scout_target)
+                    self._trace(
+                        StepSection.OVERSEER_SCOUTING,
+                        os,
+                        AbilityId.MOVE_MOVE,
+                        scout_target,
+                    )
+                # If enemy is detected nearby, stay at range
+                enemy_nearby = closer_than(self.enemy_units, 15, os)
+                if enemy_nearby:
+                    closest_enemy = closest_to(enemy_nearby, os)
+                    os.move(os.position.towards(closest_enemy.position, -2))
+                    self._trace(
+                        StepSection.OVERSEER_SCOUTING,
+                        os,
+                        AbilityId.MOVE_MOVE,
+                        closest_enemy,
+                    )
+                if os.health_percentage < 1 and enemy_nearby:
+                    # Retreat damaged overseer
+                    # Use the scouting ability before moving back
+                    os.move(os.position.towards(closest_enemy.position, -10))
+                    if os.energy >= 30:
+                        os(AbilityId.SPAWNCHANGELING_SPAWNCHANGELING)
+                        self._trace(
+                            StepSection.OVERSEER_SCOUTING,
+                            os,
+                            AbilityId.SPAWNCHANGELING_SPAWNCHANGELING,
+                        )
 
-        # Spread out overlords
-        for overlord in self.units(UnitTypeId.OVERLORD):
-            enemy_nearby = self.enemy_units.closer_than(15, overlord)
-            if enemy_nearby:
-                # Retreat overlord
-                closest_enemy = enemy_nearby.closest_to(overlord)
-                overlord.move(overlord.position.towards(closest_enemy.position, -10))
+        self.allocation_profiler.enter(StepSection.OVERLORD_SCOUTING)
+        if self.realtime_governor.should_run(StepSection.OVERLORD_SCOUTING, frame):
+            # Scout natural with overlord
+            # Add starting overlord as scout
+            if self.units(UnitTypeId.OVERLORD).amount == 1:
+                self.mediator.assign_role(
+                    tag=self.units(UnitTypeId.OVERLORD).first.tag,
+                    role=UnitRole.SCOUTING,
+                )
+            scouts = self.mediator.get_units_from_role(role=UnitRole.SCOUTING)
+            for scout in scouts:
+                if scout.is_idle:
+                    if enemy_natural_position:
+                        scout_target: Point2 = (
+                            enemy_natural_position + enemy_base_position
+                        ) / 2
+                    else:
+                        scout_target: Point2 = enemy_pos
+                    # Hang back if we know of an army at the scouting spot
+                    if (
+                        self.enemy_memory.army_supply_near(scout_target, 12, frame)
+                        > SCOUT_ARMY_SUPPLY
+                    ):
+                        scout_target = scout_target.towards(self.start_location, 15)
+                    scout.move(scout_target)
+                    self._trace(
+                        StepSection.OVERLORD_SCOUTING,
+                        scout,
+                        AbilityId.MOVE_MOVE,
+                        scout_target,
+                    )
+                # If enemy is detected nearby, stay at range
+                enemy_nearby = closer_than(self.enemy_units, 15, scout)
+                if enemy_nearby:
+                    closest_enemy = closest_to(enemy_nearby, scout)
+                    scout.move(scout.position.towards(closest_enemy.position, -2))
+                    self._trace(
+                        StepSection.OVERLORD_SCOUTING,
+                        scout,
+                        AbilityId.MOVE_MOVE,
+                        closest_enemy,
+                    )
 
-        # Spread creep
-        for tumor in self.structures(UnitTypeId.CREEPTUMORBURROWED):
-            self.register_behavior(
-                TumorSpreadCreep(tumor, self.enemy_start_locations[0])
+        self.allocation_profiler.enter(StepSection.OVERLORD_SPREAD)
+        if self.realtime_governor.should_run(StepSection.OVERLORD_SPREAD, frame):
+            # Spread out overlords
+            overlords: np.ndarray = np.flatnonzero(
+                own.type_ids == UnitTypeId.OVERLORD.value
             )
+            enemy_unit_rows: np.ndarray = np.flatnonzero(~enemy.has_flag(STRUCTURE))
+            if len(overlords) and len(enemy_unit_rows):
+                closest, distance = nearest(
+                    own.x[overlords],
+                    own.y[overlords],
+                    enemy.x[enemy_unit_rows],
+                    enemy.y[enemy_unit_rows],
+                )
+                closest = enemy_unit_rows[closest]
+                retreat_x, retreat_y = towards(
+                    own.x[overlords],
+                    own.y[overlords],
+                    enemy.x[closest],
+                    enemy.y[closest],
+                    -10,
+                )
+                # Retreat overlords with an enemy nearby
+                for i in np.flatnonzero(distance < 15):
+                    overlord: Unit = own.units[overlords[i]]
+                    overlord.move(Point2((retreat_x[i], retreat_y[i])))
+                    self._trace(
+                        StepSection.OVERLORD_SPREAD,
+                        overlord,
+                        AbilityId.MOVE_MOVE,
+                        enemy.units[closest[i]],
+                    )
+
+        self.allocation_profiler.enter(StepSection.CREEP_SPREAD)
+        if self.realtime_governor.should_run(StepSection.CREEP_SPREAD, frame):
+            # Spread creep
+            if self.creep_plan:
+                tumors: np.ndarray = own.of_type(
+                    (
+                        UnitTypeId.CREEPTUMOR,
+                        UnitTypeId.CREEPTUMORBURROWED,
+                        UnitTypeId.CREEPTUMORQUEEN,
+                    )
+                )
+                self.creep_plan.update(frame, own.x[tumors], own.y[tumors])
+            burrowed_tumors: Units = self.structures(UnitTypeId.CREEPTUMORBURROWED)
+            for tumor in burrowed_tumors:
+                # Spread along the creep plan, then towards the enemy
+                spread_target: Point2 = self.enemy_start_locations[0]
+                if self.creep_plan:
+                    spot: Optional[int] = self.tumor_spots.get(tumor.tag)
+                    # done, given up on, or the claim timed out
+                    if (
+                        spot is None
+                        or self.creep_plan.status[spot] != PENDING
+                        or self.creep_plan.assigned_frame[spot] < 0
+                    ):
+                        spot = self.creep_plan.next_spot(tumor.position)
+                        if spot is None:
+                            self.tumor_spots.pop(tumor.tag, None)
+                        else:
+                            # claimed, so other tumors and queens skip it
+                            self.creep_plan.assign(spot, frame)
+                            self.tumor_spots[tumor.tag] = spot
+                    if spot is not None:
+                        spread_target = self.creep_plan.position(spot)
+                behavior: Optional[TumorSpreadCreep] = self.tumor_behaviors.get(
+                    tumor.tag
+                )
+                if behavior is None:
+                    behavior = TumorSpreadCreep(tumor, spread_target)
+                    self.tumor_behaviors[tumor.tag] = behavior
+                else:
+                    behavior.unit = tumor
+                    behavior.target = spread_target
+                self.register_behavior(behavior)
+                self._trace(StepSection.CREEP_SPREAD, tumor, target=spread_target)
+            # tumors that spread or died
+            if len(self.tumor_behaviors) > len(burrowed_tumors):
+                for tag in self.tumor_behaviors.keys() - burrowed_tumors.tags:
+                    del self.tumor_behaviors[tag]
+                    self.tumor_spots.pop(tag, None)
 
+        self.allocation_profiler.enter(StepSection.ECONOMY)
         ### ECONOMY AND WORKER MANAGEMENT ###
 
         # Saturate gas
         for a in self.gas_buildings:
             if a.assigned_harvesters < a.ideal_harvesters:
-                w: Units = self.workers.closer_than(10, a)
+                w: Units = closer_than(self.workers, 10, a)
                 if w:
-                    w.random.gather(a)
+                    gas_worker: Unit = w.random
+                    gas_worker.gather(a)
+                    self._trace(
+                        StepSection.ECONOMY, gas_worker, AbilityId.HARVEST_GATHER, a
+                    )
 
         # Send workers across bases
         await self.distribute_workers()
 
         ### QUEEN LOGIC ###
 
-        # Get idle inject queens
-        inject_queens = self.mediator.get_units_from_role(
-            role=UnitRole.QUEEN_INJECT,
-            unit_type=UnitTypeId.QUEEN
+        self.allocation_profiler.enter(StepSection.INJECT_QUEENS)
+        # Solve every queen spell of this step at once
+        queens: np.ndarray = own.type_ids == UnitTypeId.QUEEN.value
+        idle_queens: np.ndarray = queens & own.has_flag(IDLE)
+        creep_queen_rows: np.ndarray = np.flatnonzero(
+            idle_queens & own.with_role(UnitRole.QUEEN_CREEP)
         )
-        for queen in inject_queens.idle:
-            if queen.energy >= 25:
-                closest_townhall = self.townhalls.closest_to(queen)
-                queen(AbilityId.EFFECT_INJECTLARVA, closest_townhall)
-
-        # Get idle creep queens
-        creep_queens = self.mediator.get_units_from_role(
-            role=UnitRole.QUEEN_CREEP,
-            unit_type=UnitTypeId.QUEEN
+        if not self.realtime_governor.should_run(StepSection.CREEP_QUEENS, frame):
+            creep_queen_rows = creep_queen_rows[:0]
+        townhalls: np.ndarray = np.flatnonzero(
+            own.of_type(race_townhalls[self.race]) & own.has_flag(READY)
         )
-
-        for queen in creep_queens.idle:
-            if queen.energy >= 25:
-                # Get nearest creep edge using CreepManager
-                target_pos = self.mediator.find_nearby_creep_edge_position(
-                    position=queen.position
-                )
-                if target_pos:
-                    queen(AbilityId.BUILD_CREEPTUMOR, target_pos)
-            else:
-                pos = self.get_location_towards_enemy_on_creep(queen)
-                # Clumping
-                if pos and queen.position.distance_to(creep_queens.center) > 8:
-                    queen.move((creep_queens.center + pos) / 2)
-                elif pos:
-                    queen.move(pos)
-
-        ### BUILDING STRUCTURES ###
-
-        # Build spawning pool
-        if self.structures(UnitTypeId.SPAWNINGPOOL).amount + self.already_pending(UnitTypeId.SPAWNINGPOOL) == 0 and self.already_pending(UnitTypeId.HATCHERY) == 1:
-            if self.can_afford(UnitTypeId.SPAWNINGPOOL):
-                self.register_behavior(BuildStructure(
-                    base_location=self.start_location, structure_id=UnitTypeId.SPAWNINGPOOL
-                    ))
-
-        # Upgrade to lair if spawning pool is complete
-        if self.structures(UnitTypeId.SPAWNINGPOOL).ready and self.already_pending_upgrade(UpgradeId.ZERGLINGMOVEMENTSPEED) > 0 and self.units(UnitTypeId.QUEEN).amount >= 1:
-            if hq and hq.is_idle and not self.townhalls(UnitTypeId.LAIR) and not self.already_pending(UnitTypeId.LAIR):
-                if self.can_afford(UnitTypeId.LAIR):
-                    hq.build(UnitTypeId.LAIR)
-
-        # If lair is ready and we have no hydra den on the way: build hydra den
-        if self.structures(UnitTypeId.SPAWNINGPOOL).ready and self.can_afford(UnitTypeId.HYDRALISKDEN):
-            if self.structures(UnitTypeId.HYDRALISKDEN).amount + self.already_pending(UnitTypeId.HYDRALISKDEN) == 0:
-                self.register_behavior(BuildStructure(
-                    base_location=self.start_location, structure_id=UnitTypeId.HYDRALISKDEN
-                    ))
-
-        # If we dont have both extractors: build them
-        if (
-            self.structures(UnitTypeId.SPAWNINGPOOL)
-            and self.can_afford(UnitTypeId.EXTRACTOR)
+        townhalls = townhalls[
+            [
+                not own.units[row].has_buff(BuffId.QUEENSPAWNLARVATIMER)
+                for row in townhalls.tolist()
+            ]
+        ]
+        spots, spot_priority, plan_spots = self._creep_spots(
+            frame, len(creep_queen_rows)
+        )
+        casting: set[int] = set()
+        for assignment in self.queen_allocator.allocate(
+            own,
+            frame,
+            inject_queens=np.flatnonzero(
+                idle_queens & own.with_role(UnitRole.QUEEN_INJECT)
+            ),
+            creep_queens=creep_queen_rows,
+            healers=np.flatnonzero(queens & own.with_role(UnitRole.QUEEN_OFFENSIVE)),
+            townhalls=townhalls,
+            injured=np.flatnonzero(~own.has_flag(STRUCTURE)),
+            spots=spots,
+            spot_priority=spot_priority,
+            spot_spacing=0.0 if plan_spots is not None else CREEP_SPOT_SPACING,
         ):
-            if (self.gas_buildings.amount + self.already_pending(UnitTypeId.EXTRACTOR) == 0):
-                self.register_behavior(
-                    GasBuildingController(to_count=1)
-                )
-            elif (self.gas_buildings.amount + self.already_pending(UnitTypeId.EXTRACTOR) == 1 and self.supply_cap >= 33):
-                self.register_behavior(
-                    GasBuildingController(to_count=len(self.townhalls))
+            queen: Unit = own.units[assignment.queen_row]
+            casting.add(queen.tag)
+            if assignment.target_row >= 0:
+                target: Unit | Point2 = own.units[assignment.target_row]
+            elif plan_spots is not None:
+                target = self.creep_plan.assign(int(plan_spots[assignment.spot]), frame)
+            else:
+                target = Point2(
+                    (float(spots[assignment.spot, 0]), float(spots[assignment.spot, 1]))
                 )
+            queen(assignment.ability, target)
+            self._trace(
+                QUEEN_SPELL_SECTIONS[assignment.ability],
+                queen,
+                assignment.ability,
+                target,
+            )
 
-        ### UPGRADE LOGIC ###
+        self.allocation_profiler.enter(StepSection.CREEP_QUEENS)
+        if len(creep_queen_rows):
+            creep_queens: Units = self.mediator.get_units_from_role(
+                role=UnitRole.QUEEN_CREEP, unit_type=UnitTypeId.QUEEN
+            )
+            for queen in creep_queens.idle:
+                if queen.tag in casting:
+                    continue
+                if queen.energy >= 25:
+                    # Get nearest creep edge using CreepManager
+                    target_pos: Optional[
+                        Point2
+                    ] = self.mediator.find_nearby_creep_edge_position(
+                        position=queen.position
+                    )
+                    if target_pos:
+                        queen(AbilityId.BUILD_CREEPTUMOR, target_pos)
+                        self._trace(
+                            StepSection.CREEP_QUEENS,
+                            queen,
+                            AbilityId.BUILD_CREEPTUMOR,
+                            target_pos,
+                        )
+                else:
+                    pos = self.get_location_towards_enemy_on_creep(queen)
+                    # Clumping
+                    if pos:
+                        queens_center: Point2 = center(creep_queens)
+                        if distance_to(queen, queens_center) > 8:
+                            pos = (queens_center + pos) / 2
+                    if pos:
+                        queen.move(pos)
+                        self._trace(
+                            StepSection.CREEP_QUEENS, queen, AbilityId.MOVE_MOVE, pos
+                        )
 
-        # Once the pool is done
-        if self.structures(UnitTypeId.SPAWNINGPOOL).ready:
-            # Upgrade zergling speed
-            if self.can_afford(UpgradeId.ZERGLINGMOVEMENTSPEED) and self.already_pending_upgrade(UpgradeId.ZERGLINGMOVEMENTSPEED) == 0:
-                self.research(UpgradeId.ZERGLINGMOVEMENTSPEED)
-            # Build queen 
-            elif not self.units(UnitTypeId.QUEEN).amount == self.townhalls.amount and hq and hq.is_idle:
-                if self.can_afford(UnitTypeId.QUEEN):
-                    hq.train(UnitTypeId.QUEEN)
-        
-        # Once the hydra den is done
-        den = self.structures(UnitTypeId.HYDRALISKDEN)
-        if den.ready and den.idle:
-            # Upgrade hydra range
-            if self.can_afford(UpgradeId.EVOLVEGROOVEDSPINES) and self.already_pending_upgrade(UpgradeId.EVOLVEGROOVEDSPINES) == 0:
-                self.research(UpgradeId.EVOLVEGROOVEDSPINES)
-            # Upgrade hydra speed
-            elif self.can_afford(UpgradeId.EVOLVEMUSCULARAUGMENTS) and self.already_pending_upgrade(UpgradeId.EVOLVEMUSCULARAUGMENTS) == 0:
-                self.research(UpgradeId.EVOLVEMUSCULARAUGMENTS)
+        self.allocation_profiler.enter(StepSection.STRUCTURES)
+        if self.realtime_governor.should_run(StepSection.STRUCTURES, frame):
+            ### BUILDING STRUCTURES ###
 
+            # Build spawning pool
+            if (
+                self.structures(UnitTypeId.SPAWNINGPOOL).amount
+                + self.already_pending(UnitTypeId.SPAWNINGPOOL)
+                == 0
+                and self.already_pending(UnitTypeId.HATCHERY) == 1
+            ):
+                if self.can_afford(UnitTypeId.SPAWNINGPOOL):
+                    self.register_behavior(
+                        BuildStructure(
+                            base_location=self.start_location,
+                            structure_id=UnitTypeId.SPAWNINGPOOL,
+                        )
+                    )
+
+            # Upgrade to lair if spawning pool is complete
+            if (
+                self.structures(UnitTypeId.SPAWNINGPOOL).ready
+                and self.already_pending_upgrade(UpgradeId.ZERGLINGMOVEMENTSPEED) > 0
+                and self.units(UnitTypeId.QUEEN).amount >= 1
+            ):
+                if (
+                    hq
+                    and hq.is_idle
+                    and not self.townhalls(UnitTypeId.LAIR)
+                    and not self.already_pending(UnitTypeId.LAIR)
+                ):
+                    if self.can_afford(UnitTypeId.LAIR):
+                        hq.build(UnitTypeId.LAIR)
+                        self._ordered_structures.add(UnitTypeId.LAIR)
+                        self._trace(
+                            StepSection.STRUCTURES, hq, AbilityId.UPGRADETOLAIR_LAIR
+                        )
+
+            # If lair is ready and we have no hydra den on the way: build hydra den
+            if self.structures(UnitTypeId.SPAWNINGPOOL).ready and self.can_afford(
+                UnitTypeId.HYDRALISKDEN
+            ):
+                if (
+                    self.structures(UnitTypeId.HYDRALISKDEN).amount
+                    + self.already_pending(UnitTypeId.HYDRALISKDEN)
+                    == 0
+                ):
+                    self.register_behavior(
+                        BuildStructure(
+                            base_location=self.start_location,
+                            structure_id=UnitTypeId.HYDRALISKDEN,
+                        )
+                    )
+
+            # If we dont have both extractors: build them
+            if self.structures(UnitTypeId.SPAWNINGPOOL) and self.can_afford(
+                UnitTypeId.EXTRACTOR
+            ):
+                if (
+                    self.gas_buildings.amount
+                    + self.already_pending(UnitTypeId.EXTRACTOR)
+                    == 0
+                ):
+                    self.register_behavior(GasBuildingController(to_count=1))
+                elif (
+                    self.gas_buildings.amount
+                    + self.already_pending(UnitTypeId.EXTRACTOR)
+                    == 1
+                    and self.supply_cap >= 33
+                ):
+                    self.register_behavior(
+                        GasBuildingController(to_count=len(self.townhalls))
+                    )
+
+        self.allocation_profiler.enter(StepSection.UPGRADES)
+        if self.realtime_governor.should_run(StepSection.UPGRADES, frame):
+            ### UPGRADE LOGIC ###
+
+            # Once the pool is done
+            if self.structures(UnitTypeId.SPAWNINGPOOL).ready:
+                # Upgrade zergling speed
+                if (
+                    self.can_afford(UpgradeId.ZERGLINGMOVEMENTSPEED)
+                    and self.already_pending_upgrade(UpgradeId.ZERGLINGMOVEMENTSPEED)
+                    == 0
+                ):
+                    self.research(UpgradeId.ZERGLINGMOVEMENTSPEED)
+
+            # Once the hydra den is done
+            den = self.structures(UnitTypeId.HYDRALISKDEN)
+            if den.ready and den.idle:
+                # Upgrade hydra range
+                if (
+                    self.can_afford(UpgradeId.EVOLVEGROOVEDSPINES)
+                    and self.already_pending_upgrade(UpgradeId.EVOLVEGROOVEDSPINES) == 0
+                ):
+                    self.research(UpgradeId.EVOLVEGROOVEDSPINES)
+                # Upgrade hydra speed
+                elif (
+                    self.can_afford(UpgradeId.EVOLVEMUSCULARAUGMENTS)
+                    and self.already_pending_upgrade(UpgradeId.EVOLVEMUSCULARAUGMENTS)
+                    == 0
+                ):
+                    self.research(UpgradeId.EVOLVEMUSCULARAUGMENTS)
+
+        self.allocation_profiler.enter(StepSection.PRODUCTION)
         ### TRAINING UNITS ###
 
-        # Drone production logic
-        # If we have exactly 13 drones, build an extra overlord
-        if self.supply_workers + self.already_pending(UnitTypeId.DRONE) == 13 and not self.already_pending(UnitTypeId.OVERLORD):
-            # Build an extra overlord at 13 drones
-            if self.can_afford(UnitTypeId.OVERLORD):
-                larvae.random.train(UnitTypeId.OVERLORD)
-        # If we have 16 drones, build expansion
-        elif self.supply_workers + self.already_pending(UnitTypeId.DRONE) == 16 and not self.already_pending(UnitTypeId.HATCHERY):
+        workers: float = self.supply_workers + self.already_pending(UnitTypeId.DRONE)
+        drones_wanted: int = max(0, MAX_DRONES - int(workers))
+        # Expand at 16 drones, no more drones until the drone is on its way
+        expanding: bool = workers == EXPANSION_DRONES and not self.already_pending(
+            UnitTypeId.HATCHERY
+        )
+        if expanding:
+            drones_wanted = 0
             self.register_behavior(
                 ExpansionController(to_count=2, can_afford_check=False)
             )
-        # If we have less than 38 drones, build drones
-        elif self.supply_workers + self.already_pending(UnitTypeId.DRONE) < 38:
-            if larvae and self.can_afford(UnitTypeId.DRONE):
-                larva: Unit = larvae.random
-                larva.train(UnitTypeId.DRONE)
-
-        ## Overlord production logic
-        # If supply is low, train overlords
-        # if (
-        #     self.supply_left < 2
-        #     and larvae
-        #     and self.supply_cap < 200
-        #     and self.can_afford(UnitTypeId.OVERLORD)
-        #     and not self.already_pending(UnitTypeId.OVERLORD)
-        # ):
-        #     larvae.random.train(UnitTypeId.OVERLORD)
-        # # If supply cap over 30 we can train multiple overlords
-        # if (
-        #     self.supply_left <= 5
-        #     and larvae
-        #     and self.supply_cap > 30 
-        #     and self.supply_cap < 200
-        #     and self.can_afford(UnitTypeId.OVERLORD)
-        #     and not self.already_pending(UnitTypeId.OVERLORD) > 1
-        # ):
-        #     larvae.random.train(UnitTypeId.OVERLORD)
-
-        # Extra queen when high on minerals and idle townhall
-        if (
-            hq and hq.is_idle
-            and self.structures(UnitTypeId.SPAWNINGPOOL).ready
-            and self.minerals > 300
-        ):
-            hq.train(UnitTypeId.QUEEN)
 
-        # Train zerglings
-        if larvae and self.can_afford(UnitTypeId.HYDRALISK) and self.structures(UnitTypeId.HYDRALISKDEN).ready:
-            larvae.random.train(UnitTypeId.HYDRALISK)
-        elif larvae and self.can_afford(UnitTypeId.ZERGLING) and self.structures(UnitTypeId.SPAWNINGPOOL).ready:
-            larvae.random.train(UnitTypeId.ZERGLING)
+        # Spend every larva we can afford at once, supply and extra queens
+        # from what income and larvae will be over the next seconds. A queen
+        # per townhall comes first
+        army: list[UnitTypeId] = []
+        if self.structures(UnitTypeId.HYDRALISKDEN).ready:
+            army.append(UnitTypeId.HYDRALISK)
+        if self.structures(UnitTypeId.SPAWNINGPOOL).ready:
+            army.append(UnitTypeId.ZERGLING)
+        # townhalls given an order this step, like the lair, are taken
+        queen_townhalls: Units = (
+            self.townhalls.ready.idle.tags_not_in(self.unit_tags_received_action)
+            if self.structures(UnitTypeId.SPAWNINGPOOL).ready
+            else Units([], self)
+        )
+        missing_queens: int = max(
+            0,
+            self.townhalls.amount
+            - self.units(UnitTypeId.QUEEN).amount
+            - int(self.already_pending(UnitTypeId.QUEEN)),
+        )
+        economy: Economy = self._economy(own)
+        production: ProductionPlan = self.production_forecast.plan(
+            self.production_forecast.project(economy),
+            economy,
+            drones_wanted,
+            army,
+            len(queen_townhalls),
+            missing_queens,
+            self._planned_structures(expanding),
+        )
+        trained: int = 0
+        for type_id, count in production.larvae.items():
+            for larva in larvae[trained : trained + count]:
+                larva.train(type_id)
+                self._trace(StepSection.PRODUCTION, larva, LARVA_ABILITIES[type_id])
+            trained += count
+        for townhall in queen_townhalls[: production.queens]:
+            townhall.train(UnitTypeId.QUEEN)
+            self._trace(StepSection.PRODUCTION, townhall, AbilityId.TRAINQUEEN_QUEEN)
 
         # Morph overseer after lair
         if self.townhalls(UnitTypeId.LAIR).ready:
@@ -289,9 +1108,9 @@ class MyBot(AresBot):
             ):
                 for ov in self.units(UnitTypeId.OVERLORD):
                     ov(AbilityId.MORPH_OVERSEER)
+                    self._trace(StepSection.PRODUCTION, ov, AbilityId.MORPH_OVERSEER)
                     break
 
-
         ### ATTACK LOGIC ###
 
         # Defending force
@@ -299,100 +1118,228 @@ class MyBot(AresBot):
             role=UnitRole.DEFENDING,
         )
 
+        self.allocation_profiler.enter(StepSection.DRONE_DEFENCE)
         # Drone under attack: pull drones to defend TODO: improve to not chase too long
         for drone in self.units(UnitTypeId.DRONE):
-            enemy_nearby = self.enemy_units.closer_than(3, drone)
+            enemy_nearby = closer_than(self.enemy_units, 3, drone)
             if enemy_nearby:
-                closest_enemy = enemy_nearby.closest_to(drone)
+                closest_enemy = closest_to(enemy_nearby, drone)
                 drone.attack(closest_enemy)
-                for unit in defenders:
-                    unit.attack(closest_enemy)
-       
-       # Defend with lings and hydras
+                self._trace(
+                    StepSection.DRONE_DEFENCE,
+                    drone,
+                    AbilityId.ATTACK_ATTACK,
+                    closest_enemy,
+                )
+                self._command_group(
+                    StepSection.DRONE_DEFENCE,
+                    defenders,
+                    AbilityId.ATTACK_ATTACK,
+                    closest_enemy,
+                )
+
+        self.allocation_profiler.enter(StepSection.DEFENDING)
+        # Defend with lings and hydras
         if defenders:
-            enemy_nearby = self.enemy_units.closer_than(15, defenders.center)
-            if enemy_nearby:
-                for unit in defenders:
-                    closest_enemy = enemy_nearby.closest_to(unit)
-                    unit.attack(closest_enemy)
+            defenders_center: Point2 = center(defenders)
+            enemy_nearby: np.ndarray = enemy.within(
+                defenders_center, 15
+            ) & ~enemy.has_flag(STRUCTURE)
+            if enemy_nearby.any():
+                self._attack_closest(StepSection.DEFENDING, defenders, enemy_nearby)
             else:
+                creep_front: Optional[Plan] = self.planner.latest(
+                    CREEP_FRONT_PLAN, frame, PLAN_MAX_STALENESS
+                )
+                to_creep_front: list[Unit] = []
+                clumping: list[Unit] = []
                 for unit in defenders:
-                    if unit.position.distance_to(defenders.center) > clumping_distance:
-                        unit.move(defenders.center)  
+                    if distance_to(unit, defenders_center) > clumping_distance:
+                        clumping.append(unit)
+                    elif creep_front and creep_front.result:
+                        to_creep_front.append(unit)
                     else:
                         pos = self.get_location_towards_enemy_on_creep(unit)
                         if pos:
                             unit.move(pos)
+                            self._trace(
+                                StepSection.DEFENDING, unit, AbilityId.MOVE_MOVE, pos
+                            )
+                self._command_group(
+                    StepSection.DEFENDING,
+                    clumping,
+                    AbilityId.MOVE_MOVE,
+                    defenders_center,
+                )
+                if to_creep_front:
+                    self._follow_flow_field(
+                        to_creep_front, creep_front.result, StepSection.DEFENDING
+                    )
 
+        self.allocation_profiler.enter(StepSection.ATTACKING)
         # Attack with lings and hydras if we have enough
-        # Switch roles if too many defenders
-        if len(defenders) > 24:
-            self.mediator.switch_roles(from_role=UnitRole.DEFENDING, to_role=UnitRole.ATTACKING)
+        # Switch roles once defenders and attackers together beat what we know
+        # the enemy has
+        if len(defenders) >= MIN_ATTACK_UNITS:
+            army: list[Unit] = list(defenders) + list(
+                self.mediator.get_units_from_role(role=UnitRole.ATTACKING)
+            )
+            if self._ready_to_attack(army, enemy_pos):
+                self.mediator.switch_roles(
+                    from_role=UnitRole.DEFENDING, to_role=UnitRole.ATTACKING
+                )
         attacking_units: Units = self.mediator.get_units_from_role(
             role=UnitRole.ATTACKING,
         )
         if attacking_units:
-            enemy_nearby = self.enemy_units.closer_than(20, attacking_units.center)
-            if enemy_nearby:
-                for unit in attacking_units(UnitTypeId.ZERGLING):
-                    closest_enemy = enemy_nearby.closest_to(unit)
-                    unit.attack(closest_enemy)
-                for unit in attacking_units(UnitTypeId.HYDRALISK):
-                    closest_enemy = enemy_nearby.closest_to(unit)
-                    if unit.health_percentage < 0.5:
-                        self.register_behavior(StutterUnitBack(unit, closest_enemy))
-                    else:
-                        self.register_behavior(StutterUnitForward(unit, closest_enemy))
-            else:
-                if attacking_units.amount > 6: # Attack
-                    for unit in attacking_units:
-                        structures_nearby = self.enemy_structures.closer_than(20, unit.position)
-                        if unit.position.distance_to(attacking_units.center) > clumping_distance and not structures_nearby:
-                            unit.move(attacking_units.center)  
+            attackers_center: Point2 = center(attacking_units)
+            enemy_nearby: np.ndarray = enemy.within(
+                attackers_center, 20
+            ) & ~enemy.has_flag(STRUCTURE)
+            if enemy_nearby.any():
+                self._attack_closest(
+                    StepSection.ATTACKING,
+                    attacking_units(UnitTypeId.ZERGLING),
+                    enemy_nearby,
+                )
+                hydras: Units = attacking_units(UnitTypeId.HYDRALISK)
+                if hydras:
+                    hydra_rows: np.ndarray = np.fromiter(
+                        (own.row_of[unit.tag] for unit in hydras),
+                        dtype=np.intp,
+                        count=len(hydras),
+                    )
+                    for command in kite(
+                        own,
+                        hydra_rows,
+                        enemy,
+                        np.flatnonzero(enemy_nearby),
+                        self.combat_sim.ground_range,
+                        self.combat_sim.air_range,
+                    ):
+                        if command.attack:
+                            self._command_group(
+                                StepSection.ATTACKING,
+                                command.units,
+                                AbilityId.ATTACK_ATTACK,
+                                command.target,
+                            )
                         else:
-                            self.register_behavior(AMove(unit, enemy_pos))
-                else: # Fallback
+                            for unit in command.units:
+                                unit.move(command.target)
+                                self._trace(
+                                    StepSection.ATTACKING,
+                                    unit,
+                                    AbilityId.MOVE_MOVE,
+                                    command.target,
+                                )
+            else:
+                # Keep attacking while we are expected to win
+                if (
+                    attacking_units.amount >= MIN_ATTACK_UNITS
+                    and self._predict_fight(attacking_units, enemy_pos).win
+                ):  # Attack
+                    advancing: list[Unit] = []
+                    clumping: list[Unit] = []
                     for unit in attacking_units:
-                        if defenders:
-                            unit.move(defenders.center)  
+                        structures_nearby = closer_than(self.enemy_structures, 20, unit)
+                        if (
+                            distance_to(unit, attackers_center) > clumping_distance
+                            and not structures_nearby
+                        ):
+                            clumping.append(unit)
                         else:
-                            unit.move(attacking_units.center)  
+                            advancing.append(unit)
+                    self._command_group(
+                        StepSection.ATTACKING,
+                        clumping,
+                        AbilityId.MOVE_MOVE,
+                        attackers_center,
+                    )
+                    self._follow_flow_field(
+                        advancing, enemy_pos, StepSection.ATTACKING, attack=True
+                    )
+                else:  # Fallback
+                    if defenders:
+                        rally: Point2 = center(defenders)
+                    elif creep_front := self.planner.latest(
+                        CREEP_FRONT_PLAN, frame, PLAN_MAX_STALENESS
+                    ):
+                        rally: Point2 = creep_front.result or attackers_center
+                    else:
+                        rally: Point2 = attackers_center
+                    self._command_group(
+                        StepSection.ATTACKING,
+                        attacking_units,
+                        AbilityId.MOVE_MOVE,
+                        rally,
+                    )
 
+        self.allocation_profiler.enter(StepSection.OFFENSIVE_QUEENS)
         creep_queens = self.mediator.get_units_from_role(role=UnitRole.QUEEN_CREEP)
         if len(creep_queens) > 3:
             # Switch roles from creep queen to attack queen
-            self.mediator.switch_roles(from_role=UnitRole.QUEEN_CREEP, to_role=UnitRole.QUEEN_OFFENSIVE)
-       
+            self.mediator.switch_roles(
+                from_role=UnitRole.QUEEN_CREEP, to_role=UnitRole.QUEEN_OFFENSIVE
+            )
+
         # Queen attack
-        offensive_queens = self.mediator.get_units_from_role(role=UnitRole.QUEEN_OFFENSIVE)
+        offensive_queens = self.mediator.get_units_from_role(
+            role=UnitRole.QUEEN_OFFENSIVE
+        )
+        advancing_queens: list[Unit] = []
+        queens_center: Optional[Point2] = (
+            center(offensive_queens) if offensive_queens else None
+        )
         for queen in offensive_queens:
-            if queen.position.distance_to(offensive_queens.center) > clumping_distance:
-                    queen.move(offensive_queens.center)  
-            else:
-                # if any queen is low then transfuse with another queen
-                if queen.health_percentage < 0.4:
-                    for other_queen in offensive_queens:
-                        if other_queen.tag != queen.tag and other_queen.energy >= 50:
-                            other_queen(AbilityId.TRANSFUSION_TRANSFUSION, queen)
-                else:
-                    self.register_behavior(AMove(queen, enemy_pos))
+            if queen.tag in casting:
+                continue
+            if distance_to(queen, queens_center) > clumping_distance:
+                queen.move(queens_center)
+                self._trace(
+                    StepSection.OFFENSIVE_QUEENS,
+                    queen,
+                    AbilityId.MOVE_MOVE,
+                    queens_center,
+                )
+            # low queens wait for a transfusion
+            elif queen.health_percentage >= TRANSFUSE_HEALTH:
+                advancing_queens.append(queen)
+        self._follow_flow_field(
+            advancing_queens, enemy_pos, StepSection.OFFENSIVE_QUEENS, attack=True
+        )
 
+        self.allocation_profiler.enter(StepSection.ALL_IN)
         # If all our townhalls are dead, send all our units to attack
         if not self.townhalls:
-            for unit in self.units.of_type({UnitTypeId.DRONE, UnitTypeId.QUEEN, UnitTypeId.ZERGLING}):
+            for unit in self.units.of_type(
+                {UnitTypeId.DRONE, UnitTypeId.QUEEN, UnitTypeId.ZERGLING}
+            ):
                 unit.attack(enemy_pos)
-        
+                self._trace(
+                    StepSection.ALL_IN, unit, AbilityId.ATTACK_ATTACK, enemy_pos
+                )
+
+        self.allocation_profiler.end_step(self.state.game_loop)
+        self.realtime_governor.end_step()
+        step_time: int = perf_counter_ns() - step_start
+        self.decision_trace.add_step_time(step_time)
+        if self.telemetry.enabled:
+            self._update_telemetry(step_time)
+
     async def on_unit_created(self, unit: Unit) -> None:
         await super(MyBot, self).on_unit_created(unit)
 
         if unit.type_id == UnitTypeId.ZERGLING:
             self.mediator.assign_role(tag=unit.tag, role=UnitRole.DEFENDING)
-        
+
         if unit.type_id == UnitTypeId.HYDRALISK:
             self.mediator.assign_role(tag=unit.tag, role=UnitRole.DEFENDING)
 
         if unit.type_id == UnitTypeId.QUEEN:
-            inject_queens = self.mediator.get_units_from_role(role=UnitRole.QUEEN_INJECT)
+            inject_queens = self.mediator.get_units_from_role(
+                role=UnitRole.QUEEN_INJECT
+            )
             if inject_queens.amount >= self.townhalls.amount:
                 self.mediator.assign_role(tag=unit.tag, role=UnitRole.QUEEN_CREEP)
             else:
@@ -402,28 +1349,72 @@ class MyBot(AresBot):
         if scouts.amount == 0 and unit.type_id == UnitTypeId.OVERLORD:
             self.mediator.assign_role(tag=unit.tag, role=UnitRole.SCOUTING)
 
-    # async def on_start(self) -> None:
-    #     await super(MyBot, self).on_start()
-    #
-    #     # on_start logic here ...
-    #
-    # async def on_end(self, game_result: Result) -> None:
-    #     await super(MyBot, self).on_end(game_result)
-    #
-    #     # custom on_end logic here ...
-    #
+    async def on_start(self) -> None:
+        await super(MyBot, self).on_start()
+
+        self.trace_decisions = self.config.get(DECISION_TRACE, True)
+        self._checkpoint_loops = sorted(self.config.get(CHECKPOINT_LOOPS) or [])
+        self._checkpoint_units = self.config.get(CHECKPOINT_UNITS, 0)
+        self._load_creep_plan()
+        if self.config.get(ALLOCATION_PROFILER, False):
+            self.allocation_profiler.start()
+        if self.realtime and self.config.get(REALTIME_GOVERNOR, True):
+            self.realtime_governor.start(self.client.game_step)
+        if self.config.get(TELEMETRY, False):
+            target: str = self.config.get(TELEMETRY_TARGET) or path.join(
+                DATA_DIR, "telemetry", f"{self.opponent_id}-{getpid()}.prom"
+            )
+            self.telemetry.start(
+                target, {"opponent": str(self.opponent_id), "pid": str(getpid())}
+            )
+            logger.info(f"Publishing telemetry to {target}")
+
+    async def on_end(self, game_result: Result) -> None:
+        await super(MyBot, self).on_end(game_result)
+
+        self.planner.shutdown()
+        self.telemetry.stop()
+
+        if self.trace_decisions:
+            trace_path: str = self.decision_trace.dump(
+                path.join(
+                    DATA_DIR,
+                    f"{self.opponent_id}-{strftime('%Y%m%d-%H%M%S')}-trace.bin",
+                )
+            )
+            logger.info(f"Decision trace written to {trace_path}")
+
+        if self.allocation_profiler.enabled:
+            self.allocation_profiler.stop()
+            report_path: str = self.allocation_profiler.write_report(
+                path.join(
+                    DATA_DIR,
+                    f"{self.opponent_id}-{strftime('%Y%m%d-%H%M%S')}-allocations.json",
+                )
+            )
+            logger.info(f"Allocation report written to {report_path}")
+
+        if self.realtime_governor.enabled:
+            logger.info(f"Realtime latency: {self.realtime_governor.report()}")
+            report_path: str = self.realtime_governor.write_report(
+                path.join(
+                    DATA_DIR,
+                    f"{self.opponent_id}-{strftime('%Y%m%d-%H%M%S')}-realtime.json",
+                )
+            )
+            logger.info(f"Realtime report written to {report_path}")
+
     # async def on_building_construction_complete(self, unit: Unit) -> None:
     #     await super(MyBot, self).on_building_construction_complete(unit)
     #
     #     # custom on_building_construction_complete logic here ...
     #
 
-    #
-    # async def on_unit_destroyed(self, unit_tag: int) -> None:
-    #     await super(MyBot, self).on_unit_destroyed(unit_tag)
-    #
-    #     # custom on_unit_destroyed logic here ...
-    #
+    async def on_unit_destroyed(self, unit_tag: int) -> None:
+        await super(MyBot, self).on_unit_destroyed(unit_tag)
+
+        self.enemy_memory.remove(unit_tag)
+
     # async def on_unit_took_damage(self, unit: Unit, amount_damage_taken: float) -> None:
     #     await super(MyBot, self).on_unit_took_damage(unit, amount_damage_taken)
     #
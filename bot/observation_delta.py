@@ -0,0 +1,131 @@
+"""
+What changed between two frames' unit columns.
+
+Rows of the previous and current `UnitColumns` are matched by tag with a
+sorted merge, then every change is a vectorized comparison of the matched
+rows. Code that keeps state across frames can update the rows in these
+sets instead of going over every unit again. Only the tag match and morphs
+are computed up front, the other sets are worked out the first time they
+are read.
+"""
+from functools import cached_property
+from typing import Optional
+
+import numpy as np
+
+from bot.unit_snapshot import UnitColumns
+
+# distance a unit has to move to count as moved
+MOVE_THRESHOLD: float = 0.25
+
+
+class ColumnDelta:
+    def __init__(
+        self,
+        previous: Optional[UnitColumns],
+        current: UnitColumns,
+        move_threshold: float = MOVE_THRESHOLD,
+    ):
+        """Compare `current` with `previous` by tag.
+
+        Parameters
+        ----------
+        previous :
+            Last frame's columns, None on the first frame, when every unit
+            counts as added.
+        current :
+            This frame's columns.
+        move_threshold :
+            Distance a unit has to move to count as moved.
+        """
+        self.current: UnitColumns = current
+        self.previous: Optional[UnitColumns] = previous
+        self.move_threshold: float = move_threshold
+        if previous is None:
+            empty: np.ndarray = np.zeros(0, dtype=np.intp)
+            self.matched_previous: np.ndarray = empty
+            self.matched_current: np.ndarray = empty
+            self.added: np.ndarray = np.arange(len(current))
+            self.removed_tags: np.ndarray = np.zeros(0, dtype=np.uint64)
+            self.morphed: np.ndarray = empty
+            return
+
+        _, self.matched_previous, self.matched_current = np.intersect1d(
+            previous.tags, current.tags, assume_unique=True, return_indices=True
+        )
+        still_here: np.ndarray = np.zeros(len(current), dtype=bool)
+        still_here[self.matched_current] = True
+        # rows of `current` that weren't in `previous`
+        self.added: np.ndarray = np.flatnonzero(~still_here)
+        gone: np.ndarray = np.ones(len(previous), dtype=bool)
+        gone[self.matched_previous] = False
+        self.removed_tags: np.ndarray = previous.tags[gone]
+        # all rows of `current`
+        self.morphed: np.ndarray = self._changed(
+            current.type_ids, previous.type_ids, np.not_equal
+        )
+
+    def _changed(
+        self, current: np.ndarray, previous: np.ndarray, changed
+    ) -> np.ndarray:
+        """Matched rows of `current` where `changed(current, previous)` holds."""
+        c: np.ndarray = self.matched_current
+        return c[changed(current[c], previous[self.matched_previous])]
+
+    @cached_property
+    def moved(self) -> np.ndarray:
+        if self.previous is None:
+            return self.matched_current
+        p: np.ndarray = self.matched_previous
+        c: np.ndarray = self.matched_current
+        dx: np.ndarray = self.current.x[c] - self.previous.x[p]
+        dy: np.ndarray = self.current.y[c] - self.previous.y[p]
+        return c[dx * dx + dy * dy > self.move_threshold * self.move_threshold]
+
+    @cached_property
+    def damaged(self) -> np.ndarray:
+        """Lost hit points or shields."""
+        if self.previous is None:
+            return self.matched_current
+        return self._changed(self.current.hit_points, self.previous.hit_points, np.less)
+
+    @cached_property
+    def order_changed(self) -> np.ndarray:
+        if self.previous is None:
+            return self.matched_current
+        return self._changed(
+            self.current.order_keys, self.previous.order_keys, np.not_equal
+        )
+
+    def __len__(self) -> int:
+        """Units that changed in any way."""
+        changed: np.ndarray = np.unique(
+            np.concatenate(
+                (self.added, self.moved, self.damaged, self.order_changed, self.morphed)
+            )
+        )
+        return len(changed) + len(self.removed_tags)
+
+    def tags(self, rows: np.ndarray) -> set[int]:
+        """Tags of `rows` of the current columns."""
+        return set(self.current.tags[rows].tolist())
+
+    @property
+    def added_tags(self) -> set[int]:
+        return self.tags(self.added)
+
+    @property
+    def removed(self) -> set[int]:
+        return set(self.removed_tags.tolist())
+
+    @property
+    def moved_tags(self) -> set[int]:
+        return self.tags(self.moved)
+
+    @property
+    def damaged_tags(self) -> set[int]:
+        return self.tags(self.damaged)
+
+    @property
+    def order_changed_tags(self) -> set[int]:
+        return self.tags(self.order_changed)
@@ -0,0 +1,138 @@
+"""
+Run computations that can span several frames on a worker pool.
+
+`on_step` submits work with the inputs it needs copied out of the game
+state, and reads the latest finished result on later frames without ever
+waiting. Work should be numpy heavy so the workers spend most of their
+time outside the GIL.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+# seconds `shutdown` waits for queued work, eg. checkpoint writes
+SHUTDOWN_TIMEOUT: float = 5.0
+
+
+@dataclass
+class Plan:
+    result: Any
+    submitted_frame: int
+    collected_frame: int
+
+    def staleness(self, frame: int) -> int:
+        """Game loops since the inputs of this plan were read."""
+        return frame - self.submitted_frame
+
+
+class BackgroundPlanner:
+    def __init__(self, max_workers: int = 2):
+        """Start the worker pool.
+
+        Parameters
+        ----------
+        max_workers :
+            Number of worker threads.
+        """
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="planner"
+        )
+        self._pending: dict[str, tuple[Future, int]] = {}
+        self._plans: dict[str, Plan] = {}
+
+    def is_pending(self, key: str) -> bool:
+        return key in self._pending
+
+    def submit(self, key: str, frame: int, fn: Callable, *args: Any) -> bool:
+        """Queue `fn(*args)` unless a plan for `key` is already being computed.
+
+        Parameters
+        ----------
+        key :
+            Name of the plan.
+        frame :
+            Game loop the arguments were read on.
+        fn :
+            The computation, must not touch the bot or game state.
+        *args :
+            Arguments for `fn`, copies of any state that changes per frame.
+
+        Returns
+        -------
+        bool :
+            True if the work was queued.
+        """
+        if key in self._pending:
+            return False
+        self._pending[key] = (self._executor.submit(fn, *args), frame)
+        return True
+
+    def is_due(self, key: str, frame: int, interval: int) -> bool:
+        """Whether `key` should be replanned: nothing in flight and no plan
+        younger than `interval` game loops."""
+        if key in self._pending:
+            return False
+        plan: Optional[Plan] = self._plans.get(key)
+        return plan is None or plan.staleness(frame) >= interval
+
+    def collect(self, frame: int) -> None:
+        """Pick up every finished computation, call once at the start of a step.
+
+        Parameters
+        ----------
+        frame :
+            Current game loop.
+        """
+        for key, (future, submitted_frame) in list(self._pending.items()):
+            if not future.done():
+                continue
+            del self._pending[key]
+            if exception := future.exception():
+                logger.warning(f"Planner task {key} failed: {exception}")
+                continue
+            self._plans[key] = Plan(future.result(), submitted_frame, frame)
+
+    def latest(
+        self, key: str, frame: int, max_staleness: Optional[int] = None
+    ) -> Optional[Plan]:
+        """Latest finished plan for `key`, if there is one fresh enough.
+
+        Parameters
+        ----------
+        key :
+            Name of the plan.
+        frame :
+            Current game loop.
+        max_staleness :
+            Ignore plans whose inputs are older than this many game loops.
+
+        Returns
+        -------
+        Optional[Plan] :
+            The plan, or None.
+        """
+        plan: Optional[Plan] = self._plans.get(key)
+        if plan is None:
+            return None
+        if max_staleness is not None and plan.staleness(frame) > max_staleness:
+            return None
+        return plan
+
+    def discard(self, key: str) -> None:
+        """Forget the plan for `key`, a computation still in flight is ignored."""
+        self._pending.pop(key, None)
+        self._plans.pop(key, None)
+
+    def shutdown(self, timeout: float = SHUTDOWN_TIMEOUT) -> None:
+        """Let queued and running work finish, for up to `timeout` seconds,
+        then cancel whatever hasn't started."""
+        futures: dict[Future, str] = {
+            future: key for key, (future, _) in self._pending.items()
+        }
+        _, not_done = wait(futures, timeout=timeout)
+        if not_done:
+            keys: list[str] = sorted(futures[future] for future in not_done)
+            logger.warning(f"Planner shut down before finishing {keys}")
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,353 @@
+"""
+Income, larvae and supply projected over the next seconds, and the
+production that spends them.
+
+`ProductionForecast.project` turns worker saturation, larvae, inject timers
+and pending supply into one value per game second of what the bot will have
+if it spends nothing: banked minerals and gas, larvae to spend and the
+supply cap once pending overlords and townhalls finish. Larvae are assumed
+to be spent as they spawn, so no townhall sits on a full three.
+`ProductionForecast.plan` then spends the bank in one go, after holding
+back what planned structures still need: overlords for the supply the
+larvae and income will use before a new overlord could finish, the queens
+townhalls are missing, a drone or an army unit for every larva that can be
+afforded, and more queens with the income the larvae can't use.
+"""
+from math import ceil, floor
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+from sc2.game_data import Cost
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+
+from bot.queen_allocator import INJECT_ENERGY
+
+# game seconds, the unit of every time here
+LOOPS_PER_SECOND: float = 22.4
+# mining per worker and game second; a third worker on a patch adds about
+# half a worker and a fourth nothing, geysers take three
+MINERALS_PER_WORKER: float = 0.94
+THIRD_WORKER_YIELD: float = 0.5
+VESPENE_PER_WORKER: float = 0.9
+LARVA_INTERVAL: float = 11.0
+INJECT_LARVAE: int = 3
+INJECT_SECONDS: float = 29.0
+QUEEN_ENERGY_REGEN: float = 0.7875
+OVERLORD_SECONDS: float = 18.0
+HATCHERY_SECONDS: float = 71.0
+OVERLORD_SUPPLY: float = 8.0
+HATCHERY_SUPPLY: float = 6.0
+MAX_SUPPLY: float = 200.0
+# overlords finish this long before the supply is needed
+SUPPLY_SLACK: float = 3.0
+# seconds until the drone for a planned structure gets to it, income in
+# that time goes to the structure instead of being held back
+RESERVE_LEAD: float = 5.0
+# while an overlord is needed but not affordable, larvae leave this much
+# supply free so the bank saves up for it, like a 13 overlord opener
+SAVING_SUPPLY: float = 1.0
+LARVA_ABILITIES: dict[UnitTypeId, AbilityId] = {
+    UnitTypeId.DRONE: AbilityId.LARVATRAIN_DRONE,
+    UnitTypeId.OVERLORD: AbilityId.LARVATRAIN_OVERLORD,
+    UnitTypeId.ZERGLING: AbilityId.LARVATRAIN_ZERGLING,
+    UnitTypeId.HYDRALISK: AbilityId.LARVATRAIN_HYDRALISK,
+}
+
+
+class Economy(NamedTuple):
+    minerals: float
+    vespene: float
+    supply_used: float
+    supply_cap: float
+    # assigned and ideal harvesters of every ready townhall and gas building
+    mineral_workers: np.ndarray
+    mineral_slots: np.ndarray
+    gas_workers: np.ndarray
+    gas_slots: np.ndarray
+    larvae: int
+    # seconds until the running inject of every ready townhall pops, nan
+    # for townhalls without one
+    inject_remaining: np.ndarray
+    # energy of the queens that inject
+    inject_queen_energy: np.ndarray
+    # seconds until each pending overlord or townhall finishes, and its supply
+    pending_seconds: np.ndarray
+    pending_supply: np.ndarray
+
+
+class Forecast(NamedTuple):
+    # game seconds from now, one per second up to the horizon
+    seconds: np.ndarray
+    minerals: np.ndarray
+    vespene: np.ndarray
+    # larvae spawned by then, counting the ones there now
+    larvae: np.ndarray
+    supply_cap: np.ndarray
+    # per game second
+    mineral_rate: float
+    vespene_rate: float
+
+
+class ProductionPlan(NamedTuple):
+    # unit type to the larvae morphing into it this step, in training order
+    larvae: dict[UnitTypeId, int]
+    queens: int
+    reserved_minerals: float
+    reserved_vespene: float
+
+
+def mining_rate(
+    workers: np.ndarray, slots: np.ndarray, per_worker: float, surplus_yield: float
+) -> float:
+    """Income per game second of harvesters on their bases.
+
+    Parameters
+    ----------
+    workers :
+        Assigned harvesters per base or geyser.
+    slots :
+        Ideal harvesters per base or geyser.
+    per_worker :
+        Income of a worker on an unsaturated base.
+    surplus_yield :
+        Fraction of that a worker past the ideal count adds, up to half the
+        ideal count again.
+
+    Returns
+    -------
+    float :
+        Summed income.
+    """
+    saturated: np.ndarray = np.minimum(workers, slots)
+    surplus: np.ndarray = np.clip(workers - slots, 0, slots / 2)
+    return float(saturated.sum() + surplus_yield * surplus.sum()) * per_worker
+
+
+class ProductionForecast:
+    def __init__(
+        self,
+        cost_of: Callable[[UnitTypeId], Cost],
+        supply_of: Callable[[UnitTypeId], float],
+        horizon: float = 30.0,
+    ):
+        """Nothing is projected until the first `project`.
+
+        Parameters
+        ----------
+        cost_of :
+            Cost to train the given unit type, zerglings by the pair.
+        supply_of :
+            Free supply needed to train the given unit type.
+        horizon :
+            Game seconds to project, at least an overlord's build time.
+        """
+        self._cost_of: Callable[[UnitTypeId], Cost] = cost_of
+        self._supply_of: Callable[[UnitTypeId], float] = supply_of
+        self.horizon: float = max(horizon, OVERLORD_SECONDS + SUPPLY_SLACK)
+        self._costs: dict[UnitTypeId, Cost] = {}
+        self._supply: dict[UnitTypeId, float] = {}
+        # last projection, for diagnostics
+        self.forecast: Optional[Forecast] = None
+
+    def _cost(self, type_id: UnitTypeId) -> Cost:
+        cost: Optional[Cost] = self._costs.get(type_id)
+        if cost is None:
+            cost = self._costs[type_id] = self._cost_of(type_id)
+        return cost
+
+    def _supply_cost(self, type_id: UnitTypeId) -> float:
+        supply: Optional[float] = self._supply.get(type_id)
+        if supply is None:
+            supply = self._supply[type_id] = self._supply_of(type_id)
+        return supply
+
+    def _inject_pops(self, economy: Economy) -> np.ndarray:
+        """Seconds at which injected larvae pop within the horizon, sorted."""
+        remaining: np.ndarray = np.sort(
+            np.nan_to_num(economy.inject_remaining, nan=0.0)
+        )
+        pops: list[np.ndarray] = [
+            economy.inject_remaining[~np.isnan(economy.inject_remaining)]
+        ]
+        # the most charged queens go to the townhalls freed up first
+        energy: np.ndarray = np.sort(economy.inject_queen_energy)[::-1]
+        pairs: int = min(len(energy), len(remaining))
+        if pairs:
+            charged: np.ndarray = (
+                np.clip(INJECT_ENERGY - energy[:pairs], 0, None) / QUEEN_ENERGY_REGEN
+            )
+            first: np.ndarray = np.maximum(remaining[:pairs], charged) + INJECT_SECONDS
+            interval: float = max(INJECT_SECONDS, INJECT_ENERGY / QUEEN_ENERGY_REGEN)
+            repeats: np.ndarray = np.arange(ceil(self.horizon / interval) + 1)
+            pops.append((first[:, None] + interval * repeats[None, :]).ravel())
+        all_pops: np.ndarray = np.concatenate(pops)
+        return np.sort(all_pops[all_pops <= self.horizon])
+
+    def project(self, economy: Economy) -> Forecast:
+        """Resources, larvae and supply cap over the horizon if nothing is
+        spent, also kept as `forecast`."""
+        seconds: np.ndarray = np.arange(floor(self.horizon) + 1, dtype=np.float64)
+        mineral_rate: float = mining_rate(
+            economy.mineral_workers,
+            economy.mineral_slots,
+            MINERALS_PER_WORKER,
+            THIRD_WORKER_YIELD,
+        )
+        vespene_rate: float = mining_rate(
+            economy.gas_workers, economy.gas_slots, VESPENE_PER_WORKER, 0.0
+        )
+        # spawn timers aren't observed, every townhall is half way on average
+        natural: np.ndarray = len(economy.inject_remaining) * np.floor(
+            seconds / LARVA_INTERVAL + 0.5
+        )
+        injected: np.ndarray = INJECT_LARVAE * np.searchsorted(
+            self._inject_pops(economy), seconds, side="right"
+        )
+        order: np.ndarray = np.argsort(economy.pending_seconds)
+        finished: np.ndarray = np.searchsorted(
+            economy.pending_seconds[order], seconds, side="right"
+        )
+        added: np.ndarray = np.concatenate(
+            ([0.0], np.cumsum(economy.pending_supply[order]))
+        )[finished]
+        self.forecast = Forecast(
+            seconds=seconds,
+            minerals=economy.minerals + mineral_rate * seconds,
+            vespene=economy.vespene + vespene_rate * seconds,
+            larvae=economy.larvae + natural + injected,
+            supply_cap=np.minimum(economy.supply_cap + added, MAX_SUPPLY),
+            mineral_rate=mineral_rate,
+            vespene_rate=vespene_rate,
+        )
+        return self.forecast
+
+    def plan(
+        self,
+        forecast: Forecast,
+        economy: Economy,
+        drones: int,
+        army: list[UnitTypeId],
+        townhalls: int,
+        missing_queens: int,
+        structures: list[UnitTypeId],
+    ) -> ProductionPlan:
+        """Spend this step's bank.
+
+        Parameters
+        ----------
+        forecast :
+            This step's `project`.
+        economy :
+            What it was projected from.
+        drones :
+            Drones still wanted.
+        army :
+            Army units larvae may train, in order of preference.
+        townhalls :
+            Idle townhalls that may train a queen.
+        missing_queens :
+            Queens wanted whatever the income, eg. one per townhall.
+        structures :
+            Structures planned but not started, their cost is held back.
+
+        Returns
+        -------
+        ProductionPlan :
+            Larvae to morph by unit type, queens to train and the resources
+            held back.
+        """
+        held_minerals: float = sum(self._cost(s).minerals for s in structures)
+        held_vespene: float = sum(self._cost(s).vespene for s in structures)
+        reserved_minerals: float = max(
+            0.0, held_minerals - forecast.mineral_rate * RESERVE_LEAD
+        )
+        reserved_vespene: float = max(
+            0.0, held_vespene - forecast.vespene_rate * RESERVE_LEAD
+        )
+        minerals: float = economy.minerals - reserved_minerals
+        vespene: float = economy.vespene - reserved_vespene
+        supply_left: float = economy.supply_cap - economy.supply_used
+        larvae: int = economy.larvae
+        kinds: list[UnitTypeId] = [UnitTypeId.DRONE] + army
+        # larvae the bank can pay for, and the supply they take, are bounded
+        # by the priciest and hungriest unit they may become
+        larva_minerals: float = max(self._cost(k).minerals for k in kinds)
+        larva_supply: float = max(self._supply_cost(k) for k in kinds)
+        max_units: float = np.inf if army else drones
+
+        def spendable(at: int) -> float:
+            """Larvae trained by `forecast.seconds[at]`, if income allows."""
+            affordable: float = (
+                max(0.0, forecast.minerals[at] - held_minerals) / larva_minerals
+            )
+            return min(forecast.larvae[at], affordable, max_units)
+
+        # overlords started now finish just before the supply runs out
+        lead: int = min(
+            len(forecast.seconds) - 1, ceil(OVERLORD_SECONDS + SUPPLY_SLACK)
+        )
+        supply_needed: float = (
+            economy.supply_used
+            + spendable(lead) * larva_supply
+            - forecast.supply_cap[lead]
+        )
+        overlords: int = max(0, ceil(supply_needed / OVERLORD_SUPPLY))
+        overlords = min(
+            overlords, ceil((MAX_SUPPLY - forecast.supply_cap[lead]) / OVERLORD_SUPPLY)
+        )
+        planned: dict[UnitTypeId, int] = {}
+        overlord: Cost = self._cost(UnitTypeId.OVERLORD)
+        while overlords and larvae and minerals >= overlord.minerals:
+            planned[UnitTypeId.OVERLORD] = planned.get(UnitTypeId.OVERLORD, 0) + 1
+            minerals -= overlord.minerals
+            overlords -= 1
+            larvae -= 1
+        # save up for the overlords still needed once the supply there is
+        # now runs low
+        kept_supply: float = SAVING_SUPPLY if overlords else 0.0
+
+        def affordable(type_id: UnitTypeId) -> bool:
+            cost: Cost = self._cost(type_id)
+            return (
+                cost.minerals <= minerals
+                and cost.vespene <= vespene
+                and self._supply_cost(type_id) + kept_supply <= supply_left
+            )
+
+        queens: int = 0
+        while queens < min(townhalls, missing_queens) and affordable(UnitTypeId.QUEEN):
+            minerals -= self._cost(UnitTypeId.QUEEN).minerals
+            supply_left -= self._supply_cost(UnitTypeId.QUEEN)
+            queens += 1
+
+        # alternate drones and army while both are wanted
+        drone_turn: bool = True
+        while larvae:
+            choices: list[UnitTypeId] = [UnitTypeId.DRONE] if drones else []
+            choices = choices + army if drone_turn else army + choices
+            choice: Optional[UnitTypeId] = next(filter(affordable, choices), None)
+            if choice is None:
+                break
+            cost: Cost = self._cost(choice)
+            minerals -= cost.minerals
+            vespene -= cost.vespene
+            supply_left -= self._supply_cost(choice)
+            planned[choice] = planned.get(choice, 0) + 1
+            larvae -= 1
+            if choice == UnitTypeId.DRONE:
+                drones -= 1
+            drone_turn = choice != UnitTypeId.DRONE
+
+        # more queens only for income the larvae of the horizon can't spend
+        queen: Cost = self._cost(UnitTypeId.QUEEN)
+        surplus: float = (
+            forecast.minerals[-1] - held_minerals - spendable(-1) * larva_minerals
+        )
+        extra_queens: int = min(townhalls - queens, floor(surplus / queen.minerals))
+        while extra_queens > 0 and affordable(UnitTypeId.QUEEN):
+            minerals -= queen.minerals
+            supply_left -= self._supply_cost(UnitTypeId.QUEEN)
+            queens += 1
+            extra_queens -= 1
+        return ProductionPlan(planned, queens, reserved_minerals, reserved_vespene)
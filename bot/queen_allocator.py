@@ -0,0 +1,220 @@
+"""
+One pass assigning every queen spell of a step.
+
+Transfusions, injects and creep tumors are solved in that order as greedy
+matchings between queens with the energy for the spell and its targets:
+candidate (queen, target) pairs are sorted by target priority, then
+distance, and taken while both ends are free. Every target gets at most one
+caster and every queen at most one spell per step. Targets stay claimed for
+a while after a cast, so queens still walking to a townhall, or a
+transfusion in flight, are not doubled up on the next step.
+"""
+from typing import NamedTuple, Optional
+
+import numpy as np
+from sc2.ids.ability_id import AbilityId
+
+from bot.consts import StepSection
+from bot.unit_snapshot import UnitColumns, distance_matrix
+
+INJECT_ENERGY: float = 25.0
+CREEP_TUMOR_ENERGY: float = 25.0
+TRANSFUSE_ENERGY: float = 50.0
+# queens only transfuse allies already this close
+TRANSFUSE_RANGE: float = 8.0
+# allies below this health fraction get transfused
+TRANSFUSE_HEALTH: float = 0.4
+# game loops a target stays claimed after a cast
+INJECT_CLAIM_LOOPS: int = 224
+TRANSFUSE_CLAIM_LOOPS: int = 22
+# section each spell is traced under
+QUEEN_SPELL_SECTIONS: dict[AbilityId, StepSection] = {
+    AbilityId.TRANSFUSION_TRANSFUSION: StepSection.OFFENSIVE_QUEENS,
+    AbilityId.EFFECT_INJECTLARVA: StepSection.INJECT_QUEENS,
+    AbilityId.BUILD_CREEPTUMOR: StepSection.CREEP_QUEENS,
+}
+
+
+class SpellAssignment(NamedTuple):
+    queen_row: int
+    ability: AbilityId
+    # row of the targeted unit, -1 for a position
+    target_row: int
+    # index into the spots passed to `allocate`, -1 for a unit
+    spot: int
+
+
+def _match(
+    distance: np.ndarray,
+    priority: Optional[np.ndarray] = None,
+    max_distance: float = np.inf,
+    conflicts: Optional[np.ndarray] = None,
+) -> list[tuple[int, int]]:
+    """Greedy matching of casters to targets.
+
+    Parameters
+    ----------
+    distance :
+        (casters, targets) distances, inf for pairs that can't be matched.
+    priority :
+        Per target priority, lower first, every target ties if not given.
+    max_distance :
+        Pairs further apart are never matched.
+    conflicts :
+        (targets, targets) mask, taking a target also takes every target
+        it conflicts with.
+
+    Returns
+    -------
+    list[tuple[int, int]] :
+        (caster, target) index pairs.
+    """
+    casters, targets = np.nonzero(distance <= max_distance)
+    if not len(casters):
+        return []
+    pair_distance: np.ndarray = distance[casters, targets]
+    order: np.ndarray = (
+        np.lexsort((pair_distance, priority[targets]))
+        if priority is not None
+        else np.argsort(pair_distance, kind="stable")
+    )
+    caster_used: np.ndarray = np.zeros(distance.shape[0], dtype=bool)
+    target_used: np.ndarray = np.zeros(distance.shape[1], dtype=bool)
+    pairs: list[tuple[int, int]] = []
+    for caster, target in zip(casters[order].tolist(), targets[order].tolist()):
+        if caster_used[caster] or target_used[target]:
+            continue
+        caster_used[caster] = True
+        if conflicts is not None:
+            target_used |= conflicts[target]
+        target_used[target] = True
+        pairs.append((caster, target))
+        if caster_used.all():
+            break
+    return pairs
+
+
+class QueenAllocator:
+    def __init__(self):
+        """No claims until the first `allocate`."""
+        # target tag to the game loop its claim runs out
+        self._claims: dict[int, int] = {}
+
+    def _unclaimed(self, own: UnitColumns, rows: np.ndarray, frame: int) -> np.ndarray:
+        if not self._claims or not len(rows):
+            return rows
+        return rows[
+            [self._claims.get(tag, -1) <= frame for tag in own.tags[rows].tolist()]
+        ]
+
+    def allocate(
+        self,
+        own: UnitColumns,
+        frame: int,
+        inject_queens: np.ndarray,
+        creep_queens: np.ndarray,
+        healers: np.ndarray,
+        townhalls: np.ndarray,
+        injured: np.ndarray,
+        spots: np.ndarray,
+        spot_priority: Optional[np.ndarray] = None,
+        spot_spacing: float = 0.0,
+    ) -> list[SpellAssignment]:
+        """Assign this step's spells.
+
+        Parameters
+        ----------
+        own :
+            This frame's own columns.
+        frame :
+            Current game loop.
+        inject_queens :
+            Rows of queens that may inject.
+        creep_queens :
+            Rows of queens that may place creep tumors.
+        healers :
+            Rows of queens that may transfuse.
+        townhalls :
+            Rows of townhalls that need an inject.
+        injured :
+            Rows of allies that may be transfused.
+        spots :
+            (n, 2) array of tumor spots.
+        spot_priority :
+            Per spot priority, lower first, closest first if not given.
+        spot_spacing :
+            Queens don't get spots closer together than this.
+
+        Returns
+        -------
+        list[SpellAssignment] :
+            One assignment per casting queen.
+        """
+        if self._claims:
+            self._claims = {t: f for t, f in self._claims.items() if f > frame}
+        assignments: list[SpellAssignment] = []
+        busy: set[int] = set()
+
+        def free(rows: np.ndarray, energy: float) -> np.ndarray:
+            rows = rows[own.energy[rows] >= energy]
+            return rows[[row not in busy for row in rows.tolist()]] if busy else rows
+
+        def distances(queens: np.ndarray, targets: np.ndarray) -> np.ndarray:
+            return distance_matrix(
+                own.x[queens], own.y[queens], own.x[targets], own.y[targets]
+            )
+
+        # transfuse first, the most hurt ally first
+        queens: np.ndarray = free(healers, TRANSFUSE_ENERGY)
+        targets: np.ndarray = self._unclaimed(
+            own, injured[own.health[injured] < TRANSFUSE_HEALTH], frame
+        )
+        if len(queens) and len(targets):
+            distance: np.ndarray = distances(queens, targets)
+            # queens don't transfuse themselves
+            distance[queens[:, None] == targets[None, :]] = np.inf
+            for q, t in _match(distance, own.health[targets], TRANSFUSE_RANGE):
+                busy.add(int(queens[q]))
+                self._claims[int(own.tags[targets[t]])] = frame + TRANSFUSE_CLAIM_LOOPS
+                assignments.append(
+                    SpellAssignment(
+                        int(queens[q]),
+                        AbilityId.TRANSFUSION_TRANSFUSION,
+                        int(targets[t]),
+                        -1,
+                    )
+                )
+
+        # one queen per townhall, closest first
+        queens = free(inject_queens, INJECT_ENERGY)
+        targets = self._unclaimed(own, townhalls, frame)
+        if len(queens) and len(targets):
+            for q, t in _match(distances(queens, targets)):
+                busy.add(int(queens[q]))
+                self._claims[int(own.tags[targets[t]])] = frame + INJECT_CLAIM_LOOPS
+                assignments.append(
+                    SpellAssignment(
+                        int(queens[q]),
+                        AbilityId.EFFECT_INJECTLARVA,
+                        int(targets[t]),
+                        -1,
+                    )
+                )
+
+        # one queen per spot, in plan order
+        queens = free(creep_queens, CREEP_TUMOR_ENERGY)
+        if len(queens) and len(spots):
+            distance = distance_matrix(
+                own.x[queens], own.y[queens], spots[:, 0], spots[:, 1]
+            )
+            conflicts: Optional[np.ndarray] = (
+                distance_matrix(spots[:, 0], spots[:, 1], spots[:, 0], spots[:, 1])
+                < spot_spacing
+                if spot_spacing > 0
+                else None
+            )
+            for q, s in _match(distance, spot_priority, conflicts=conflicts):
+                assignments.append(
+                    SpellAssignment(int(queens[q]), AbilityId.BUILD_CREEPTUMOR, -1, s)
+                )
+        return assignments
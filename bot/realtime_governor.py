@@ -0,0 +1,171 @@
+"""
+Keep `on_step` inside its frame budget in realtime games.
+
+In realtime the game does not wait for us: a step that overruns its budget
+means the next observation is already several game loops old. Each step
+the governor measures the game loop gap since the previous step and how
+long the observation waited before `on_step` started. On lagging steps,
+deferrable sections only run in turns, one per step, so the sections that
+decide fights keep running on fresh state. Any section deferred for too
+long is run regardless.
+"""
+import json
+import statistics
+from os import makedirs, path
+from time import perf_counter
+from typing import Optional
+
+from bot.consts import StepSection
+
+GAME_LOOPS_PER_SECOND: float = 22.4
+# sections that can run on a later step without the bot losing fights
+DEFERRABLE_SECTIONS: tuple[StepSection, ...] = (
+    StepSection.OVERSEER_SCOUTING,
+    StepSection.OVERLORD_SCOUTING,
+    StepSection.OVERLORD_SPREAD,
+    StepSection.CREEP_SPREAD,
+    StepSection.CREEP_QUEENS,
+    StepSection.STRUCTURES,
+    StepSection.UPGRADES,
+)
+# deferrable sections run on every lagging step, in turns
+SECTIONS_PER_LAGGING_STEP: int = 1
+# a deferred section runs anyway once it hasn't for this many game loops
+MAX_DEFER_LOOPS: int = 112
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    ordered: list[float] = sorted(values)
+    return {
+        "p50": round(statistics.median(ordered), 3),
+        "p95": round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+        "p99": round(ordered[int(0.99 * (len(ordered) - 1))], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+class RealtimeGovernor:
+    def __init__(self):
+        """Set up the governor, every section runs until `start` is called."""
+        self.enabled: bool = False
+        self.lagging: bool = False
+        self._game_step: int = 1
+        self._budget: float = 1 / GAME_LOOPS_PER_SECOND
+        self._last_loop: Optional[int] = None
+        self._step_started: float = 0.0
+        self._last_step_time: float = 0.0
+        self._turn: int = 0
+        self._due: set[StepSection] = set()
+        self._last_run: dict[StepSection, int] = {}
+        # stats
+        self._gaps: list[int] = []
+        self._observation_ages: list[float] = []
+        self._step_times: list[float] = []
+        self._skipped_loops: int = 0
+        self._lagging_steps: int = 0
+        self._deferred: dict[StepSection, int] = {s: 0 for s in DEFERRABLE_SECTIONS}
+
+    def start(self, game_step: int) -> None:
+        """Start governing.
+
+        Parameters
+        ----------
+        game_step :
+            Game loops between two steps we ask for.
+        """
+        self.enabled = True
+        self._game_step = max(game_step, 1)
+        self._budget = self._game_step / GAME_LOOPS_PER_SECOND
+
+    def begin_step(self, game_loop: int, observation_received: Optional[float]) -> None:
+        """Call at the top of `on_step`.
+
+        Parameters
+        ----------
+        game_loop :
+            Game loop of this step's observation.
+        observation_received :
+            `perf_counter()` when the observation arrived, if the client
+            records it.
+        """
+        if not self.enabled:
+            return
+        self._step_started = perf_counter()
+        gap: int = (
+            game_loop - self._last_loop
+            if self._last_loop is not None
+            else self._game_step
+        )
+        self._last_loop = game_loop
+        self._gaps.append(gap)
+        skipped: int = max(gap - self._game_step, 0)
+        self._skipped_loops += skipped
+        age: float = (
+            self._step_started - observation_received
+            if observation_received is not None
+            else 0.0
+        )
+        self._observation_ages.append(age * 1000)
+
+        self.lagging = (
+            skipped > 0 or self._last_step_time > self._budget or age > self._budget
+        )
+        self._due = self._due_sections(game_loop)
+        if self.lagging:
+            self._lagging_steps += 1
+
+    def _due_sections(self, game_loop: int) -> set[StepSection]:
+        if not self.lagging:
+            return set(DEFERRABLE_SECTIONS)
+        due: set[StepSection] = {
+            s
+            for s in DEFERRABLE_SECTIONS
+            if game_loop - self._last_run.get(s, game_loop) >= MAX_DEFER_LOOPS
+        }
+        for _ in range(SECTIONS_PER_LAGGING_STEP):
+            due.add(DEFERRABLE_SECTIONS[self._turn % len(DEFERRABLE_SECTIONS)])
+            self._turn += 1
+        return due
+
+    def should_run(self, section: StepSection, game_loop: int) -> bool:
+        """Whether `section` runs this step, sections that are not
+        deferrable always do."""
+        if not self.enabled or section not in self._deferred:
+            return True
+        if section in self._due:
+            self._last_run[section] = game_loop
+            return True
+        self._deferred[section] += 1
+        return False
+
+    def end_step(self) -> None:
+        """Call at the bottom of `on_step`."""
+        if not self.enabled:
+            return
+        self._last_step_time = perf_counter() - self._step_started
+        self._step_times.append(self._last_step_time * 1000)
+
+    def report(self) -> dict:
+        """Latency and frame drop statistics for the game so far."""
+        return {
+            "steps": len(self._gaps),
+            "budget_ms": round(self._budget * 1000, 3),
+            "lagging_steps": self._lagging_steps,
+            "skipped_game_loops": self._skipped_loops,
+            "game_loop_gap": _percentiles(self._gaps),
+            "observation_age_ms": _percentiles(self._observation_ages),
+            "step_time_ms": _percentiles(self._step_times),
+            "deferred_sections": {
+                section.name: count for section, count in self._deferred.items()
+            },
+        }
+
+    def write_report(self, file_path: str) -> str:
+        directory: str = path.dirname(file_path)
+        if directory:
+            makedirs(directory, exist_ok=True)
+        with open(file_path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        return file_path
@@ -0,0 +1,838 @@
+"""
+Stand-in for the SC2 client's websocket API, to run the ladder path
+without StarCraft II.
+
+`StandInServer` listens on `/sc2api` like the game client LadderManager
+starts, and answers every request python-sc2 makes during a game. The game
+is a `ScriptedGame`: a small two player map with a main on high ground
+behind a ramp and a natural for each side, a hatchery whose drone count
+and income grow over time, an enemy zergling scouting now and then, and a
+victory once `game_loops` have passed, or a `RecordedGame` playing back
+the observations `record` saved from another game. Actions are
+acknowledged and counted, not simulated. Every `join_game` starts a fresh
+game, so one server can host any number of sequential games. The server
+times every request it answers by kind, along with the time the client
+took between a response and its next request. `LocalClient` is a
+python-sc2 client answered by a server in the same process, without a
+socket.
+"""
+import gzip
+import pickle
+import statistics
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from os import makedirs, path
+from time import perf_counter
+from typing import Optional
+
+import numpy as np
+from aiohttp import WSMsgType, web
+from s2clientprotocol import common_pb2, data_pb2, error_pb2, query_pb2, raw_pb2
+from s2clientprotocol import sc2api_pb2 as sc_pb
+from s2clientprotocol import score_pb2
+from sc2.client import Client
+from sc2.constants import geyser_ids, mineral_ids
+from sc2.data import Race, Status
+from sc2.dicts.unit_train_build_abilities import TRAIN_INFO
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.ids.upgrade_id import UpgradeId
+from sc2.protocol import ProtocolError
+
+# what the ping reports, a 5.0.x ladder client
+BASE_BUILD: int = 92440
+GAME_VERSION: str = "5.0.13.92440"
+# terrain_height bytes of low and high ground
+LOW_GROUND: int = 100
+HIGH_GROUND: int = 180
+# half the side of a main's plateau, in tiles
+MAIN_SIZE: int = 10
+RAMP_LENGTH: int = 4
+DRONE_LOOPS: int = 400
+MAX_DRONES: int = 32
+MINERALS_PER_DRONE_LOOP: float = 0.045
+SCOUT_LOOPS: int = 1344
+SIGHT_RANGE: float = 12.0
+# (minerals, vespene, food, build time in loops) of zerg types, structures
+# as the real client reports them, with the drone included
+ZERG_TYPES: dict[UnitTypeId, tuple[int, int, float, int]] = {
+    UnitTypeId.DRONE: (50, 0, 1, 272),
+    UnitTypeId.OVERLORD: (100, 0, 0, 400),
+    UnitTypeId.ZERGLING: (25, 0, 0.5, 384),
+    UnitTypeId.QUEEN: (150, 0, 2, 800),
+    UnitTypeId.ROACH: (75, 25, 2, 432),
+    UnitTypeId.RAVAGER: (100, 100, 3, 196),
+    UnitTypeId.BANELING: (50, 25, 0.5, 320),
+    UnitTypeId.HYDRALISK: (100, 50, 2, 528),
+    UnitTypeId.LURKERMP: (150, 150, 3, 336),
+    UnitTypeId.MUTALISK: (100, 100, 2, 528),
+    UnitTypeId.CORRUPTOR: (150, 100, 2, 640),
+    UnitTypeId.INFESTOR: (100, 150, 2, 800),
+    UnitTypeId.SWARMHOSTMP: (100, 75, 3, 640),
+    UnitTypeId.VIPER: (100, 200, 3, 640),
+    UnitTypeId.ULTRALISK: (275, 200, 6, 880),
+    UnitTypeId.BROODLORD: (300, 250, 4, 537),
+    UnitTypeId.OVERSEER: (150, 50, 0, 269),
+    UnitTypeId.HATCHERY: (350, 0, 0, 1590),
+    UnitTypeId.LAIR: (200, 100, 0, 1277),
+    UnitTypeId.HIVE: (250, 150, 0, 1590),
+    UnitTypeId.EXTRACTOR: (75, 0, 0, 482),
+    UnitTypeId.SPAWNINGPOOL: (250, 0, 0, 1030),
+    UnitTypeId.EVOLUTIONCHAMBER: (125, 0, 0, 560),
+    UnitTypeId.ROACHWARREN: (200, 0, 0, 880),
+    UnitTypeId.BANELINGNEST: (150, 50, 0, 960),
+    UnitTypeId.HYDRALISKDEN: (150, 100, 0, 640),
+    UnitTypeId.LURKERDENMP: (150, 150, 0, 1280),
+    UnitTypeId.SPIRE: (250, 200, 0, 1600),
+    UnitTypeId.INFESTATIONPIT: (150, 100, 0, 800),
+    UnitTypeId.ULTRALISKCAVERN: (200, 200, 0, 1040),
+    UnitTypeId.SPINECRAWLER: (150, 0, 0, 800),
+    UnitTypeId.SPORECRAWLER: (125, 0, 0, 480),
+}
+FOOD_PROVIDED: dict[UnitTypeId, float] = {
+    UnitTypeId.OVERLORD: 8,
+    UnitTypeId.HATCHERY: 6,
+    UnitTypeId.LAIR: 6,
+    UnitTypeId.HIVE: 6,
+}
+# (damage, range, cooldown) of the ground weapons of the units on the map
+WEAPONS: dict[UnitTypeId, tuple[float, float, float]] = {
+    UnitTypeId.DRONE: (5, 0.1, 1.07),
+    UnitTypeId.ZERGLING: (5, 0.1, 0.497),
+    UnitTypeId.QUEEN: (4, 5, 0.71),
+}
+RADIUS: dict[UnitTypeId, float] = {
+    UnitTypeId.HATCHERY: 2.75,
+    UnitTypeId.DRONE: 0.375,
+    UnitTypeId.ZERGLING: 0.375,
+    UnitTypeId.LARVA: 0.25,
+    UnitTypeId.OVERLORD: 1.0,
+    UnitTypeId.MINERALFIELD: 1.125,
+    UnitTypeId.VESPENEGEYSER: 1.8125,
+}
+# morphs, everything built by a worker is a structure already
+MORPHED_STRUCTURES: set[UnitTypeId] = {
+    UnitTypeId.LAIR,
+    UnitTypeId.HIVE,
+    UnitTypeId.GREATERSPIRE,
+    UnitTypeId.CREEPTUMOR,
+    UnitTypeId.CREEPTUMORBURROWED,
+    UnitTypeId.CREEPTUMORQUEEN,
+    UnitTypeId.SPINECRAWLERUPROOTED,
+    UnitTypeId.SPORECRAWLERUPROOTED,
+    UnitTypeId.ORBITALCOMMAND,
+    UnitTypeId.PLANETARYFORTRESS,
+    UnitTypeId.WARPGATE,
+}
+ZERG: int = Race.Zerg.value
+# `AbilityData.target` values, abilities starting with these take no
+# target and everything else takes a point or a unit
+NO_TARGET: int = 1
+POINT_OR_UNIT: int = 4
+NO_TARGET_PREFIXES: tuple[str, ...] = (
+    "LARVATRAIN",
+    "TRAIN",
+    "RESEARCH",
+    "MORPH",
+    "UPGRADETO",
+    "CANCEL",
+    "STOP",
+    "HOLDPOSITION",
+    "BURROW",
+    "LIFT",
+)
+# field number of `Response.observation`, recorded observations are
+# appended to the response already serialized
+OBSERVATION_FIELD: int = sc_pb.Response.DESCRIPTOR.fields_by_name["observation"].number
+
+
+@lru_cache(maxsize=None)
+def game_data() -> sc_pb.ResponseData:
+    """Every ability, unit type and upgrade python-sc2 knows, with the costs
+    and stats of the zerg types filled in."""
+    created_by: dict[UnitTypeId, AbilityId] = {
+        unit: info["ability"]
+        for trained in TRAIN_INFO.values()
+        for unit, info in trained.items()
+    }
+    structures: set[UnitTypeId] = MORPHED_STRUCTURES | {
+        unit
+        for worker in (UnitTypeId.DRONE, UnitTypeId.SCV, UnitTypeId.PROBE)
+        for unit in TRAIN_INFO.get(worker, {})
+    }
+    data = sc_pb.ResponseData(
+        abilities=[
+            data_pb2.AbilityData(
+                ability_id=ability.value,
+                link_name=ability.name.title(),
+                button_name=ability.name.title(),
+                available=True,
+                target=NO_TARGET
+                if ability.name.startswith(NO_TARGET_PREFIXES)
+                else POINT_OR_UNIT,
+            )
+            for ability in AbilityId
+            if ability.value
+        ],
+        upgrades=[
+            data_pb2.UpgradeData(upgrade_id=upgrade.value, name=upgrade.name.title())
+            for upgrade in UpgradeId
+            if upgrade.value
+        ],
+    )
+    for unit_type in UnitTypeId:
+        if not unit_type.value:
+            continue
+        minerals, vespene, food, build_time = ZERG_TYPES.get(unit_type, (0, 0, 0, 0))
+        unit_data = data.units.add(
+            unit_id=unit_type.value,
+            name=unit_type.name.title(),
+            available=True,
+            mineral_cost=minerals,
+            vespene_cost=vespene,
+            food_required=food,
+            food_provided=FOOD_PROVIDED.get(unit_type, 0),
+            build_time=build_time,
+            has_minerals=unit_type.value in mineral_ids,
+            has_vespene=unit_type.value in geyser_ids,
+            sight_range=SIGHT_RANGE,
+        )
+        if unit_type in created_by:
+            unit_data.ability_id = created_by[unit_type].value
+        if unit_type in ZERG_TYPES:
+            unit_data.race = ZERG
+        if unit_type in structures:
+            unit_data.attributes.append(data_pb2.Structure)
+        if unit_type in WEAPONS:
+            damage, weapon_range, cooldown = WEAPONS[unit_type]
+            unit_data.weapons.add(
+                type=data_pb2.Weapon.Ground,
+                damage=damage,
+                attacks=1,
+                range=weapon_range,
+                speed=cooldown,
+            )
+    return data
+
+
+def _varint(value: int) -> bytes:
+    encoded: bytearray = bytearray()
+    while value > 0x7F:
+        encoded.append(value & 0x7F | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _message_field(number: int, serialized: bytes) -> bytes:
+    """Wire encoding of a message field holding `serialized`."""
+    return _varint(number << 3 | 2) + _varint(len(serialized)) + serialized
+
+
+def _image(grid: np.ndarray, bits: int) -> common_pb2.ImageData:
+    height, width = grid.shape
+    data: bytes = np.packbits(grid).tobytes() if bits == 1 else grid.tobytes()
+    return common_pb2.ImageData(
+        bits_per_pixel=bits, size=common_pb2.Size2DI(x=width, y=height), data=data
+    )
+
+
+class ScriptedGame:
+    def __init__(self, game_loops: int = 6720, map_size: tuple[int, int] = (96, 96)):
+        """Lay out the map, the game itself starts with `reset`.
+
+        Parameters
+        ----------
+        game_loops :
+            Loops until the game ends in a victory.
+        map_size :
+            Width and height in tiles.
+        """
+        self.game_loops: int = game_loops
+        self.width, self.height = map_size
+        self.player_id: int = 1
+        self.loop: int = 0
+        self.actions: int = 0
+        self.minerals: float = 50.0
+        self.race: int = ZERG
+        # main and natural townhall spots of player 1, player 2's are
+        # rotated by 180 degrees
+        self.main: np.ndarray = np.array(
+            [round(0.22 * self.width) + 0.5, round(0.22 * self.height) + 0.5]
+        )
+        self.natural: np.ndarray = self.main + [MAIN_SIZE + RAMP_LENGTH + 10, 0]
+        self.enemy_main: np.ndarray = self._rotated(self.main)
+        self.enemy_natural: np.ndarray = self._rotated(self.natural)
+        self.pathing, self.placement, self.terrain = self._terrain()
+        ys, xs = np.mgrid[0 : self.height, 0 : self.width] + 0.5
+        self._main_distance: np.ndarray = np.hypot(xs - self.main[0], ys - self.main[1])
+        self._resources: list[raw_pb2.Unit] = self._resource_units()
+
+    def _rotated(self, point: np.ndarray) -> np.ndarray:
+        return np.array([self.width, self.height]) - point
+
+    def _terrain(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Pathing, placement and height grids, player 1's side is laid out
+        and rotated onto player 2's."""
+        pathing: np.ndarray = np.ones((self.height, self.width), dtype=np.uint8)
+        placement: np.ndarray = np.ones_like(pathing)
+        terrain: np.ndarray = np.full_like(pathing, LOW_GROUND)
+        x0, y0 = int(self.main[0]), int(self.main[1])
+        size: int = MAIN_SIZE
+        plateau = np.s_[y0 - size : y0 + size + 1, x0 - size : x0 + size + 1]
+        inside = np.s_[y0 - size + 1 : y0 + size, x0 - size + 1 : x0 + size]
+        terrain[plateau] = HIGH_GROUND
+        # cliffs all around the plateau
+        pathing[plateau] = 0
+        pathing[inside] = 1
+        # a two tile wide ramp down towards the natural
+        for step in range(RAMP_LENGTH):
+            ramp = np.s_[y0 - 1 : y0 + 1, x0 + MAIN_SIZE + step]
+            pathing[ramp] = 1
+            terrain[ramp] = HIGH_GROUND - (step + 1) * (HIGH_GROUND - LOW_GROUND) // (
+                RAMP_LENGTH + 1
+            )
+        placement &= pathing
+        for step in range(RAMP_LENGTH):
+            placement[y0 - 1 : y0 + 1, x0 + MAIN_SIZE + step] = 0
+        pathing &= pathing[::-1, ::-1].copy()
+        placement &= placement[::-1, ::-1].copy()
+        terrain = np.maximum(terrain, terrain[::-1, ::-1])
+        for grid in (pathing, placement):
+            grid[[0, -1], :] = 0
+            grid[:, [0, -1]] = 0
+        return pathing, placement, terrain
+
+    def _resource_units(self) -> list[raw_pb2.Unit]:
+        """Eight mineral fields and two geysers at every base, minerals
+        behind the main and below the natural."""
+        units: list[raw_pb2.Unit] = []
+        bases: list[tuple[np.ndarray, np.ndarray]] = [
+            (self.main, np.array([-1, 0])),
+            (self.natural, np.array([0, -1])),
+            (self.enemy_main, np.array([1, 0])),
+            (self.enemy_natural, np.array([0, 1])),
+        ]
+        for base, away in bases:
+            across: np.ndarray = away[::-1]
+            for i in range(8):
+                units.append(
+                    self._unit(
+                        UnitTypeId.MINERALFIELD,
+                        len(units),
+                        raw_pb2.Neutral,
+                        base + away * 7 + across * (i - 3.5),
+                        mineral_contents=1800 if i % 2 else 900,
+                    )
+                )
+            for side in (-1, 1):
+                units.append(
+                    self._unit(
+                        UnitTypeId.VESPENEGEYSER,
+                        len(units),
+                        raw_pb2.Neutral,
+                        base + away * 3 + across * 7 * side,
+                        vespene_contents=2250,
+                    )
+                )
+        return units
+
+    def _unit(
+        self,
+        unit_type: UnitTypeId,
+        index: int,
+        alliance: int,
+        position: np.ndarray,
+        **fields,
+    ) -> raw_pb2.Unit:
+        owner: int = {raw_pb2.Self: 1, raw_pb2.Enemy: 2}.get(alliance, 16)
+        x, y = float(position[0]), float(position[1])
+        height: float = -16 + 32 * int(self.terrain[int(y), int(x)]) / 255
+        return raw_pb2.Unit(
+            display_type=raw_pb2.Visible,
+            alliance=alliance,
+            # stable per game, unique across types
+            tag=(owner << 32) + (unit_type.value << 16) + index,
+            unit_type=unit_type.value,
+            owner=owner,
+            pos=common_pb2.Point(x=x, y=y, z=height),
+            radius=RADIUS.get(unit_type, 0.5),
+            build_progress=1.0,
+            **fields,
+        )
+
+    def reset(self, race: int) -> None:
+        """Start a new game for a player that asked for `race`."""
+        self.loop = 0
+        self.actions = 0
+        self.minerals = 50.0
+        self.race = race if race != Race.Random.value else ZERG
+
+    @property
+    def finished(self) -> bool:
+        return self.loop >= self.game_loops
+
+    @property
+    def drones(self) -> int:
+        return min(12 + self.loop // DRONE_LOOPS, MAX_DRONES)
+
+    def step(self, count: int) -> None:
+        count = min(count, max(self.game_loops - self.loop, 0))
+        self.minerals += count * self.drones * MINERALS_PER_DRONE_LOOP
+        self.loop += count
+
+    def data(self) -> sc_pb.ResponseData:
+        return game_data()
+
+    def game_info(self) -> sc_pb.ResponseGameInfo:
+        width, height = self.width, self.height
+        return sc_pb.ResponseGameInfo(
+            map_name="Stand-in",
+            local_map_path="StandIn.SC2Map",
+            player_info=[
+                sc_pb.PlayerInfo(
+                    player_id=1, type=sc_pb.Participant, race_requested=self.race
+                ),
+                sc_pb.PlayerInfo(
+                    player_id=2, type=sc_pb.Participant, race_requested=ZERG
+                ),
+            ],
+            start_raw=raw_pb2.StartRaw(
+                map_size=common_pb2.Size2DI(x=width, y=height),
+                pathing_grid=_image(self.pathing, 1),
+                placement_grid=_image(self.placement, 1),
+                terrain_height=_image(self.terrain, 8),
+                playable_area=common_pb2.RectangleI(
+                    p0=common_pb2.PointI(x=1, y=1),
+                    p1=common_pb2.PointI(x=width - 1, y=height - 1),
+                ),
+                start_locations=[
+                    common_pb2.Point2D(
+                        x=float(self.enemy_main[0]), y=float(self.enemy_main[1])
+                    )
+                ],
+            ),
+            options=sc_pb.InterfaceOptions(raw=True, score=True),
+        )
+
+    def _own_units(self) -> list[raw_pb2.Unit]:
+        units: list[raw_pb2.Unit] = [
+            self._unit(
+                UnitTypeId.HATCHERY,
+                0,
+                raw_pb2.Self,
+                self.main,
+                health=1500,
+                health_max=1500,
+                assigned_harvesters=min(self.drones, 16),
+                ideal_harvesters=16,
+            )
+        ]
+        # drones walk between the hatchery and their mineral field
+        for i in range(self.drones):
+            field: raw_pb2.Unit = self._resources[i % 8]
+            phase: float = abs((self.loop / 80 + i / 7) % 2 - 1)
+            position: np.ndarray = self.main + (
+                np.array([field.pos.x, field.pos.y]) - self.main
+            ) * (0.3 + 0.6 * phase)
+            units.append(
+                self._unit(
+                    UnitTypeId.DRONE,
+                    i,
+                    raw_pb2.Self,
+                    position,
+                    health=40,
+                    health_max=40,
+                )
+            )
+        for i in range(3):
+            units.append(
+                self._unit(
+                    UnitTypeId.LARVA,
+                    i,
+                    raw_pb2.Self,
+                    self.main + [i - 1, -2.5],
+                    health=25,
+                    health_max=25,
+                )
+            )
+        for i in range(1 + self.drones // 8):
+            units.append(
+                self._unit(
+                    UnitTypeId.OVERLORD,
+                    i,
+                    raw_pb2.Self,
+                    self.main + [3 * i - 4, 5],
+                    health=200,
+                    health_max=200,
+                    is_flying=True,
+                )
+            )
+        return units
+
+    def _scout(self) -> Optional[raw_pb2.Unit]:
+        """An enemy zergling walking from its natural to our main, seen
+        while close to it."""
+        progress: float = (self.loop % SCOUT_LOOPS) / SCOUT_LOOPS
+        position: np.ndarray = (
+            self.enemy_natural + (self.main - self.enemy_natural) * progress
+        )
+        if np.hypot(*(position - self.main)) > 2 * SIGHT_RANGE:
+            return None
+        return self._unit(
+            UnitTypeId.ZERGLING,
+            self.loop // SCOUT_LOOPS,
+            raw_pb2.Enemy,
+            position,
+            health=35,
+            health_max=35,
+        )
+
+    def observation(self) -> sc_pb.ResponseObservation:
+        drones: int = self.drones
+        overlords: int = 1 + drones // 8
+        units: list[raw_pb2.Unit] = self._resources + self._own_units()
+        scout: Optional[raw_pb2.Unit] = self._scout()
+        if scout is not None:
+            units.append(scout)
+        visibility: np.ndarray = np.where(
+            self._main_distance < SIGHT_RANGE + 2 * MAIN_SIZE, 2, 1
+        ).astype(np.uint8)
+        creep: np.ndarray = (
+            self._main_distance < min(10 + self.loop / 448, 2 * MAIN_SIZE)
+        ).astype(np.uint8)
+        response = sc_pb.ResponseObservation(
+            observation=sc_pb.Observation(
+                game_loop=self.loop,
+                player_common=sc_pb.PlayerCommon(
+                    player_id=1,
+                    minerals=int(self.minerals),
+                    food_cap=min(6 + 8 * overlords, 200),
+                    food_used=drones,
+                    food_workers=drones,
+                    larva_count=3,
+                ),
+                raw_data=raw_pb2.ObservationRaw(
+                    player=raw_pb2.PlayerRaw(
+                        camera=common_pb2.Point(
+                            x=float(self.main[0]), y=float(self.main[1])
+                        )
+                    ),
+                    units=units,
+                    map_state=raw_pb2.MapState(
+                        visibility=_image(visibility, 8), creep=_image(creep, 1)
+                    ),
+                ),
+                score=score_pb2.Score(
+                    score_type=score_pb2.Score.Melee, score=self.loop
+                ),
+            )
+        )
+        if self.finished:
+            response.player_result.add(player_id=1, result=sc_pb.Victory)
+            response.player_result.add(player_id=2, result=sc_pb.Defeat)
+        return response
+
+
+@dataclass
+class Recording:
+    player_id: int
+    # serialized ResponseData and ResponseGameInfo
+    data: bytes
+    game_info: bytes
+    # game loop and serialized ResponseObservation of every recorded step,
+    # the last one has the player results
+    loops: list[int]
+    observations: list[bytes]
+
+
+def record(game: ScriptedGame, race: int = ZERG, game_step: int = 2) -> Recording:
+    """Play `game` to the end, every `game_step` loops, and keep what it served."""
+    game.reset(race)
+    loops: list[int] = []
+    observations: list[bytes] = []
+    while True:
+        loops.append(game.loop)
+        observations.append(game.observation().SerializeToString())
+        if game.finished:
+            break
+        game.step(game_step)
+    return Recording(
+        player_id=game.player_id,
+        data=game.data().SerializeToString(),
+        game_info=game.game_info().SerializeToString(),
+        loops=loops,
+        observations=observations,
+    )
+
+
+def write_recording(file_path: str, recording: Recording) -> str:
+    """Compress `recording` to `file_path`, parent directories are created."""
+    directory: str = path.dirname(file_path)
+    if directory:
+        makedirs(directory, exist_ok=True)
+    with gzip.open(file_path, "wb", compresslevel=6) as f:
+        pickle.dump(recording, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return file_path
+
+
+def read_recording(file_path: str) -> Recording:
+    with gzip.open(file_path, "rb") as f:
+        return pickle.load(f)
+
+
+class RecordedGame:
+    def __init__(self, recording: Recording):
+        """A `StandInServer` game playing back `recording`. Steps move
+        through the recorded loops, each observation is the latest one
+        recorded at or before the current loop, reporting that loop, and
+        the game ends with the last one. The server sends the recorded
+        bytes as they are, see `serialized_observation`."""
+        self.recording: Recording = recording
+        self.player_id: int = recording.player_id
+        self.loop: int = recording.loops[0]
+        self.actions: int = 0
+        self._data = sc_pb.ResponseData()
+        self._data.ParseFromString(recording.data)
+        self._game_info = sc_pb.ResponseGameInfo()
+        self._game_info.ParseFromString(recording.game_info)
+        # index and parsed form of the last observation served
+        self._index: int = -1
+        self._observation = sc_pb.ResponseObservation()
+
+    @property
+    def finished(self) -> bool:
+        return self.loop >= self.recording.loops[-1]
+
+    def reset(self, race: int) -> None:
+        self.loop = self.recording.loops[0]
+        self.actions = 0
+
+    def step(self, count: int) -> None:
+        self.loop = min(self.loop + count, self.recording.loops[-1])
+
+    def data(self) -> sc_pb.ResponseData:
+        return self._data
+
+    def game_info(self) -> sc_pb.ResponseGameInfo:
+        return self._game_info
+
+    def observation(self) -> sc_pb.ResponseObservation:
+        index: int = bisect_right(self.recording.loops, self.loop) - 1
+        if index != self._index:
+            self._index = index
+            self._observation.ParseFromString(self.recording.observations[index])
+        self._observation.observation.game_loop = self.loop
+        return self._observation
+
+    def serialized_observation(self) -> bytes:
+        """`observation`, serialized without parsing the recording. A
+        message that is parsed merges every occurrence of it, so the
+        current loop is appended as a second observation."""
+        index: int = bisect_right(self.recording.loops, self.loop) - 1
+        game_loop = sc_pb.ResponseObservation(
+            observation=sc_pb.Observation(game_loop=self.loop)
+        )
+        return self.recording.observations[index] + game_loop.SerializeToString()
+
+
+def _milliseconds(seconds: list[float]) -> str:
+    """Median, p95 and max of `seconds`, in milliseconds."""
+    ordered: list[float] = sorted(seconds)
+    p95: float = ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)]
+    return (
+        f"median {statistics.median(ordered) * 1000:7.3f} ms, "
+        f"p95 {p95 * 1000:7.3f} ms, "
+        f"max {ordered[-1] * 1000:7.3f} ms"
+    )
+
+
+class StandInServer:
+    def __init__(self, game: ScriptedGame, host: str = "127.0.0.1", port: int = 0):
+        """Serve `game`, nothing listens until `start`.
+
+        Parameters
+        ----------
+        game :
+            Game every `join_game` resets and plays, a `ScriptedGame`, a
+            `RecordedGame` or anything with their `player_id`, `loop`,
+            `actions`, `finished`, `reset`, `step`, `data`, `game_info` and
+            `observation`.
+        host :
+            Address to listen on.
+        port :
+            Port to listen on, any free one if 0.
+        """
+        self.game: ScriptedGame = game
+        self.host: str = host
+        self.port: int = port
+        self.status: int = sc_pb.launched
+        # requests answered, their size and seconds spent answering, by kind
+        self.requests: Counter[str] = Counter()
+        self.bytes_in: Counter[str] = Counter()
+        self.bytes_out: Counter[str] = Counter()
+        self.latency: defaultdict[str, list[float]] = defaultdict(list)
+        # seconds from each response to the client's next request in a game
+        self.client_time: list[float] = []
+        self._answered: Optional[float] = None
+        # serialized fields the handler left to append to the response
+        self._appended: bytes = b""
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> int:
+        """Start listening, returns the port."""
+        app = web.Application()
+        app.router.add_get("/sc2api", self._serve)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self.port
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _serve(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        async for message in ws:
+            if message.type != WSMsgType.BINARY:
+                continue
+            await ws.send_bytes(self.respond(message.data))
+            if self.status == sc_pb.quit:
+                await ws.close()
+        return ws
+
+    def respond(self, data: bytes) -> bytes:
+        """Serialized response to a serialized `Request`."""
+        received: float = perf_counter()
+        request = sc_pb.Request()
+        request.ParseFromString(data)
+        kind: Optional[str] = request.WhichOneof("request")
+        if self._answered is not None and kind != "join_game":
+            self.client_time.append(received - self._answered)
+        response = sc_pb.Response(id=request.id)
+        handler = getattr(self, f"_{kind}", None)
+        if handler is not None:
+            handler(getattr(request, kind), response)
+        elif kind is not None:
+            getattr(response, kind).SetInParent()
+        response.status = self.status
+        answer: bytes = response.SerializeToString() + self._appended
+        self._appended = b""
+        self._answered = perf_counter()
+        self.requests[kind] += 1
+        self.bytes_in[kind] += len(data)
+        self.bytes_out[kind] += len(answer)
+        self.latency[kind].append(self._answered - received)
+        return answer
+
+    def latency_report(self) -> list[str]:
+        """One line per request kind on the time spent answering it and the
+        bytes exchanged, and one on the client's time between requests."""
+        lines: list[str] = [
+            f"{kind:>12} {self.requests[kind]:>7} requests, "
+            f"{self.bytes_in[kind] / 2**10:>9.1f} KiB in, "
+            f"{self.bytes_out[kind] / 2**10:>9.1f} KiB out, {_milliseconds(seconds)}"
+            for kind, seconds in sorted(
+                self.latency.items(), key=lambda item: -sum(item[1])
+            )
+        ]
+        if self.client_time:
+            lines.append(
+                f"{'client':>12} {len(self.client_time):>7} gaps between "
+                f"requests, {_milliseconds(self.client_time)}"
+            )
+        return lines
+
+    def _ping(self, request: sc_pb.RequestPing, response: sc_pb.Response) -> None:
+        response.ping.game_version = GAME_VERSION
+        response.ping.data_build = BASE_BUILD
+        response.ping.base_build = BASE_BUILD
+
+    def _join_game(
+        self, request: sc_pb.RequestJoinGame, response: sc_pb.Response
+    ) -> None:
+        self.game.reset(request.race)
+        self.status = sc_pb.in_game
+        response.join_game.player_id = self.game.player_id
+
+    def _leave_game(
+        self, request: sc_pb.RequestLeaveGame, response: sc_pb.Response
+    ) -> None:
+        self.status = sc_pb.launched
+        response.leave_game.SetInParent()
+
+    def _quit(self, request: sc_pb.RequestQuit, response: sc_pb.Response) -> None:
+        self.status = sc_pb.quit
+        response.quit.SetInParent()
+
+    def _data(self, request: sc_pb.RequestData, response: sc_pb.Response) -> None:
+        response.data.CopyFrom(self.game.data())
+
+    def _game_info(
+        self, request: sc_pb.RequestGameInfo, response: sc_pb.Response
+    ) -> None:
+        response.game_info.CopyFrom(self.game.game_info())
+
+    def _observation(
+        self, request: sc_pb.RequestObservation, response: sc_pb.Response
+    ) -> None:
+        # realtime clients wait for a loop instead of stepping
+        if request.game_loop > self.game.loop:
+            self.game.step(request.game_loop - self.game.loop)
+        serialized = getattr(self.game, "serialized_observation", None)
+        if serialized is not None:
+            self._appended = _message_field(OBSERVATION_FIELD, serialized())
+        else:
+            response.observation.CopyFrom(self.game.observation())
+        if self.game.finished:
+            self.status = sc_pb.ended
+
+    def _step(self, request: sc_pb.RequestStep, response: sc_pb.Response) -> None:
+        self.game.step(request.count or 1)
+        response.step.simulation_loop = self.game.loop
+
+    def _action(self, request: sc_pb.RequestAction, response: sc_pb.Response) -> None:
+        self.game.actions += len(request.actions)
+        response.action.result.extend([error_pb2.Success] * len(request.actions))
+
+    def _query(self, request: query_pb2.RequestQuery, response: sc_pb.Response) -> None:
+        # straight line distances, every placement allowed
+        for pathing in request.pathing:
+            start = pathing.start_pos if pathing.HasField("start_pos") else None
+            end = pathing.end_pos
+            response.query.pathing.add(
+                distance=float(np.hypot(end.x - start.x, end.y - start.y))
+                if start is not None
+                else 0.0
+            )
+        for _ in request.placements:
+            response.query.placements.add(result=error_pb2.Success)
+        for abilities in request.abilities:
+            response.query.abilities.add(unit_tag=abilities.unit_tag)
+
+
+class LocalClient(Client):
+    def __init__(self, server: StandInServer):
+        """Client whose requests `server` answers in process. Requests and
+        responses are still serialized, only the socket is left out."""
+        # the protocol only needs something to hold on to as its socket
+        super().__init__(server)
+        self._server: StandInServer = server
+
+    async def _execute(self, **kwargs):
+        assert len(kwargs) == 1, "Only one request allowed by the API"
+        response = sc_pb.Response()
+        response.ParseFromString(
+            self._server.respond(sc_pb.Request(**kwargs).SerializeToString())
+        )
+        self._status = Status(response.status)
+        if response.error:
+            raise ProtocolError(f"{response.error}")
+        return response
@@ -0,0 +1,190 @@
+"""
+Live counters, gauges and a step time histogram for a running game.
+
+`on_step` only writes into preallocated lists owned by the main thread, a
+background thread copies them at most once per `interval` seconds and
+publishes them in the Prometheus text format, either to a file that is
+replaced atomically or to every client connecting to a Unix socket.
+`scripts/telemetry_view.py` reads either and draws live graphs.
+"""
+import os
+import socket
+import threading
+from enum import IntEnum
+from os import makedirs, path
+from time import monotonic
+from typing import Optional
+
+from loguru import logger
+
+METRIC_PREFIX: str = "juggerbot"
+SOCKET_PREFIX: str = "unix:"
+# upper bounds of the step time histogram buckets, in milliseconds
+STEP_TIME_BUCKETS: tuple[float, ...] = (1, 2, 5, 10, 20, 45, 90, float("inf"))
+
+
+class Counter(IntEnum):
+    STEPS = 0
+    ACTIONS = 1
+
+
+class Gauge(IntEnum):
+    GAME_LOOP = 0
+    STEP_TIME_MS = 1
+    MINERALS = 2
+    VESPENE = 3
+    SUPPLY_USED = 4
+    OWN_UNITS = 5
+    ENEMY_UNITS = 6
+
+
+def _format_labels(labels: dict[str, str], **extra: str) -> str:
+    merged: dict[str, str] = {**labels, **extra}
+    if not merged:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in merged.items()) + "}"
+
+
+class TelemetryExporter:
+    def __init__(self, interval: float = 1.0):
+        """Allocate the metrics, nothing is published until `start` is called.
+
+        Parameters
+        ----------
+        interval :
+            Minimum seconds between two publishes.
+        """
+        self.interval: float = interval
+        self.enabled: bool = False
+        self.counters: list[float] = [0.0] * len(Counter)
+        self.gauges: list[float] = [0.0] * len(Gauge)
+        self.step_time_buckets: list[int] = [0] * len(STEP_TIME_BUCKETS)
+        self.step_time_sum: float = 0.0
+        self._labels: dict[str, str] = {}
+        self._target: str = ""
+        self._stop: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, target: str, labels: Optional[dict[str, str]] = None) -> None:
+        """Start publishing on a background thread.
+
+        Parameters
+        ----------
+        target :
+            File to write, or "unix:<path>" to serve on a Unix socket.
+        labels :
+            Labels added to every metric, eg. the opponent id.
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        self._target = target
+        self._labels = labels or {}
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Publish one last time and stop the background thread."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2 * self.interval)
+
+    def inc(self, counter: Counter, amount: float = 1.0) -> None:
+        self.counters[counter] += amount
+
+    def set(self, gauge: Gauge, value: float) -> None:
+        self.gauges[gauge] = value
+
+    def observe_step(self, step_time_ms: float) -> None:
+        """Count a finished step in the step time histogram."""
+        self.counters[Counter.STEPS] += 1
+        self.gauges[Gauge.STEP_TIME_MS] = step_time_ms
+        self.step_time_sum += step_time_ms
+        for i, upper in enumerate(STEP_TIME_BUCKETS):
+            if step_time_ms <= upper:
+                self.step_time_buckets[i] += 1
+                break
+
+    def render(self) -> str:
+        """Current values in the Prometheus text format."""
+        # copies, so a step writing meanwhile can't change what is rendered
+        counters: list[float] = list(self.counters)
+        gauges: list[float] = list(self.gauges)
+        buckets: list[int] = list(self.step_time_buckets)
+        step_time_sum: float = self.step_time_sum
+
+        labels: str = _format_labels(self._labels)
+        lines: list[str] = []
+        for counter in Counter:
+            name: str = f"{METRIC_PREFIX}_{counter.name.lower()}_total"
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{labels} {counters[counter]:g}")
+        for gauge in Gauge:
+            name = f"{METRIC_PREFIX}_{gauge.name.lower()}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{labels} {gauges[gauge]:g}")
+
+        name = f"{METRIC_PREFIX}_step_time_ms"
+        lines.append(f"# TYPE {name} histogram")
+        cumulative: int = 0
+        for upper, count in zip(STEP_TIME_BUCKETS, buckets):
+            cumulative += count
+            le: str = "+Inf" if upper == float("inf") else f"{upper:g}"
+            lines.append(
+                f"{name}_bucket{_format_labels(self._labels, le=le)} {cumulative}"
+            )
+        lines.append(f"{name}_sum{labels} {step_time_sum:g}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def _write_file(self, file_path: str) -> None:
+        temp_path: str = f"{file_path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(self.render())
+        os.replace(temp_path, file_path)
+
+    def _run(self) -> None:
+        try:
+            if self._target.startswith(SOCKET_PREFIX):
+                self._serve(self._target[len(SOCKET_PREFIX) :])
+            else:
+                makedirs(path.dirname(self._target) or ".", exist_ok=True)
+                while not self._stop.wait(self.interval):
+                    self._write_file(self._target)
+                self._write_file(self._target)
+        except OSError as e:
+            logger.warning(f"Telemetry stopped publishing to {self._target}: {e}")
+
+    def _serve(self, socket_path: str) -> None:
+        """Send the latest metrics to every client, rendered at most once per
+        interval however often clients connect."""
+        if path.exists(socket_path):
+            os.remove(socket_path)
+        server: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(socket_path)
+            server.listen()
+            server.settimeout(self.interval)
+            text: bytes = self.render().encode()
+            rendered_at: float = monotonic()
+            while not self._stop.is_set():
+                try:
+                    client, _ = server.accept()
+                except socket.timeout:
+                    continue
+                if monotonic() - rendered_at >= self.interval:
+                    text = self.render().encode()
+                    rendered_at = monotonic()
+                with client:
+                    try:
+                        client.sendall(text)
+                    except OSError:
+                        pass
+        finally:
+            server.close()
+            if path.exists(socket_path):
+                os.remove(socket_path)
@@ -0,0 +1,202 @@
+"""
+Per-frame structure-of-arrays view of own and enemy units.
+
+Built once per step straight from the unit protos, so logic that runs over
+many units can use numpy masks and reductions instead of reading `Unit`
+properties one unit at a time. Row `i` of every column belongs to
+`units[i]`, which is kept so commands can still be issued per unit.
+"""
+from typing import Iterable, Optional
+
+import numpy as np
+from ares.consts import UnitRole
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+from sc2.unit import Unit
+
+# bits of `UnitColumns.flags`
+IDLE: int = 1
+FLYING: int = 2
+STRUCTURE: int = 4
+READY: int = 8
+BURROWED: int = 16
+
+NO_ROLE: int = -1
+# ares roles are string enums, the roles column stores their index here
+ROLE_INDEX: dict[UnitRole, int] = {role: i for i, role in enumerate(UnitRole)}
+NO_ORDER: int = 0
+
+
+def _order_key(order) -> int:
+    """One number per distinct (ability, target), to compare orders between frames."""
+    target = order.target_world_space_pos
+    return hash(
+        (
+            order.ability_id,
+            order.target_unit_tag,
+            round(target.x, 1),
+            round(target.y, 1),
+        )
+    )
+
+
+class UnitColumns:
+    def __init__(self, units: list[Unit], role_of: Optional[dict[int, int]] = None):
+        """Read every column out of `units`.
+
+        Parameters
+        ----------
+        units :
+            Units to store, row order follows this list.
+        role_of :
+            Tag to `ROLE_INDEX` of its role, if roles should be stored.
+        """
+        n: int = len(units)
+        protos: list = [u._proto for u in units]
+        self.units: list[Unit] = units
+        self.tags: np.ndarray = np.fromiter(
+            (p.tag for p in protos), dtype=np.uint64, count=n
+        )
+        self.type_ids: np.ndarray = np.fromiter(
+            (p.unit_type for p in protos), dtype=np.int32, count=n
+        )
+        self.x: np.ndarray = np.fromiter(
+            (p.pos.x for p in protos), dtype=np.float64, count=n
+        )
+        self.y: np.ndarray = np.fromiter(
+            (p.pos.y for p in protos), dtype=np.float64, count=n
+        )
+        self.health: np.ndarray = np.fromiter(
+            (u.health_percentage for u in units), dtype=np.float64, count=n
+        )
+        self.hit_points: np.ndarray = np.fromiter(
+            (p.health + p.shield for p in protos), dtype=np.float64, count=n
+        )
+        self.energy: np.ndarray = np.fromiter(
+            (p.energy for p in protos), dtype=np.float64, count=n
+        )
+        self.weapon_cooldown: np.ndarray = np.fromiter(
+            (p.weapon_cooldown for p in protos), dtype=np.float64, count=n
+        )
+        self.flags: np.ndarray = np.fromiter(
+            (
+                (IDLE if not p.orders else 0)
+                | (FLYING if p.is_flying else 0)
+                | (STRUCTURE if u.is_structure else 0)
+                | (READY if p.build_progress == 1 else 0)
+                | (BURROWED if p.is_burrowed else 0)
+                for u, p in zip(units, protos)
+            ),
+            dtype=np.uint8,
+            count=n,
+        )
+        # first order of every unit, NO_ORDER when idle
+        self.order_keys: np.ndarray = np.fromiter(
+            (_order_key(p.orders[0]) if p.orders else NO_ORDER for p in protos),
+            dtype=np.int64,
+            count=n,
+        )
+        self.roles: np.ndarray = np.fromiter(
+            (role_of.get(p.tag, NO_ROLE) for p in protos)
+            if role_of
+            else (NO_ROLE for _ in protos),
+            dtype=np.int16,
+            count=n,
+        )
+        self.row_of: dict[int, int] = {int(tag): i for i, tag in enumerate(self.tags)}
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+    @property
+    def positions(self) -> np.ndarray:
+        """(n, 2) array of unit positions."""
+        return np.column_stack((self.x, self.y))
+
+    def has_flag(self, flag: int) -> np.ndarray:
+        return (self.flags & flag) != 0
+
+    def of_type(self, type_ids: Iterable[UnitTypeId]) -> np.ndarray:
+        """Mask of rows whose type is in `type_ids`."""
+        return np.isin(
+            self.type_ids, np.fromiter((t.value for t in type_ids), dtype=np.int32)
+        )
+
+    def within(self, position: Point2, distance: float) -> np.ndarray:
+        """Mask of rows closer than `distance` to `position`."""
+        dx: np.ndarray = self.x - position[0]
+        dy: np.ndarray = self.y - position[1]
+        return dx * dx + dy * dy < distance * distance
+
+    def with_role(self, role: UnitRole) -> np.ndarray:
+        return self.roles == ROLE_INDEX[role]
+
+    def rows(self, mask: np.ndarray) -> list[Unit]:
+        """`Unit` objects for every row set in `mask`."""
+        return [self.units[i] for i in np.flatnonzero(mask)]
+
+
+class UnitSnapshot:
+    def __init__(
+        self,
+        own_units: list[Unit],
+        enemy_units: list[Unit],
+        role_dict: dict[UnitRole, set[int]],
+    ):
+        """Build the columns for this frame.
+
+        Parameters
+        ----------
+        own_units :
+            All own units and structures.
+        enemy_units :
+            Visible enemy units and structures.
+        role_dict :
+            The mediator's role to tags dictionary.
+        """
+        role_of: dict[int, int] = {
+            tag: ROLE_INDEX[role] for role, tags in role_dict.items() for tag in tags
+        }
+        self.own: UnitColumns = UnitColumns(own_units, role_of)
+        self.enemy: UnitColumns = UnitColumns(enemy_units)
+
+
+def distance_matrix(
+    from_x: np.ndarray, from_y: np.ndarray, to_x: np.ndarray, to_y: np.ndarray
+) -> np.ndarray:
+    """(len(from), len(to)) array of euclidean distances."""
+    return np.hypot(from_x[:, None] - to_x[None, :], from_y[:, None] - to_y[None, :])
+
+
+def nearest(
+    from_x: np.ndarray, from_y: np.ndarray, to_x: np.ndarray, to_y: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """For every `from` point, the index of and distance to the closest `to` point.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray] :
+        Index into `to` and the distance, both of length len(from).
+        `to` must not be empty.
+    """
+    distances: np.ndarray = distance_matrix(from_x, from_y, to_x, to_y)
+    index: np.ndarray = distances.argmin(axis=1)
+    return index, distances[np.arange(len(from_x)), index]
+
+
+def towards(
+    x: np.ndarray,
+    y: np.ndarray,
+    target_x: np.ndarray,
+    target_y: np.ndarray,
+    distance: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized `Point2.towards`, negative `distance` moves away."""
+    dx: np.ndarray = target_x - x
+    dy: np.ndarray = target_y - y
+    length: np.ndarray = np.hypot(dx, dy)
+    # points already on the target stay where they are, as with `Point2.towards`
+    scale: np.ndarray = np.divide(
+        distance, length, out=np.zeros_like(length), where=length > 0
+    )
+    return x + dx * scale, y + dy * scale
@@ -6,12 +6,43 @@
 import argparse
 import asyncio
 import logging
+from contextlib import nullcontext
+from time import perf_counter
 
 import aiohttp
 import sc2
 from sc2.client import Client
+from sc2.game_data import GameData
+from sc2.portconfig import Portconfig
 from sc2.protocol import ConnectionAlreadyClosed
 
+from bot.consts import LAZY_OBSERVATIONS
+from bot.lazy_observation import lazy_decoding
+
+
+class RealtimeClient(Client):
+    """Client that records when each observation arrived, and doesn't wait
+    for more game loops once it has fallen behind in a realtime game."""
+
+    def __init__(self, ws, save_replay_path: str = None):
+        super().__init__(ws, save_replay_path)
+        # perf_counter() when the latest observation arrived
+        self.observation_received: float | None = None
+        self._last_loop: int = -1
+        self._late: bool = False
+
+    async def observation(self, game_loop: int = None):
+        # After a late observation python-sc2 asks for one loop past it,
+        # collapse that wait and take the current state straight away
+        if game_loop is not None and self._late and game_loop == self._last_loop + 1:
+            game_loop = None
+        result = await super().observation(game_loop)
+        loop: int = result.observation.observation.game_loop
+        self._late = game_loop is not None and loop > game_loop
+        self._last_loop = loop
+        self.observation_received = perf_counter()
+        return result
+
 
 def run_ladder_game(bot):
     # Load command line arguments
@@ -41,21 +72,14 @@ def run_ladder_game(bot):
     # Add opponent_id to the bot class (accessed through self.opponent_id)
     bot.ai.opponent_id = args.OpponentId
 
-    # Port config
-    ports = [lan_port + p for p in range(1, 6)]
-
-    portconfig = sc2.portconfig.Portconfig()
-    portconfig.shared = ports[0]  # Not used
-    portconfig.server = [ports[1], ports[2]]
-    portconfig.players = [[ports[3], ports[4]]]
-
     # Join ladder game
     g = join_ladder_game(
         host=host,
         port=host_port,
         players=[bot],
         realtime=args.RealTime,
-        portconfig=portconfig,
+        portconfig=ladder_portconfig(lan_port),
+        lazy_decode=bot.ai.config.get(LAZY_OBSERVATIONS, False),
     )
 
     # Run it
@@ -63,6 +87,16 @@ def run_ladder_game(bot):
     return result, args.OpponentId
 
 
+def ladder_portconfig(start_port: int) -> Portconfig:
+    """The ports LadderManager hands out, the five after `start_port`."""
+    ports = [start_port + p for p in range(1, 6)]
+    portconfig = Portconfig(
+        server_ports=[ports[1], ports[2]], player_ports=[[ports[3], ports[4]]]
+    )
+    portconfig.shared = ports[0]  # Not used
+    return portconfig
+
+
 # Modified version of sc2.main._join_game to allow custom host and port,
 # and to not spawn an additional sc2process (thanks to alkurbatov for fix)
 async def join_ladder_game(
@@ -74,21 +108,33 @@ async def join_ladder_game(
     save_replay_as=None,
     step_time_limit=None,
     game_time_limit=None,
+    lazy_decode=False,
 ):
     ws_url = f"ws://{host}:{port}/sc2api"
-    ws_connection = await aiohttp.ClientSession().ws_connect(ws_url, timeout=120)
-
-    client = Client(ws_connection)
-    try:
-        result = await sc2.main._play_game(
-            players[0], client, realtime, portconfig, step_time_limit, game_time_limit
-        )
-        if save_replay_as is not None:
-            await client.save_replay(save_replay_as)
-    except ConnectionAlreadyClosed:
-        logging.error(f"Connection was closed before the game ended")
-        return None
-    finally:
-        await ws_connection.close()
+    # the session owns the connector and its sockets, close it with the game
+    async with aiohttp.ClientSession() as session:
+        ws_connection = await session.ws_connect(ws_url, timeout=120)
+
+        client = RealtimeClient(ws_connection) if realtime else Client(ws_connection)
+        try:
+            with lazy_decoding() if lazy_decode else nullcontext():
+                result = await sc2.main._play_game(
+                    players[0],
+                    client,
+                    realtime,
+                    portconfig,
+                    step_time_limit,
+                    game_time_limit,
+                )
+            if save_replay_as is not None:
+                await client.save_replay(save_replay_as)
+        except ConnectionAlreadyClosed:
+            logging.error(f"Connection was closed before the game ended")
+            return None
+        finally:
+            await ws_connection.close()
+            # python-sc2 caches costs per GameData instance, which would keep
+            # every game's data alive when games run in one process
+            GameData.calculate_ability_cost.cache_clear()
 
     return result
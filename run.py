@@ -1,11 +1,11 @@
+import platform
 import random
 import sys
 from os import path
 from pathlib import Path
-import platform
 from typing import List
-from loguru import logger
 
+from loguru import logger
 from sc2 import maps
 from sc2.data import AIBuild, Difficulty, Race
 from sc2.main import run_game
@@ -17,6 +17,8 @@ sys.path.append("ares-sc2")
 
 import yaml
 
+from bot.consts import LOG_LEVEL, LOG_PIPELINE, STARTUP_PROBE, STARTUP_PROBE_READY
+from bot.log_pipeline import LogPipeline
 from bot.main import MyBot
 from ladder import run_ladder_game
 
@@ -49,10 +51,11 @@ def main():
 
     __user_config_location__: str = path.abspath(".")
     user_config_path: str = path.join(__user_config_location__, CONFIG_FILE)
+    config: dict = {}
     # attempt to get race and bot name from config file if they exist
     if path.isfile(user_config_path):
         with open(user_config_path) as config_file:
-            config: dict = yaml.safe_load(config_file)
+            config = yaml.safe_load(config_file)
             if MY_BOT_NAME in config:
                 bot_name = config[MY_BOT_NAME]
             if MY_BOT_RACE in config:
@@ -60,6 +63,20 @@ def main():
 
     bot1 = Bot(race, MyBot(), bot_name)
 
+    if STARTUP_PROBE in sys.argv:
+        print(STARTUP_PROBE_READY, flush=True)
+        return
+
+    log_pipeline: LogPipeline = LogPipeline()
+    if config.get(LOG_PIPELINE, True):
+        log_pipeline.install(level=config.get(LOG_LEVEL, "DEBUG"))
+    try:
+        play(bot1)
+    finally:
+        log_pipeline.stop()
+
+
+def play(bot1: Bot) -> None:
     if "--LadderServer" in sys.argv:
         # Ladder game started by LadderManager
         print("Starting ladder game...")
@@ -99,7 +116,9 @@ def main():
             maps.get(random.choice(map_list)),
             [
                 bot1,
-                Computer(random_race, Difficulty.CheatInsane, ai_build=AIBuild.RandomBuild),
+                Computer(
+                    random_race, Difficulty.CheatInsane, ai_build=AIBuild.RandomBuild
+                ),
             ],
             realtime=False,
         )
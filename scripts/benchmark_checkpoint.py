@@ -0,0 +1,101 @@
+"""
+Run `on_step` over and over on a checkpointed frame and time it.
+
+Checkpoints are written to `data/checkpoints/` by games with
+`CheckpointLoops` or `CheckpointUnits` set in `config.yml`. A new bot is
+started on the checkpoint with `bot.checkpoint.restore`, then every step
+replays the same frame through python-sc2's step: the observation and game
+info requests, events, `on_step` and the actions, answered in process by a
+`StandInServer`. The first steps are warmup and not timed, they fill the
+bot's caches and wait for its background plans. Run from the project root.
+
+Usage:
+    python scripts/benchmark_checkpoint.py data/checkpoints/<opponent>-<loop>.ckpt
+    python scripts/benchmark_checkpoint.py <checkpoint> --steps 500 --lazy-decode
+    python scripts/benchmark_checkpoint.py <checkpoint> --profile step.prof
+"""
+import argparse
+import asyncio
+import cProfile
+import importlib
+import pstats
+import statistics
+import sys
+import time
+from contextlib import nullcontext
+from os import path
+from typing import Optional
+
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+from sc2.data import Result
+
+from bot.checkpoint import Checkpoint, load, restore, run_step
+from bot.lazy_observation import lazy_decoding
+
+# functions printed from the profile
+REPORTED_FUNCTIONS: int = 25
+# seconds to let background plans finish between warmup steps
+WARMUP_PAUSE: float = 0.05
+
+
+def bot_class(name: str) -> type:
+    """The class `module:Class` names."""
+    module, _, cls = name.partition(":")
+    return getattr(importlib.import_module(module), cls)
+
+
+async def benchmark(
+    args: argparse.Namespace, checkpoint: Checkpoint
+) -> tuple[list[float], Optional[cProfile.Profile]]:
+    """Milliseconds of every timed step, and the profile of them."""
+    bot = bot_class(args.bot)()
+    client = await restore(bot, checkpoint)
+    for iteration in range(args.warmup):
+        await run_step(bot, client, iteration)
+        await asyncio.sleep(WARMUP_PAUSE)
+    profile: Optional[cProfile.Profile] = cProfile.Profile() if args.profile else None
+    timings: list[float] = []
+    for iteration in range(args.warmup, args.warmup + args.steps):
+        started: float = time.perf_counter()
+        if profile:
+            profile.enable()
+        await run_step(bot, client, iteration)
+        if profile:
+            profile.disable()
+        timings.append((time.perf_counter() - started) * 1000)
+    # the replayed game never ends, but `on_end` shuts the bot down
+    await bot.on_end(Result.Tie)
+    return timings, profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("checkpoint")
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--bot", default="bot.main:MyBot", help="module:Class")
+    parser.add_argument(
+        "--lazy-decode", action="store_true", help="decode like `LazyObservations`"
+    )
+    parser.add_argument("--profile", help="also write a cProfile of the timed steps")
+    args = parser.parse_args()
+
+    checkpoint: Optional[Checkpoint] = load(args.checkpoint)
+    if checkpoint is None:
+        sys.exit(f"{args.checkpoint} is from another checkpoint version")
+    with lazy_decoding() if args.lazy_decode else nullcontext():
+        timings, profile = asyncio.run(benchmark(args, checkpoint))
+    timings.sort()
+    print(
+        f"game loop {checkpoint.game_loop}, {args.steps} steps: median "
+        f"{statistics.median(timings):.2f} ms, p95 "
+        f"{timings[int(0.95 * (len(timings) - 1))]:.2f} ms, max {timings[-1]:.2f} ms"
+    )
+    if profile:
+        profile.dump_stats(args.profile)
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(REPORTED_FUNCTIONS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Time `bot.fast_math` against the pure-Python `Units` / `Point2` methods.
+
+Every case mirrors a call site in `bot/main.py` with a typical unit count,
+runs once with `cython_extensions` and once with the fallback, checks both
+give the same answer and reports microseconds per call and the speedup.
+Units are built from raw protos on random positions, distances use the
+plain `math.hypot` calculation of python-sc2 (method 0). Run from the
+project root.
+
+Usage:
+    python scripts/benchmark_fast_math.py
+    python scripts/benchmark_fast_math.py --units 120 --repeat 7
+"""
+import argparse
+import random
+import statistics
+import sys
+import timeit
+from os import path
+from types import SimpleNamespace
+from typing import Callable
+
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+from s2clientprotocol import common_pb2, raw_pb2
+from sc2.bot_ai import BotAI
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.unit import Unit
+from sc2.units import Units
+
+from bot import fast_math
+
+MAP_SIZE: float = 150.0
+
+
+def make_units(
+    bot: BotAI, amount: int, type_id: UnitTypeId, rng: random.Random
+) -> Units:
+    units: list[Unit] = []
+    for _ in range(amount):
+        proto = raw_pb2.Unit(
+            tag=rng.getrandbits(62),
+            unit_type=type_id.value,
+            alliance=raw_pb2.Self,
+            pos=common_pb2.Point(
+                x=rng.uniform(0, MAP_SIZE), y=rng.uniform(0, MAP_SIZE)
+            ),
+        )
+        units.append(Unit(proto, bot))
+    return Units(units, bot)
+
+
+def cases(bot: BotAI, amount: int, rng: random.Random) -> dict[str, Callable]:
+    """Call site name to a function running it once."""
+    army: Units = make_units(bot, amount, UnitTypeId.HYDRALISK, rng)
+    enemies: Units = make_units(bot, amount, UnitTypeId.MARINE, rng)
+    workers: Units = make_units(bot, amount, UnitTypeId.DRONE, rng)
+    scout: Unit = make_units(bot, 1, UnitTypeId.OVERSEER, rng).first
+    drone: Unit = workers.first
+
+    def scout_threats():
+        nearby: Units = fast_math.closer_than(enemies, 15, scout)
+        return fast_math.closest_to(nearby, scout).tag if nearby else None
+
+    return {
+        "overseer/scout threats (closer_than + closest_to)": scout_threats,
+        "drone defence (closer_than 3)": lambda: len(
+            fast_math.closer_than(enemies, 3, drone)
+        ),
+        "gas saturation (closer_than 10)": lambda: len(
+            fast_math.closer_than(workers, 10, scout)
+        ),
+        "army centre (center)": lambda: tuple(
+            round(c, 6) for c in fast_math.center(army)
+        ),
+    }
+
+
+def time_case(function: Callable, repeat: int, number: int) -> float:
+    """Median microseconds per call."""
+    runs: list[float] = timeit.repeat(function, repeat=repeat, number=number)
+    return statistics.median(runs) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--units", type=int, default=60, help="units per group")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=2000, help="calls per repeat")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not fast_math.HAVE_CYTHON:
+        print("cython_extensions is not installed, nothing to compare against")
+        return
+
+    bot = BotAI()
+    bot._distances_override_functions(0)
+    # units only read the game loop from the state
+    bot.state = SimpleNamespace(game_loop=0)
+    benchmarks: dict[str, Callable] = cases(bot, args.units, random.Random(args.seed))
+
+    print(f"{'call site':<52} {'python us':>10} {'cython us':>10} {'speedup':>8}")
+    for name, function in benchmarks.items():
+        fast_math.HAVE_CYTHON = False
+        expected = function()
+        python_time: float = time_case(function, args.repeat, args.number)
+        fast_math.HAVE_CYTHON = True
+        if function() != expected:
+            print(f"{name}: results differ")
+        cython_time: float = time_case(function, args.repeat, args.number)
+        print(
+            f"{name:<52} {python_time:>10.2f} {cython_time:>10.2f} "
+            f"{python_time / cython_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Play games through the whole ladder path against a local stand-in for the
+SC2 client and report throughput and per-request latency.
+
+A `bot.stand_in_server.StandInServer` runs on a background thread with its
+own event loop. Each game then goes through `ladder.run_ladder_game` with
+the command line LadderManager passes, so argument parsing, the port
+config, `join_ladder_game` and python-sc2's game loop all run as on the
+ladder, over a real websocket. The server plays a `ScriptedGame`, or a
+recording made with `--record` and played back with `--recording`, which
+takes the scripted game's own cost out of the server's answers. Reported
+are game loops and steps per second of every game, and per request kind
+the count, bytes and time the server took to answer, plus the time the
+bot took between a response and its next request. Run from the project
+root.
+
+Usage:
+    python scripts/benchmark_ladder.py
+    python scripts/benchmark_ladder.py --games 3 --game-loops 6720 --realtime
+    python scripts/benchmark_ladder.py --record data/stand_in.rec
+    python scripts/benchmark_ladder.py --recording data/stand_in.rec
+"""
+import argparse
+import asyncio
+import importlib
+import sys
+import threading
+import time
+from os import path
+
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+from sc2.data import Race
+from sc2.player import Bot
+
+from bot.stand_in_server import (
+    RecordedGame,
+    ScriptedGame,
+    StandInServer,
+    read_recording,
+    record,
+    write_recording,
+)
+from ladder import run_ladder_game
+
+# port LadderManager would pass as --StartPort, nothing listens on them
+START_PORT: int = 5690
+OPPONENT_ID: str = "stand-in"
+
+
+def bot_class(name: str) -> type:
+    """The class `module:Class` names."""
+    module, _, cls = name.partition(":")
+    return getattr(importlib.import_module(module), cls)
+
+
+class ServerThread(threading.Thread):
+    def __init__(self, server: StandInServer):
+        """Runs `server` on its own event loop, `start` returns once it listens."""
+        super().__init__(name="stand-in-server", daemon=True)
+        self.server: StandInServer = server
+        self.loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        self._listening: threading.Event = threading.Event()
+
+    def start(self) -> None:
+        super().start()
+        self._listening.wait()
+
+    def run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.server.start())
+        self._listening.set()
+        self.loop.run_forever()
+        self.loop.run_until_complete(self.server.stop())
+        self.loop.close()
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--game-loops", type=int, default=6720)
+    parser.add_argument("--map-size", type=int, nargs=2, default=(96, 96))
+    parser.add_argument("--bot", default="bot.main:MyBot", help="module:Class")
+    parser.add_argument("--race", default="zerg")
+    parser.add_argument("--realtime", action="store_true")
+    parser.add_argument("--record", help="save the scripted game here and exit")
+    parser.add_argument("--recording", help="play back this recording")
+    parser.add_argument(
+        "--game-step", type=int, default=2, help="loops between recorded steps"
+    )
+    args = parser.parse_args()
+
+    if args.record:
+        recording = record(
+            ScriptedGame(args.game_loops, tuple(args.map_size)),
+            Race[args.race.title()].value,
+            args.game_step,
+        )
+        write_recording(args.record, recording)
+        print(f"{len(recording.loops)} steps recorded to {args.record}")
+        return
+    game = (
+        RecordedGame(read_recording(args.recording))
+        if args.recording
+        else ScriptedGame(args.game_loops, tuple(args.map_size))
+    )
+    server_thread = ServerThread(StandInServer(game))
+    server_thread.start()
+    server: StandInServer = server_thread.server
+    # what LadderManager starts the bot with
+    sys.argv = [
+        sys.argv[0],
+        "--GamePort",
+        str(server.port),
+        "--StartPort",
+        str(START_PORT),
+        "--LadderServer",
+        server.host,
+        "--OpponentId",
+        OPPONENT_ID,
+    ] + (["--RealTime"] if args.realtime else [])
+    bot_type: type = bot_class(args.bot)
+    try:
+        for number in range(args.games):
+            bot = Bot(Race[args.race.title()], bot_type(), "BenchmarkBot")
+            steps: int = server.requests["observation"]
+            started: float = time.perf_counter()
+            result, _ = run_ladder_game(bot)
+            elapsed: float = time.perf_counter() - started
+            steps = server.requests["observation"] - steps
+            print(
+                f"game {number + 1}: {getattr(result, 'name', result)} in "
+                f"{elapsed:.1f} s, {game.loop / elapsed:.0f} game loops/s, "
+                f"{steps / elapsed:.0f} steps/s, {game.actions} actions"
+            )
+    finally:
+        server_thread.stop()
+    print("\n".join(server.latency_report()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Time observation decoding per step, python-sc2's eager path against
+`bot.lazy_observation`.
+
+Each step of a synthetic game is serialized once: an observation with
+units, effects, a visibility grid that changes every step and a creep grid
+that changes every few steps, plus the `RequestGameInfo` response python-sc2
+fetches every step for its pathing grid. A step parses both responses,
+builds the game state and the pathing grid, then reads what `MyBot` reads
+every step: the visibility, creep and pathing arrays. Run from the project
+root.
+
+Usage:
+    python scripts/benchmark_observation_decode.py
+    python scripts/benchmark_observation_decode.py --map-size 200 176 --units 400
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from os import path
+
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+import numpy as np
+from google.protobuf.internal import api_implementation
+from s2clientprotocol import common_pb2, raw_pb2, sc2api_pb2
+from sc2.game_state import GameState
+from sc2.pixel_map import PixelMap
+
+from bot.lazy_observation import LazyGameState, LazyPixelMap
+
+# creep only spreads every so often
+CREEP_CHANGE_STEPS: int = 8
+
+
+def image(
+    width: int, height: int, values: np.ndarray, bits: int
+) -> common_pb2.ImageData:
+    data: bytes = np.packbits(values).tobytes() if bits == 1 else values.tobytes()
+    return common_pb2.ImageData(
+        bits_per_pixel=bits, size=common_pb2.Size2DI(x=width, y=height), data=data
+    )
+
+
+def recorded_steps(
+    steps: int, width: int, height: int, units: int, rng: np.random.Generator
+) -> list[tuple[bytes, bytes]]:
+    """Serialized (observation, game info) responses of every step."""
+    pathing: np.ndarray = (rng.random((height, width)) < 0.6).astype(np.uint8)
+    creep: np.ndarray = np.zeros((height, width), dtype=np.uint8)
+    recorded: list[tuple[bytes, bytes]] = []
+    for step in range(steps):
+        if step % CREEP_CHANGE_STEPS == 0:
+            creep[rng.integers(0, height), : rng.integers(0, width)] = 1
+        visibility: np.ndarray = rng.integers(0, 3, (height, width), dtype=np.uint8)
+        raw = raw_pb2.ObservationRaw(
+            player=raw_pb2.PlayerRaw(upgrade_ids=[1, 2, 3]),
+            units=[
+                raw_pb2.Unit(
+                    tag=i + 1,
+                    unit_type=int(rng.integers(1, 150)),
+                    alliance=raw_pb2.Self if i % 2 else raw_pb2.Enemy,
+                    pos=common_pb2.Point(
+                        x=float(rng.uniform(0, width)), y=float(rng.uniform(0, height))
+                    ),
+                    health=45.0,
+                    health_max=45.0,
+                )
+                for i in range(units)
+            ],
+            map_state=raw_pb2.MapState(
+                visibility=image(width, height, visibility, 8),
+                creep=image(width, height, creep, 1),
+            ),
+            effects=[
+                raw_pb2.Effect(effect_id=1, pos=[common_pb2.Point2D(x=10.0, y=10.0)])
+                for _ in range(5)
+            ],
+        )
+        observation = sc2api_pb2.Response(
+            observation=sc2api_pb2.ResponseObservation(
+                observation=sc2api_pb2.Observation(game_loop=step * 2, raw_data=raw)
+            )
+        )
+        game_info = sc2api_pb2.Response(
+            game_info=sc2api_pb2.ResponseGameInfo(
+                start_raw=raw_pb2.StartRaw(
+                    pathing_grid=image(width, height, pathing, 1)
+                )
+            )
+        )
+        recorded.append(
+            (observation.SerializeToString(), game_info.SerializeToString())
+        )
+    return recorded
+
+
+def decode_step(
+    observation_bytes: bytes, game_info_bytes: bytes, lazy: bool
+) -> tuple[float, float]:
+    """Seconds to parse one step's responses, and to decode them and read
+    the grids the bot reads."""
+    started: float = time.perf_counter()
+    observation = sc2api_pb2.Response()
+    observation.ParseFromString(observation_bytes)
+    game_info = sc2api_pb2.Response()
+    game_info.ParseFromString(game_info_bytes)
+    parsed: float = time.perf_counter()
+    state_type = LazyGameState if lazy else GameState
+    pixel_map_type = LazyPixelMap if lazy else PixelMap
+    state = state_type(observation.observation)
+    pathing = pixel_map_type(game_info.game_info.start_raw.pathing_grid, in_bits=True)
+    state.visibility.data_numpy
+    state.creep.data_numpy
+    pathing.data_numpy
+    return parsed - started, time.perf_counter() - parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--map-size", type=int, nargs=2, default=(184, 160))
+    parser.add_argument("--units", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    width, height = args.map_size
+    recorded = recorded_steps(
+        args.steps, width, height, args.units, np.random.default_rng(args.seed)
+    )
+    print(
+        f"{args.steps} steps, {width}x{height} map, {args.units} units, "
+        f"protobuf backend: {api_implementation.Type()}"
+    )
+    parse: list[float] = []
+    timings: dict[str, list[float]] = {"eager": [], "lazy": []}
+    # interleave so both see the same machine state
+    for observation_bytes, game_info_bytes in recorded:
+        for name in random.sample(list(timings), len(timings)):
+            parse_time, decode_time = decode_step(
+                observation_bytes, game_info_bytes, name == "lazy"
+            )
+            parse.append(parse_time * 1000)
+            timings[name].append(decode_time * 1000)
+    print(f" parse: median {statistics.median(parse):.3f} ms, same for both")
+    eager: float = statistics.median(timings["eager"])
+    for name, values in timings.items():
+        median: float = statistics.median(values)
+        print(
+            f"{name:>6}: decode median {median:.3f} ms, p95 "
+            f"{sorted(values)[int(0.95 * (len(values) - 1))]:.3f} ms, "
+            f"{eager / median:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
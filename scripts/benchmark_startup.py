@@ -0,0 +1,99 @@
+"""
+Compare how long bot builds take to get ready for their first step.
+
+Each target is launched with `--startup-probe`, which makes run.py exit
+once imports are done and the bot is built, right before it would connect
+to the game. Time to that point and the size on disk of the target are
+reported. Run from the project root.
+
+Usage:
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --target publish/aresbot/aresbot
+    python scripts/benchmark_startup.py --target publish/aresbot.exe --runs 10
+"""
+import argparse
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+from os import path
+
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+from bot.consts import STARTUP_PROBE, STARTUP_PROBE_READY
+
+SOURCE_TARGET: str = f"{sys.executable} run.py"
+# what a source checkout ships, see `scripts/create_ladder_zip.py`
+SOURCE_PATHS: list[str] = ["run.py", "ladder.py", "bot", "ares-sc2"]
+
+
+def size_on_disk(target: list[str]) -> int:
+    """Bytes of the bundle directory, the exe, or the shipped sources."""
+    executable: str = target[0]
+    if executable == sys.executable:
+        paths: list[str] = SOURCE_PATHS
+    elif path.isfile(
+        path.join(path.dirname(executable), "_internal", "base_library.zip")
+    ):
+        paths = [path.dirname(executable)]
+    else:
+        paths = [executable]
+    total: int = 0
+    for p in paths:
+        if path.isfile(p):
+            total += path.getsize(p)
+        for root, _, files in os.walk(p):
+            total += sum(path.getsize(path.join(root, f)) for f in files)
+    return total
+
+
+def time_to_ready(target: list[str], timeout: float) -> float:
+    """Seconds from launching `target` until it reports it is ready."""
+    started: float = time.perf_counter()
+    process = subprocess.Popen(
+        target + [STARTUP_PROBE],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        # the bundle reads config.yml from its own directory
+        cwd=None if target[0] == sys.executable else path.dirname(target[0]) or None,
+    )
+    try:
+        for line in process.stdout:
+            if line.strip() == STARTUP_PROBE_READY:
+                return time.perf_counter() - started
+            if time.perf_counter() - started > timeout:
+                break
+    finally:
+        process.kill()
+        process.wait()
+    raise RuntimeError(f"{shlex.join(target)} never reported ready")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--target",
+        action="append",
+        help=f"command to launch, repeatable (default: {SOURCE_TARGET!r})",
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    print(f"{'target':<50} {'median s':>9} {'min s':>7} {'max s':>7} {'size MB':>8}")
+    for target_command in args.target or [SOURCE_TARGET]:
+        target: list[str] = shlex.split(target_command)
+        target[0] = path.abspath(target[0]) if path.exists(target[0]) else target[0]
+        # the first launch warms the page cache, every build gets the same
+        time_to_ready(target, args.timeout)
+        times: list[float] = [
+            time_to_ready(target, args.timeout) for _ in range(args.runs)
+        ]
+        print(
+            f"{target_command:<50} {statistics.median(times):9.2f} "
+            f"{min(times):7.2f} {max(times):7.2f} "
+            f"{size_on_disk(target) / 1e6:8.1f}"
+        )
@@ -0,0 +1,63 @@
+"""
+Build creep tumor plans for every spawn pair of the maps cached in `data/maps/`.
+
+Map grids are cached the first time the bot plays a map, plans for the spawn
+pair of that game are built in game. Run this afterwards to have plans for
+every other spawn pair ready before the next game on that map.
+
+Usage:
+    python scripts/build_creep_plans.py
+    python scripts/build_creep_plans.py --force
+"""
+import argparse
+import sys
+from glob import glob
+from os import path
+from time import perf_counter
+
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+import numpy as np
+from sc2.position import Point2
+
+from bot.consts import DATA_DIR
+from bot.creep_plan import build_and_save_creep_plan, creep_plan_path
+
+
+def build_map(grids_path: str, force: bool) -> None:
+    map_name: str = path.splitext(path.basename(grids_path))[0]
+    with np.load(grids_path) as data:
+        pathing: np.ndarray = data["pathing"]
+        placement: np.ndarray = data["placement"]
+        start_locations: list[Point2] = [Point2(p) for p in data["start_locations"]]
+        expansions: list[Point2] = [Point2(p) for p in data["expansions"]]
+
+    for start in start_locations:
+        for enemy_start in start_locations:
+            if start == enemy_start:
+                continue
+            plan_path: str = creep_plan_path(DATA_DIR, map_name, start, enemy_start)
+            if path.isfile(plan_path) and not force:
+                continue
+            started: float = perf_counter()
+            plan = build_and_save_creep_plan(
+                plan_path, pathing, placement, start, enemy_start, expansions
+            )
+            print(
+                f"{path.basename(plan_path)}: {len(plan)} spots "
+                f"in {perf_counter() - started:.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--force", action="store_true", help="rebuild plans that already exist"
+    )
+    args = parser.parse_args()
+
+    maps: list[str] = sorted(glob(path.join(DATA_DIR, "maps", "*.npz")))
+    if not maps:
+        print(f"No map grids in {path.join(DATA_DIR, 'maps')}, play a game first")
+    for grids_path in maps:
+        build_map(grids_path, args.force)
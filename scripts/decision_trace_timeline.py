@@ -0,0 +1,109 @@
+"""
+Turn a decision trace dump from `data/` into a per-frame timeline.
+
+Usage:
+    python scripts/decision_trace_timeline.py data/<dump>-trace.bin
+    python scripts/decision_trace_timeline.py data/<dump>-trace.bin --frames 2000 2400
+    python scripts/decision_trace_timeline.py data/<dump>-trace.bin --overhead
+"""
+import argparse
+import sys
+from collections import Counter
+from itertools import groupby
+from os import path
+from timeit import timeit
+
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+from bot.consts import StepSection
+from bot.decision_trace import DecisionTrace, TraceRecord, read_trace
+
+try:
+    from sc2.ids.ability_id import AbilityId
+except ImportError:
+    AbilityId = None
+
+
+def ability_name(ability: int) -> str:
+    if ability == 0:
+        return "BEHAVIOR"
+    if AbilityId is not None:
+        try:
+            return AbilityId(ability).name
+        except ValueError:
+            pass
+    return str(ability)
+
+
+def format_record(record: TraceRecord) -> str:
+    target: str = f"({record.x:.1f}, {record.y:.1f})"
+    if record.target_tag:
+        target = f"{record.target_tag} @ {target}"
+    return (
+        f"    {StepSection(record.section).name:<18} {record.tag:<12} "
+        f"{ability_name(record.ability):<34} {target}"
+    )
+
+
+def measure_record_cost_ns(samples: int = 200_000) -> float:
+    """Time `DecisionTrace.record` on this machine, in ns per record."""
+    trace = DecisionTrace(capacity=4096)
+    seconds: float = timeit(
+        lambda: trace.record(20000, 14, 4350279681, 23, 4348706817, 120.5, 64.25),
+        number=samples,
+    )
+    return seconds / samples * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("dump", type=str, help="Path to a decision trace dump")
+    parser.add_argument(
+        "--frames",
+        type=int,
+        nargs=2,
+        metavar=("START", "END"),
+        help="Only show game loops in this range",
+    )
+    parser.add_argument(
+        "--overhead",
+        action="store_true",
+        help="Estimate recording overhead as a percentage of step time",
+    )
+    args = parser.parse_args()
+
+    header, records = read_trace(args.dump)
+    print(
+        f"{header.count} records (capacity {header.capacity}, "
+        f"{header.dropped} overwritten), {header.steps} steps timed"
+    )
+
+    per_section: Counter = Counter()
+    for frame, frame_records in groupby(records, key=lambda r: r.frame):
+        if args.frames and not args.frames[0] <= frame <= args.frames[1]:
+            continue
+        print(f"frame {frame} ({frame / 22.4:.1f}s)")
+        for record in frame_records:
+            per_section[record.section] += 1
+            print(format_record(record))
+
+    print("\nDecisions per section:")
+    for section, count in per_section.most_common():
+        print(f"    {StepSection(section).name:<18} {count}")
+
+    if args.overhead:
+        if header.step_time_ns == 0:
+            print("\nNo step time was recorded, can't estimate overhead")
+            return
+        record_cost_ns: float = measure_record_cost_ns()
+        recorded: int = header.count + header.dropped
+        overhead: float = recorded * record_cost_ns / header.step_time_ns * 100
+        print(
+            f"\n{record_cost_ns:.0f}ns per record, "
+            f"{header.step_time_ns / header.steps / 1e6:.2f}ms mean step time, "
+            f"estimated overhead {overhead:.2f}% of step time"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Play many games in a row in one process and fail if resources leak.
+
+Every game goes through `ladder.join_ladder_game` against a
+`bot.stand_in_server.StandInServer` running in the same event loop, with a
+new bot each game, the way LadderManager would start it. After each game
+the garbage is collected and the process' RSS, open file descriptors,
+sockets, asyncio tasks, live objects and live bots are sampled, along with
+the errors reported to the event loop's exception handler, such as
+sessions that were never closed. Growth is measured from the end of the
+warmup games, which are allowed to fill caches, to the last game; the run
+fails when any of it passes its threshold, or when a bot or a loop error
+is left at the end. Reads `/proc`, so Linux only. `--bot __main__:IdleBot`
+plays a bot that does nothing, to soak python-sc2 and the ladder path on
+their own. Run from the project root.
+
+Usage:
+    python scripts/soak_test.py
+    python scripts/soak_test.py --games 50 --game-loops 4000 --lazy-decode
+    python scripts/soak_test.py --bot __main__:IdleBot --max-rss-growth 16
+"""
+import argparse
+import asyncio
+import gc
+import importlib
+import os
+import sys
+import time
+from collections import Counter
+from os import path
+
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+from sc2.bot_ai import BotAI
+from sc2.data import Race
+from sc2.player import Bot
+
+from bot.stand_in_server import ScriptedGame, StandInServer
+from ladder import join_ladder_game, ladder_portconfig
+
+# port LadderManager would pass as --StartPort, nothing listens on them
+START_PORT: int = 5690
+# objects types reported when the object count grows too much
+REPORTED_TYPES: int = 10
+
+
+def bot_class(name: str) -> type:
+    """The class `module:Class` names."""
+    module, _, cls = name.partition(":")
+    return getattr(importlib.import_module(module), cls)
+
+
+class IdleBot(BotAI):
+    """Issues no commands, `BotAI.on_step` has to be overridden."""
+
+    async def on_step(self, iteration: int) -> None:
+        pass
+
+
+def sample(
+    bot_type: type, loop_errors: list[str]
+) -> tuple[dict[str, float], Counter[str]]:
+    """Resource use now, and live objects by type name."""
+    gc.collect()
+    with open("/proc/self/statm") as statm:
+        rss_pages: int = int(statm.read().split()[1])
+    fds: list[str] = []
+    for fd in os.listdir("/proc/self/fd"):
+        try:
+            fds.append(os.readlink(f"/proc/self/fd/{fd}"))
+        except OSError:
+            # the descriptor listdir itself used
+            continue
+    objects: list = gc.get_objects()
+    types: Counter[str] = Counter(type(o).__qualname__ for o in objects)
+    metrics: dict[str, float] = {
+        "rss": rss_pages * os.sysconf("SC_PAGE_SIZE") / 2**20,
+        "fds": len(fds),
+        "sockets": sum(link.startswith("socket:") for link in fds),
+        "tasks": len(asyncio.all_tasks()) - 1,
+        "objects": len(objects),
+        "bots": types[bot_type.__qualname__],
+        "errors": len(loop_errors),
+    }
+    return metrics, types
+
+
+async def soak(args: argparse.Namespace) -> list[str]:
+    """Play the games and return the thresholds that were passed."""
+    bot_type: type = bot_class(args.bot)
+    server = StandInServer(ScriptedGame(args.game_loops, tuple(args.map_size)))
+    port: int = await server.start()
+    loop_errors: list[str] = []
+
+    def on_loop_error(loop: asyncio.AbstractEventLoop, context: dict) -> None:
+        loop_errors.append(context["message"])
+        loop.default_exception_handler(context)
+
+    asyncio.get_running_loop().set_exception_handler(on_loop_error)
+    limits: dict[str, float] = {
+        "rss": args.max_rss_growth,
+        "fds": args.max_fd_growth,
+        "sockets": args.max_socket_growth,
+        "tasks": args.max_task_growth,
+        "objects": args.max_object_growth,
+        "bots": 0,
+        "errors": 0,
+    }
+    # left at the end at all, not grown since the warmup
+    absolute: set[str] = {"bots", "errors"}
+    print(f"{'game':>4} {'result':>8} {'s':>6} " + " ".join(f"{m:>8}" for m in limits))
+    baseline: dict[str, float] = {}
+    baseline_types: Counter[str] = Counter()
+    try:
+        for game in range(args.warmup + args.games):
+            bot = Bot(Race[args.race.title()], bot_type(), "SoakBot")
+            started: float = time.perf_counter()
+            result = await join_ladder_game(
+                host="127.0.0.1",
+                port=port,
+                players=[bot],
+                realtime=args.realtime,
+                portconfig=ladder_portconfig(START_PORT),
+                lazy_decode=args.lazy_decode,
+            )
+            elapsed: float = time.perf_counter() - started
+            del bot
+            # let closed connections finish on the server side
+            await asyncio.sleep(0.1)
+            metrics, types = sample(bot_type, loop_errors)
+            if game == args.warmup - 1 or (not args.warmup and not game):
+                baseline, baseline_types = metrics, types
+            print(
+                f"{game + 1:>4} {getattr(result, 'name', str(result)):>8} "
+                f"{elapsed:>6.1f} "
+                + " ".join(f"{metrics[m]:>8.1f}" for m in limits)
+                + ("  warmup" if game < args.warmup else "")
+            )
+    finally:
+        await server.stop()
+
+    failures: list[str] = []
+    for metric, limit in limits.items():
+        start: float = 0 if metric in absolute else baseline[metric]
+        growth: float = metrics[metric] - start
+        if growth > limit:
+            failures.append(f"{metric} grew by {growth:.1f}, limit {limit}")
+    if any(f.startswith("objects") for f in failures):
+        grown = (types - baseline_types).most_common(REPORTED_TYPES)
+        failures.append(
+            "most grown types: "
+            + ", ".join(f"{name} +{count}" for name, count in grown)
+        )
+    failures.extend(f"loop error: {message}" for message in dict.fromkeys(loop_errors))
+    print(f"requests served: {dict(server.requests)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--game-loops", type=int, default=2688)
+    parser.add_argument("--map-size", type=int, nargs=2, default=(96, 96))
+    parser.add_argument("--bot", default="bot.main:MyBot", help="module:Class")
+    parser.add_argument("--race", default="zerg")
+    parser.add_argument("--realtime", action="store_true")
+    parser.add_argument("--lazy-decode", action="store_true")
+    parser.add_argument("--max-rss-growth", type=float, default=64.0, help="MiB")
+    parser.add_argument("--max-fd-growth", type=int, default=2)
+    parser.add_argument("--max-socket-growth", type=int, default=1)
+    parser.add_argument("--max-task-growth", type=int, default=0)
+    parser.add_argument("--max-object-growth", type=int, default=20000)
+    args = parser.parse_args()
+
+    if not path.isdir("/proc/self/fd"):
+        sys.exit("soak test reads /proc, run it on Linux")
+    failures: list[str] = asyncio.run(soak(args))
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print("no leaks past the thresholds")
+
+
+if __name__ == "__main__":
+    main()
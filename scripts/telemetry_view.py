@@ -0,0 +1,172 @@
+"""
+Live terminal graphs of the telemetry published by running games.
+
+Sources are metric files, globs or directories of them, or unix:<path>
+sockets, as set by `Telemetry` and `TelemetryTarget` in `config.yml`.
+New files matching a glob are picked up while running, so one viewer can
+follow every game of a soak run.
+
+Usage:
+    python scripts/telemetry_view.py
+    python scripts/telemetry_view.py data/telemetry/*.prom --history 120
+    python scripts/telemetry_view.py unix:/tmp/juggerbot.sock --once
+"""
+import argparse
+import re
+import socket
+import sys
+import time
+from collections import deque
+from glob import glob
+from os import path
+from typing import Optional
+
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+from bot.consts import DATA_DIR
+from bot.telemetry import METRIC_PREFIX, SOCKET_PREFIX
+
+SPARK: str = " .:-=+*#%@"
+GAME_LOOPS_PER_MINUTE: float = 22.4 * 60
+LINE = re.compile(r"^(\w+)(?:\{([^}]*)\})?\s+(\S+)$")
+
+
+def parse_metrics(text: str) -> dict[str, float]:
+    """Metric name to value, histogram buckets are skipped."""
+    metrics: dict[str, float] = {}
+    for line in text.splitlines():
+        match = LINE.match(line)
+        if not match or match.group(1).endswith("_bucket"):
+            continue
+        metrics[match.group(1).removeprefix(f"{METRIC_PREFIX}_")] = float(
+            match.group(3)
+        )
+    return metrics
+
+
+def read_source(source: str) -> Optional[str]:
+    try:
+        if source.startswith(SOCKET_PREFIX):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.settimeout(1)
+                client.connect(source[len(SOCKET_PREFIX) :])
+                chunks: list[bytes] = []
+                while chunk := client.recv(65536):
+                    chunks.append(chunk)
+            return b"".join(chunks).decode()
+        with open(source) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def expand(patterns: list[str]) -> list[str]:
+    sources: list[str] = []
+    for pattern in patterns:
+        if pattern.startswith(SOCKET_PREFIX):
+            sources.append(pattern)
+        elif path.isdir(pattern):
+            sources.extend(sorted(glob(path.join(pattern, "*.prom"))))
+        else:
+            sources.extend(sorted(glob(pattern)) or [pattern])
+    return sources
+
+
+def derive(previous: dict[str, float], current: dict[str, float]) -> dict[str, float]:
+    """Values to graph, rates are over the time between two reads."""
+    values: dict[str, float] = {
+        "units": current.get("own_units", 0),
+        "enemy": current.get("enemy_units", 0),
+        "minerals": current.get("minerals", 0),
+        "gas": current.get("vespene", 0),
+        "supply": current.get("supply_used", 0),
+    }
+    steps: float = current.get("step_time_ms_count", 0) - previous.get(
+        "step_time_ms_count", 0
+    )
+    step_time: float = current.get("step_time_ms_sum", 0) - previous.get(
+        "step_time_ms_sum", 0
+    )
+    values["step ms"] = step_time / steps if steps > 0 else 0
+    loops: float = current.get("game_loop", 0) - previous.get("game_loop", 0)
+    actions: float = current.get("actions_total", 0) - previous.get("actions_total", 0)
+    values["apm"] = actions / loops * GAME_LOOPS_PER_MINUTE if loops > 0 else 0
+    return values
+
+
+def sparkline(values: deque, width: int) -> str:
+    shown: list[float] = list(values)[-width:]
+    top: float = max(shown, default=0)
+    if top <= 0:
+        return SPARK[0] * len(shown)
+    return "".join(
+        SPARK[min(int(v / top * (len(SPARK) - 1)), len(SPARK) - 1)] for v in shown
+    )
+
+
+class Game:
+    def __init__(self, source: str, history: int):
+        self.source: str = source
+        self.metrics: dict[str, float] = {}
+        self.series: dict[str, deque] = {}
+        self.history: int = history
+
+    def update(self, text: str) -> None:
+        current: dict[str, float] = parse_metrics(text)
+        if self.metrics and current.get("game_loop", 0) != self.metrics.get(
+            "game_loop", 0
+        ):
+            for name, value in derive(self.metrics, current).items():
+                self.series.setdefault(name, deque(maxlen=self.history)).append(value)
+        if current.get("game_loop", 0) != self.metrics.get("game_loop", 0):
+            self.metrics = current
+
+    def render(self, width: int) -> list[str]:
+        game_seconds: float = self.metrics.get("game_loop", 0) / 22.4
+        lines: list[str] = [
+            f"{self.source}  "
+            f"{int(game_seconds // 60):02d}:{int(game_seconds % 60):02d}  "
+            f"steps {self.metrics.get('steps_total', 0):.0f}"
+        ]
+        if not self.series:
+            lines.extend(
+                f"  {name:>20} {value:g}" for name, value in self.metrics.items()
+            )
+        for name, values in self.series.items():
+            lines.append(
+                f"  {name:>8} {sparkline(values, width)} "
+                f"{values[-1]:8.1f} (max {max(values):.1f})"
+            )
+        return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "sources",
+        nargs="*",
+        default=[path.join(DATA_DIR, "telemetry")],
+        help="metric files, globs, directories or unix:<path> sockets",
+    )
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--history", type=int, default=60, help="points per graph")
+    parser.add_argument("--once", action="store_true", help="read once and exit")
+    args = parser.parse_args()
+
+    games: dict[str, Game] = {}
+    while True:
+        for source in expand(args.sources):
+            if (text := read_source(source)) is not None:
+                games.setdefault(source, Game(source, args.history)).update(text)
+        if args.once:
+            for game in games.values():
+                print("\n".join(game.render(args.history)))
+            break
+        output: list[str] = ["\033[H\033[J"]
+        for game in games.values():
+            output.extend(game.render(args.history))
+            output.append("")
+        if not games:
+            output.append(f"Waiting for telemetry from {', '.join(args.sources)}")
+        print("\n".join(output), flush=True)
+        time.sleep(args.interval)
@@ -1,5 +1,25 @@
-from os import path, environ
-from typing import Union
+"""
+Upload `jugger_bot.zip` to the bot's AI Arena page.
+
+The multipart body is streamed from disk in chunks. A hash of the zip
+contents and the description is compared with the last successful upload,
+recorded in `LAST_UPLOAD_FILE`, so unchanged builds are not uploaded again.
+Failed uploads are retried with exponential backoff.
+
+Usage:
+    python scripts/upload_to_ai_arena.py
+    python scripts/upload_to_ai_arena.py --force
+    python scripts/upload_to_ai_arena.py --url http://127.0.0.1:8000/api/bots/1/
+"""
+import argparse
+import hashlib
+import json
+import random
+import time
+import uuid
+import zipfile
+from os import environ, path
+from typing import BinaryIO, Iterator, Optional, Union
 
 import requests
 import yaml
@@ -7,14 +27,23 @@ from loguru import logger
 
 API_TOKEN_ENV: str = "UPLOAD_API_TOKEN"
 BOT_ID_ENV: str = "UPLOAD_BOT_ID"
+URL_ENV: str = "UPLOAD_URL"
 CONFIG_FILE: str = "config.yml"
 AUTO_UPLOAD_TO_AIARENA: str = "AutoUploadToAiarena"
 MY_BOT_NAME: str = "The Juggerbot"
 ZIPFILE_NAME: str = "jugger_bot.zip"
+LAST_UPLOAD_FILE: str = ".last_upload.json"
 
-TOKEN: str = environ.get("a6b75b08269f590f6e7dab6cecafb8ebe3f9f6e2")
-BOT_ID: str = environ.get("991")
-URL: str = f"https://aiarena.net/api/bots/{BOT_ID}/"
+CHUNK_SIZE: int = 1 << 20
+MAX_ATTEMPTS: int = 5
+BACKOFF_SECONDS: float = 2.0
+TIMEOUT_SECONDS: float = 300.0
+# status codes worth trying again, anything else fails straight away
+RETRY_STATUS: frozenset[int] = frozenset({408, 429, 500, 502, 503, 504})
+
+TOKEN: str = environ.get(API_TOKEN_ENV)
+BOT_ID: str = environ.get(BOT_ID_ENV)
+URL: str = environ.get(URL_ENV, f"https://aiarena.net/api/bots/{BOT_ID}/")
 
 
 def get_bot_description() -> str:
@@ -44,10 +73,163 @@ def retrieve_value_from_config(string: str) -> Union[str, bool, None]:
                 return config[string]
 
 
+def content_hash(zip_path: str, fields: dict[str, str]) -> str:
+    """sha256 of every file in the zip and the form fields.
+
+    Zip timestamps are left out, so rebuilding unchanged sources gives the
+    same hash.
+    """
+    digest = hashlib.sha256()
+    for name, value in sorted(fields.items()):
+        digest.update(f"{name}={value}\0".encode())
+    with zipfile.ZipFile(zip_path) as archive:
+        for info in sorted(archive.infolist(), key=lambda i: i.filename):
+            digest.update(f"{info.filename}\0{info.file_size}\0".encode())
+            with archive.open(info) as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_last_upload(url: str) -> Optional[str]:
+    if not path.isfile(LAST_UPLOAD_FILE):
+        return None
+    with open(LAST_UPLOAD_FILE) as f:
+        return json.load(f).get(url)
+
+
+def save_last_upload(url: str, digest: str) -> None:
+    uploads: dict[str, str] = {}
+    if path.isfile(LAST_UPLOAD_FILE):
+        with open(LAST_UPLOAD_FILE) as f:
+            uploads = json.load(f)
+    uploads[url] = digest
+    with open(LAST_UPLOAD_FILE, "w") as f:
+        json.dump(uploads, f, indent=2)
+
+
+class MultipartStream:
+    def __init__(self, fields: dict[str, str], file_field: str, file_path: str):
+        """multipart/form-data body read from disk as it is sent.
+
+        Parameters
+        ----------
+        fields :
+            Plain form fields.
+        file_field :
+            Form field the file is sent as.
+        file_path :
+            File to send.
+        """
+        self.boundary: str = uuid.uuid4().hex
+        self.file_path: str = file_path
+        self.sent: int = 0
+        parts: list[bytes] = [
+            (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n"
+            ).encode()
+            for name, value in fields.items()
+        ]
+        parts.append(
+            (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{file_field}"; '
+                f'filename="{path.basename(file_path)}"\r\n'
+                "Content-Type: application/zip\r\n\r\n"
+            ).encode()
+        )
+        self._head: bytes = b"".join(parts)
+        self._tail: bytes = f"\r\n--{self.boundary}--\r\n".encode()
+        self._length: int = len(self._head) + path.getsize(file_path) + len(self._tail)
+        self._chunks: Iterator[bytes] = self._iter_chunks()
+        self._buffer: bytes = b""
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        # lets requests send a Content-Length instead of chunked encoding
+        return self._length
+
+    def _iter_chunks(self) -> Iterator[bytes]:
+        yield self._head
+        with open(self.file_path, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                yield chunk
+        yield self._tail
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk: Optional[bytes] = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self.sent += len(data)
+        return data
+
+
+def upload(url: str, token: str, fields: dict[str, str], zip_path: str) -> bool:
+    """PATCH the zip to `url`, retrying transient failures.
+
+    Returns
+    -------
+    bool :
+        True once the server accepted the upload.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        body = MultipartStream(fields, "bot_zip", zip_path)
+        started: float = time.perf_counter()
+        retry: bool = True
+        try:
+            response = requests.patch(
+                url,
+                headers={
+                    "Authorization": f"Token {token}",
+                    "Content-Type": body.content_type,
+                },
+                data=body,
+                timeout=TIMEOUT_SECONDS,
+            )
+            elapsed: float = time.perf_counter() - started
+            logger.info(
+                f"Sent {body.sent / 1e6:.1f} MB in {elapsed:.1f}s "
+                f"({body.sent / 1e6 / max(elapsed, 1e-9):.2f} MB/s), "
+                f"status {response.status_code}"
+            )
+            if response.ok:
+                return True
+            logger.warning(response.content[:500])
+            retry = response.status_code in RETRY_STATUS
+        except (requests.ConnectionError, requests.Timeout) as e:
+            logger.warning(f"Upload attempt {attempt} failed: {e}")
+
+        if not retry or attempt == MAX_ATTEMPTS:
+            break
+        delay: float = BACKOFF_SECONDS * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+        logger.info(f"Retrying in {delay:.1f}s")
+        time.sleep(delay)
+    return False
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default=URL, help=f"bot endpoint, or set {URL_ENV}")
+    parser.add_argument("--zip", default=ZIPFILE_NAME, help="bot zip to upload")
+    parser.add_argument(
+        "--force", action="store_true", help="upload even if nothing changed"
+    )
+    args = parser.parse_args()
+
     can_upload: bool = False
-    if upload := retrieve_value_from_config(AUTO_UPLOAD_TO_AIARENA):
-        can_upload = upload
+    if upload_enabled := retrieve_value_from_config(AUTO_UPLOAD_TO_AIARENA):
+        can_upload = upload_enabled
 
     if not can_upload:
         logger.info(
@@ -56,23 +238,17 @@ if __name__ == "__main__":
         )
 
     else:
-        logger.info("Uploading bot")
-        with open(ZIPFILE_NAME, "rb") as bot_zip:
-            request_headers = {
-                "Authorization": f"Token {TOKEN}",
-            }
-            request_data = {
-                "bot_zip_publicly_downloadable": True,
-                "bot_data_publicly_downloadable": False,
-                "bot_data_enabled": False,
-                "wiki_article_content": get_bot_description(),
-            }
-            request_files = {
-                "bot_zip": bot_zip,
-            }
-            logger.info(URL)
-            response = requests.patch(
-                URL, headers=request_headers, data=request_data, files=request_files
-            )
-            logger.info(response)
-            logger.info(response.content)
+        request_data: dict[str, str] = {
+            "bot_zip_publicly_downloadable": "True",
+            "bot_data_publicly_downloadable": "False",
+            "bot_data_enabled": "False",
+            "wiki_article_content": get_bot_description(),
+        }
+        digest: str = content_hash(args.zip, request_data)
+        if not args.force and load_last_upload(args.url) == digest:
+            logger.info(f"{args.zip} unchanged since the last upload, skipping")
+        else:
+            logger.info(f"Uploading bot to {args.url}")
+            if not upload(args.url, TOKEN, request_data, args.zip):
+                raise SystemExit(f"Upload to {args.url} failed")
+            save_last_upload(args.url, digest)
@@ -0,0 +1,93 @@
+import asyncio
+import dataclasses
+import pickle
+
+from s2clientprotocol import sc2api_pb2 as sc_pb
+from sc2.bot_ai import BotAI
+from sc2.position import Point2
+
+from bot.checkpoint import (
+    CHECKPOINT_VERSION,
+    Checkpoint,
+    capture,
+    load,
+    restore,
+    run_step,
+    write,
+)
+from bot.stand_in_server import BASE_BUILD, ZERG, ScriptedGame
+
+
+class _Bot(BotAI):
+    def __init__(self):
+        super().__init__()
+        self._checkpoint_units: int = 0
+        self.steps: int = 0
+
+    async def on_step(self, iteration: int) -> None:
+        self.steps += 1
+
+
+def _checkpoint() -> Checkpoint:
+    """A frame of the stand-in server's scripted game."""
+    game = ScriptedGame(map_size=(64, 64))
+    game.reset(ZERG)
+    game.step(448)
+    return Checkpoint(
+        version=CHECKPOINT_VERSION,
+        game_loop=game.loop,
+        player_id=game.player_id,
+        base_build=BASE_BUILD,
+        game_step=2,
+        observation=game.observation().SerializeToString(),
+        game_info=game.game_info().SerializeToString(),
+        game_data=game.data().SerializeToString(),
+        start_location=Point2(game.main),
+        expansions=[Point2(game.main), Point2(game.natural)],
+        resource_expansions={},
+        roles={},
+        bot_state={"_checkpoint_units": 40},
+    )
+
+
+def test_restored_bot_replays_the_frame():
+    checkpoint = _checkpoint()
+
+    async def replay() -> _Bot:
+        bot = _Bot()
+        client = await restore(bot, checkpoint)
+        for iteration in range(3):
+            await run_step(bot, client, iteration)
+        return bot
+
+    bot = asyncio.run(replay())
+
+    assert bot.steps == 3
+    assert bot.state.game_loop == checkpoint.game_loop
+    assert bot.start_location == checkpoint.start_location
+    assert bot._checkpoint_units == 40
+
+
+def test_capture_round_trips_through_a_file(tmp_path):
+    checkpoint = _checkpoint()
+
+    async def recapture() -> bytes:
+        bot = _Bot()
+        client = await restore(bot, checkpoint)
+        await run_step(bot, client, 0)
+        return capture(bot)
+
+    loaded = load(write(str(tmp_path / "frame.ckpt"), asyncio.run(recapture())))
+
+    assert loaded.game_loop == checkpoint.game_loop
+    assert loaded.bot_state == {"_checkpoint_units": 40}
+    observation = sc_pb.ResponseObservation()
+    observation.ParseFromString(loaded.observation)
+    assert observation.observation.game_loop == checkpoint.game_loop
+
+
+def test_other_versions_are_not_loaded(tmp_path):
+    old = dataclasses.replace(_checkpoint(), version=CHECKPOINT_VERSION - 1)
+    file_path = write(str(tmp_path / "old.ckpt"), pickle.dumps(old))
+
+    assert load(file_path) is None
@@ -0,0 +1,81 @@
+import numpy as np
+
+from bot.combat_sim import CombatSimulator
+
+ZERGLING: int = 105
+MARINE: int = 48
+SUPPLY_DEPOT: int = 19
+
+
+def _simulator() -> CombatSimulator:
+    sim = CombatSimulator()
+    for type_id, hit_points, dps, value, fights in (
+        (ZERGLING, 35.0, 10.0, 25.0, True),
+        (MARINE, 45.0, 9.8, 50.0, True),
+        (SUPPLY_DEPOT, 400.0, 0.0, 100.0, False),
+    ):
+        sim.known[type_id] = True
+        sim.hit_points[type_id] = hit_points
+        sim.ground_dps[type_id] = dps
+        sim.air_dps[type_id] = dps
+        sim.fights[type_id] = fights
+        sim.value[type_id] = value
+    return sim
+
+
+def _army(type_id: int, count: int, sim: CombatSimulator):
+    types = np.full(count, type_id, dtype=np.int32)
+    return types, sim.hit_points[types]
+
+
+def test_empty_enemy_memory_predicts_a_full_win():
+    sim = _simulator()
+
+    result = sim.estimate(*_army(ZERGLING, 6, sim), np.zeros(0, dtype=np.int32))
+
+    assert result.win
+    assert result.own_remaining == 1.0
+    assert result.own_value_left == 150.0
+
+
+def test_structures_without_weapons_do_not_fight():
+    sim = _simulator()
+
+    result = sim.estimate(*_army(ZERGLING, 6, sim), *_army(SUPPLY_DEPOT, 3, sim))
+
+    assert result.win
+    assert result.own_remaining == 1.0
+
+
+def test_larger_army_wins_with_square_law_remainder():
+    sim = _simulator()
+
+    result = sim.estimate(*_army(MARINE, 20, sim), *_army(MARINE, 10, sim))
+
+    assert result.win
+    assert np.isclose(result.own_remaining, np.sqrt(1 - 0.25))
+    assert not sim.estimate(*_army(MARINE, 10, sim), *_army(MARINE, 20, sim)).win
+
+
+def test_low_confidence_enemies_count_less():
+    sim = _simulator()
+    enemy_types, _ = _army(MARINE, 10, sim)
+
+    sure = sim.estimate(*_army(ZERGLING, 16, sim), enemy_types)
+    unsure = sim.estimate(
+        *_army(ZERGLING, 16, sim), enemy_types, enemy_weights=np.full(10, 0.25)
+    )
+
+    assert unsure.own_remaining > sure.own_remaining
+
+
+def test_estimates_are_memoized():
+    sim = _simulator()
+    own = _army(ZERGLING, 8, sim)
+    enemy = _army(MARINE, 4, sim)
+
+    first = sim.estimate(*own, *enemy)
+    second = sim.estimate(*own, *enemy)
+
+    assert first == second
+    assert (sim.hits, sim.misses) == (1, 1)
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+from sc2.ids.ability_id import AbilityId
+from sc2.position import Point2
+
+from bot.consts import StepSection
+from bot.main import MyBot
+
+
+def _bot() -> SimpleNamespace:
+    registered: list = []
+    return SimpleNamespace(
+        group_behaviors={},
+        _groups_used={},
+        registered=registered,
+        register_behavior=registered.append,
+        _trace=lambda *args: None,
+    )
+
+
+def _units(*tags: int) -> list[SimpleNamespace]:
+    return [SimpleNamespace(tag=tag) for tag in tags]
+
+
+def test_group_gets_unit_tags():
+    bot = _bot()
+    units = _units(1, 2, 3)
+    MyBot._command_group(
+        bot, StepSection.ATTACKING, units, AbilityId.ATTACK_ATTACK, Point2((10, 10))
+    )
+
+    (behavior,) = bot.registered
+    assert behavior.group_tags == {1, 2, 3}
+    assert behavior.group == units
+
+
+def test_reused_group_refreshes_tags():
+    bot = _bot()
+    MyBot._command_group(
+        bot,
+        StepSection.ATTACKING,
+        _units(1, 2),
+        AbilityId.ATTACK_ATTACK,
+        Point2((1, 1)),
+    )
+    bot._groups_used.clear()
+    units = _units(2, 5)
+    MyBot._command_group(
+        bot, StepSection.ATTACKING, units, AbilityId.MOVE_MOVE, Point2((4, 4))
+    )
+
+    first, second = bot.registered
+    assert second is first
+    assert second.group_tags == {2, 5}
+    assert second.group == units
+    assert second.ability == AbilityId.MOVE_MOVE
+    assert second.target == Point2((4, 4))
+
+
+def test_slots_are_kept_per_section():
+    bot = _bot()
+    MyBot._command_group(
+        bot, StepSection.ATTACKING, _units(1), AbilityId.ATTACK_ATTACK, Point2((1, 1))
+    )
+    MyBot._command_group(
+        bot, StepSection.ATTACKING, _units(2), AbilityId.ATTACK_ATTACK, Point2((1, 1))
+    )
+
+    first, second = bot.registered
+    assert first is not second
+    assert (first.group_tags, second.group_tags) == ({1}, {2})
@@ -0,0 +1,84 @@
+import numpy as np
+from sc2.position import Point2
+
+from bot.creep_plan import CreepPlan, build_creep_plan
+
+START = Point2((10.5, 10.5))
+ENEMY_START = Point2((53.5, 53.5))
+EXPANSIONS = [
+    START,
+    Point2((34.5, 10.5)),
+    Point2((10.5, 34.5)),
+    Point2((53.5, 29.5)),
+    ENEMY_START,
+]
+
+
+def _grids(blocked: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    pathing = np.ones((64, 64), dtype=np.uint8)
+    if blocked:
+        # our hatchery's 5x5 footprint
+        pathing[8:13, 8:13] = 0
+    return pathing, pathing.copy()
+
+
+def test_blocked_townhall_still_gets_lanes():
+    open_spots, _ = build_creep_plan(*_grids(), START, ENEMY_START, EXPANSIONS)
+    spots, parents = build_creep_plan(
+        *_grids(blocked=True), START, ENEMY_START, EXPANSIONS
+    )
+
+    assert len(open_spots)
+    assert abs(len(spots) - len(open_spots)) <= 1
+    assert len(parents) == len(spots)
+    # no spot is placed on the hatchery
+    tiles = spots.astype(np.intp)
+    assert _grids(blocked=True)[0][tiles[:, 1], tiles[:, 0]].all()
+
+
+def test_spots_are_ordered_and_parents_come_first():
+    spots, parents = build_creep_plan(
+        *_grids(blocked=True), START, ENEMY_START, EXPANSIONS
+    )
+
+    distances = np.hypot(spots[:, 0] - START[0], spots[:, 1] - START[1])
+    assert distances[0] == distances.min()
+    for spot, parent in enumerate(parents):
+        assert parent < spot
+
+
+def test_no_pathable_tiles_gives_an_empty_plan():
+    nothing = np.zeros((64, 64), dtype=np.uint8)
+
+    spots, parents = build_creep_plan(nothing, nothing, START, ENEMY_START, EXPANSIONS)
+
+    assert spots.shape == (0, 2)
+    assert len(parents) == 0
+
+
+def test_plan_marks_tumored_spots_done():
+    plan = CreepPlan(*build_creep_plan(*_grids(), START, ENEMY_START, EXPANSIONS))
+    x, y = plan.spots[0]
+
+    plan.update(100, np.array([x]), np.array([y]))
+
+    creep = np.ones((64, 64), dtype=np.uint8)
+    assert 0 not in plan.available(creep)
+    assert len(plan.available(creep)) == len(plan) - 1
+
+
+def test_tumors_follow_their_lane_and_claim_spots():
+    # lane 0 -> 1 -> 3 along x, lane 2 -> 4 along y
+    spots = np.array([(10, 10), (20, 10), (10, 20), (30, 10), (10, 30)], np.float32)
+    plan = CreepPlan(spots, np.array([-1, 0, -1, 1, 2], dtype=np.int16))
+    plan.update(100, spots[[0, 2], 0], spots[[0, 2], 1])
+
+    # the tumor's own spot is done, its child on the lane comes next
+    assert plan.next_spot(Point2((10, 21))) == 4
+    plan.assign(4, 100)
+    # a second tumor there skips the claimed spot
+    assert plan.next_spot(Point2((10, 21))) == 3
+    assert plan.next_spot(Point2((11, 10))) == 1
+    plan.assign(1, 100)
+    plan.assign(3, 100)
+    assert plan.next_spot(Point2((11, 10))) is None
@@ -0,0 +1,39 @@
+import pytest
+
+from bot.decision_trace import DecisionTrace, TraceRecord, read_trace
+
+
+def test_dump_reads_back(tmp_path):
+    trace = DecisionTrace(capacity=8)
+    trace.record(10, 14, 123, 23, 456, 1.5, 2.5)
+    trace.record(12, 11, 124, 1342)
+    trace.add_step_time(2_000_000)
+
+    header, records = read_trace(trace.dump(str(tmp_path / "trace.bin")))
+
+    assert (header.capacity, header.count, header.dropped) == (8, 2, 0)
+    assert (header.step_time_ns, header.steps) == (2_000_000, 1)
+    assert list(records) == [
+        TraceRecord(10, 14, 123, 23, 456, 1.5, 2.5),
+        TraceRecord(12, 11, 124, 1342, 0, 0.0, 0.0),
+    ]
+
+
+def test_full_buffer_keeps_the_newest_records_oldest_first(tmp_path):
+    trace = DecisionTrace(capacity=4)
+    for frame in range(10):
+        trace.record(frame, 0, frame, 0)
+
+    header, records = read_trace(trace.dump(str(tmp_path / "nested" / "trace.bin")))
+
+    assert len(trace) == 4
+    assert (header.count, header.dropped) == (4, 6)
+    assert [record.frame for record in records] == [6, 7, 8, 9]
+
+
+def test_other_files_are_rejected(tmp_path):
+    file_path = tmp_path / "not_a_trace.bin"
+    file_path.write_bytes(bytes(64))
+
+    with pytest.raises(ValueError):
+        read_trace(str(file_path))
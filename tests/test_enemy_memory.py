@@ -0,0 +1,89 @@
+import numpy as np
+from sc2.position import Point2
+
+from bot.enemy_memory import EnemyMemory
+from bot.observation_delta import ColumnDelta
+from bot.unit_snapshot import STRUCTURE
+
+MARINE: int = 48
+BARRACKS: int = 21
+HATCHERY: int = 86
+LAIR: int = 100
+DRONE: int = 104
+
+
+class _Columns:
+    """The enemy columns `EnemyMemory.update` reads."""
+
+    def __init__(self, *units: tuple[int, int, float, float, bool]):
+        tags, type_ids, x, y, structure = zip(*units) if units else ((),) * 5
+        self.tags = np.array(tags, dtype=np.uint64)
+        self.type_ids = np.array(type_ids, dtype=np.int32)
+        self.x = np.array(x, dtype=np.float64)
+        self.y = np.array(y, dtype=np.float64)
+        self.flags = np.where(np.array(structure, dtype=bool), STRUCTURE, 0)
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def has_flag(self, flag: int) -> np.ndarray:
+        return (self.flags & flag) != 0
+
+
+def test_combatants_near_a_position():
+    memory = EnemyMemory(lambda type_id: 1.0)
+    memory.update(
+        _Columns((1, MARINE, 10, 10, False), (2, BARRACKS, 80, 80, True)), 100
+    )
+
+    near_types, _ = memory.combatants(100, Point2((12, 12)), 10)
+    all_types, confidence = memory.combatants(100)
+
+    assert near_types.tolist() == [MARINE]
+    assert sorted(all_types.tolist()) == sorted([MARINE, BARRACKS])
+    assert (confidence == 1.0).all()
+
+
+def test_empty_memory_has_no_combatants_and_no_scouting():
+    memory = EnemyMemory(lambda type_id: 1.0)
+    memory.update(_Columns(), 100)
+
+    types, confidence = memory.combatants(100, Point2((50, 50)), 25)
+
+    assert len(types) == len(confidence) == 0
+    assert not memory.seen_near(Point2((50, 50)), 25, 100, 1344)
+
+
+def test_seen_near_expires():
+    memory = EnemyMemory(lambda type_id: 1.0)
+    memory.update(_Columns((2, BARRACKS, 80, 80, True)), 100)
+
+    assert memory.seen_near(Point2((75, 75)), 25, 1000, 1344)
+    assert not memory.seen_near(Point2((75, 75)), 25, 2000, 1344)
+    assert not memory.seen_near(Point2((10, 10)), 25, 1000, 1344)
+
+
+def test_unit_that_morphed_out_of_vision_is_retyped():
+    memory = EnemyMemory(lambda type_id: 2.0)
+    seen = _Columns((1, DRONE, 30, 30, False), (2, HATCHERY, 80, 80, True))
+    memory.update(seen, 100, delta=ColumnDelta(None, seen))
+    # the hatchery leaves vision, then comes back as a lair
+    hidden = _Columns((1, DRONE, 30, 30, False))
+    memory.update(hidden, 101, delta=ColumnDelta(seen, hidden))
+    back = _Columns((1, DRONE, 30, 30, False), (2, LAIR, 80, 80, True))
+    memory.update(back, 102, delta=ColumnDelta(hidden, back))
+
+    slot = memory.slot_of[2]
+    assert memory.type_ids[slot] == LAIR
+    assert memory.is_structure[slot]
+    assert memory.supply[slot] == 0.0
+    # and the other way round, a structure that turned into a unit
+    gone = _Columns((1, DRONE, 30, 30, False))
+    memory.update(gone, 103, delta=ColumnDelta(back, gone))
+    morphed = _Columns((1, DRONE, 30, 30, False), (2, MARINE, 80, 80, False))
+    memory.update(morphed, 104, delta=ColumnDelta(gone, morphed))
+
+    assert memory.type_ids[slot] == MARINE
+    assert not memory.is_structure[slot]
+    assert memory.is_army[slot]
+    assert memory.supply[slot] == 2.0
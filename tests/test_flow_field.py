@@ -0,0 +1,177 @@
+import time
+
+import numpy as np
+import pytest
+from sc2.position import Point2
+
+from bot.flow_field import (
+    FlowFieldCache,
+    GridType,
+    descend,
+    distance_field,
+    field_changed,
+)
+from bot.planner import BackgroundPlanner
+
+
+def _at(field: np.ndarray, x: int, y: int) -> float:
+    return float(field[y + 1, x + 1])
+
+
+@pytest.fixture
+def planner():
+    planner = BackgroundPlanner(max_workers=1)
+    yield planner
+    planner.shutdown()
+
+
+def _waypoints(cache, planner, target, x, y) -> np.ndarray:
+    for frame in range(200):
+        planner.collect(frame)
+        waypoints = cache.waypoints(GridType.GROUND, target, x, y, frame)
+        if waypoints is not None:
+            return waypoints
+        time.sleep(0.01)
+    raise AssertionError("field was never computed")
+
+
+def test_distances_are_steps_to_target():
+    field = distance_field(np.ones((8, 8), dtype=bool), (0, 0))
+
+    assert _at(field, 0, 0) == 0
+    assert _at(field, 3, 3) == 3
+    assert _at(field, 7, 2) == 7
+    # padding
+    assert np.isinf(field[0]).all()
+
+
+def test_unpathable_target_is_seeded_around_it():
+    pathable = np.ones((16, 16), dtype=bool)
+    pathable[6:11, 6:11] = False
+
+    field = distance_field(pathable, (8, 8))
+
+    assert np.isinf(_at(field, 8, 8))
+    assert _at(field, 5, 8) == 0
+    assert np.isfinite(field[1:-1, 1:-1][pathable]).all()
+
+
+def test_diagonal_steps_do_not_cut_corners():
+    pathable = np.ones((3, 3), dtype=bool)
+    pathable[0, 1] = pathable[1, 0] = False
+    pathable[1, 2] = pathable[2, 1] = False
+
+    field = distance_field(pathable, (0, 0))
+
+    # (1, 1) is only reachable between two blocked tiles
+    assert np.isinf(_at(field, 1, 1))
+
+
+def test_descend_does_not_cut_corners():
+    pathable = np.ones((5, 5), dtype=bool)
+    pathable[1, 2] = pathable[2, 1] = False
+    field = distance_field(pathable, (1, 1))
+
+    x, y, reachable = descend(field, np.array([2]), np.array([2]), (1, 1), 1)
+
+    assert reachable[0]
+    assert (x[0], y[0]) != (1, 1)
+    assert _at(field, x[0], y[0]) < _at(field, 2, 2)
+
+
+def test_blocking_a_tile_off_every_path_keeps_the_field():
+    before = np.ones((16, 16), dtype=bool)
+    after = before.copy()
+    after[13:, :3] = False
+
+    field = distance_field(before, (15, 0))
+
+    assert not field_changed(field, before, after, (15, 0))
+
+
+def test_blocking_a_corridor_changes_the_field():
+    before = np.zeros((9, 9), dtype=bool)
+    before[4, :] = True
+    before[:, 0] = before[:, 8] = True
+    after = before.copy()
+    after[4, 4] = False
+
+    field = distance_field(before, (0, 4))
+
+    assert field_changed(field, before, after, (0, 4))
+
+
+def test_opening_a_tile_next_to_the_field_changes_it():
+    before = np.ones((8, 8), dtype=bool)
+    before[:, 4] = False
+    after = before.copy()
+    after[3, 4] = True
+
+    field = distance_field(before, (0, 0))
+
+    assert field_changed(field, before, after, (0, 0))
+
+
+def test_field_changed_matches_a_new_search():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        before = rng.random((12, 12)) > 0.25
+        after = before.copy()
+        after[tuple(rng.integers(0, 12, (2, 3)))] = False
+        target = tuple(int(v) for v in rng.integers(0, 12, 2))
+
+        field = distance_field(before, target)
+        changed = field_changed(field, before, after, target)
+
+        field[1:-1, 1:-1][~after] = np.inf
+        assert changed == (not np.array_equal(field, distance_field(after, target)))
+
+
+def test_cache_keeps_fields_a_new_structure_does_not_touch(planner):
+    cache = FlowFieldCache(planner)
+    grid = np.ones((32, 32), dtype=np.uint8)
+    cache.update_grid(GridType.GROUND, grid)
+    target = Point2((30.5, 30.5))
+    _waypoints(cache, planner, target, np.array([5.0]), np.array([5.0]))
+
+    grid = grid.copy()
+    grid[:3, :3] = 0
+    cache.update_grid(GridType.GROUND, grid)
+
+    waypoints = cache.waypoints(
+        GridType.GROUND, target, np.array([5.0]), np.array([5.0]), 300
+    )
+    assert waypoints is not None
+
+
+def test_cache_drops_fields_a_new_structure_changes(planner):
+    cache = FlowFieldCache(planner)
+    grid = np.zeros((16, 16), dtype=np.uint8)
+    grid[8, :] = 1
+    cache.update_grid(GridType.GROUND, grid)
+    target = Point2((15.5, 8.5))
+    _waypoints(cache, planner, target, np.array([0.5]), np.array([8.5]))
+
+    grid = grid.copy()
+    grid[8, 10] = 0
+    cache.update_grid(GridType.GROUND, grid)
+
+    waypoints = _waypoints(cache, planner, target, np.array([0.5]), np.array([8.5]))
+    # the wall cut the unit off, it's sent straight at the target
+    assert tuple(waypoints[0]) == (15.5, 8.5)
+
+
+def test_cache_reads_a_field_it_did_not_request(planner):
+    cache = FlowFieldCache(planner)
+    cache.update_grid(GridType.GROUND, np.ones((16, 16), dtype=np.uint8))
+    target = Point2((15.5, 15.5))
+    assert (
+        cache.waypoints(GridType.GROUND, target, np.array([0.5]), np.array([0.5]), 0)
+        is None
+    )
+    # restored from a checkpoint, requests in flight aren't saved
+    cache._requested.clear()
+
+    waypoints = _waypoints(cache, planner, target, np.array([0.5]), np.array([0.5]))
+
+    assert waypoints is not None
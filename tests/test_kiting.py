@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from bot.kiting import kite
+from bot.unit_snapshot import FLYING
+
+HYDRA: int = 1
+ROACH: int = 2
+ZERGLING: int = 3
+OVERLORD: int = 4
+
+GROUND_RANGE = np.array([0, 5, 4, 0.1, 0], dtype=np.float64)
+AIR_RANGE = np.array([0, 5, 0, 0, 0], dtype=np.float64)
+
+
+class _Columns(SimpleNamespace):
+    def has_flag(self, flag: int) -> np.ndarray:
+        return (self.flags & flag) != 0
+
+
+def _columns(*units: tuple[str, int, float, float, float, float, bool]) -> _Columns:
+    """Columns of (name, type id, x, y, health, weapon cooldown, flying) units,
+    `units` holds the names."""
+    names, type_ids, x, y, health, cooldown, flying = zip(*units)
+    return _Columns(
+        units=list(names),
+        type_ids=np.array(type_ids),
+        x=np.array(x, dtype=np.float64),
+        y=np.array(y, dtype=np.float64),
+        health=np.array(health, dtype=np.float64),
+        hit_points=np.array(health, dtype=np.float64) * 100,
+        weapon_cooldown=np.array(cooldown, dtype=np.float64),
+        flags=np.where(np.array(flying), FLYING, 0),
+    )
+
+
+def _kite(own: _Columns, enemy: _Columns) -> dict[str, tuple[bool, object]]:
+    commands = kite(
+        own,
+        np.arange(len(own.units)),
+        enemy,
+        np.arange(len(enemy.units)),
+        GROUND_RANGE,
+        AIR_RANGE,
+    )
+    return {
+        unit: (command.attack, command.target)
+        for command in commands
+        for unit in command.units
+    }
+
+
+def test_ready_units_focus_the_weakest_enemy_in_range():
+    own = _columns(
+        ("hydra a", HYDRA, 10, 10, 1.0, 0, False),
+        ("hydra b", HYDRA, 10, 11, 1.0, 0, False),
+    )
+    enemy = _columns(
+        ("healthy", ROACH, 14, 10, 1.0, 0, False),
+        ("hurt", ROACH, 14, 11, 0.3, 0, False),
+    )
+
+    commands = kite(own, np.arange(2), enemy, np.arange(2), GROUND_RANGE, AIR_RANGE)
+
+    assert len(commands) == 1
+    assert commands[0].attack
+    assert commands[0].target == "hurt"
+    assert commands[0].units == ["hydra a", "hydra b"]
+
+
+def test_units_on_cooldown_step_back_or_forward():
+    own = _columns(
+        # outranges the roach
+        ("hydra", HYDRA, 10, 10, 1.0, 10, False),
+        # same range as the roach, healthy then hurt
+        ("roach", ROACH, 10, 20, 1.0, 10, False),
+        ("hurt roach", ROACH, 10, 30, 0.3, 10, False),
+    )
+    enemy = _columns(("roach", ROACH, 14, 20, 1.0, 0, False))
+
+    commands = _kite(own, enemy)
+
+    assert not commands["hydra"][0] and commands["hydra"][1][0] < 10
+    assert not commands["roach"][0] and commands["roach"][1][0] > 10
+    assert not commands["hurt roach"][0] and commands["hurt roach"][1][0] < 10
+
+
+def test_units_that_cant_hit_anything_move_away():
+    own = _columns(
+        ("zergling", ZERGLING, 10, 10, 1.0, 0, False),
+        ("hydra", HYDRA, 10, 12, 1.0, 0, False),
+    )
+    enemy = _columns(
+        ("overlord", OVERLORD, 11, 10, 1.0, 0, True),
+        ("overseer", OVERLORD, 11, 12, 0.5, 0, True),
+    )
+
+    commands = _kite(own, enemy)
+
+    assert commands["hydra"] == (True, "overseer")
+    attack, target = commands["zergling"]
+    assert not attack
+    assert target[0] < 10
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from bot.observation_delta import ColumnDelta
+
+
+class _Columns(SimpleNamespace):
+    def __len__(self) -> int:
+        return len(self.tags)
+
+
+def _columns(*units: tuple[int, int, float, float, float, int]) -> _Columns:
+    """Columns of (tag, type id, x, y, hit points, order key) units."""
+    tags, type_ids, x, y, hit_points, order_keys = zip(*units)
+    return _Columns(
+        tags=np.array(tags, dtype=np.uint64),
+        type_ids=np.array(type_ids, dtype=np.int32),
+        x=np.array(x, dtype=np.float64),
+        y=np.array(y, dtype=np.float64),
+        hit_points=np.array(hit_points, dtype=np.float64),
+        order_keys=np.array(order_keys, dtype=np.int64),
+    )
+
+
+def test_first_frame_adds_everything():
+    current = _columns((1, 105, 0, 0, 1, 0), (2, 105, 1, 1, 1, 0))
+
+    delta = ColumnDelta(None, current)
+
+    assert delta.added_tags == {1, 2}
+    assert delta.removed == set()
+    assert len(delta) == 2
+
+
+def test_changes_are_matched_by_tag():
+    previous = _columns(
+        (1, 105, 0, 0, 1.0, 0),
+        (2, 105, 5, 5, 1.0, 0),
+        (3, 105, 9, 9, 1.0, 0),
+        (4, 151, 7, 7, 1.0, 0),
+    )
+    # rows reordered, 3 died, 5 is new
+    current = _columns(
+        (5, 105, 2, 2, 1.0, 0),
+        (4, 126, 7, 7, 1.0, 0),
+        (2, 105, 5.1, 5, 0.5, 1),
+        (1, 105, 3, 0, 1.0, 0),
+    )
+
+    delta = ColumnDelta(previous, current)
+
+    assert delta.added_tags == {5}
+    assert delta.removed == {3}
+    assert delta.moved_tags == {1}
+    assert delta.damaged_tags == {2}
+    assert delta.order_changed_tags == {2}
+    assert delta.tags(delta.morphed) == {4}
+    assert len(delta) == 5
+
+
+def test_nothing_changed():
+    columns = _columns((1, 105, 0, 0, 1, 0))
+
+    delta = ColumnDelta(columns, columns)
+
+    assert len(delta) == 0
@@ -0,0 +1,31 @@
+import threading
+import time
+
+from bot.planner import BackgroundPlanner
+
+
+def test_shutdown_finishes_queued_work():
+    planner = BackgroundPlanner(max_workers=1)
+    written: list[str] = []
+    planner.submit("slow", 0, time.sleep, 0.05)
+    # queued behind "slow", eg. a checkpoint write at game end
+    planner.submit("checkpoint", 0, written.append, "checkpoint")
+
+    planner.shutdown(timeout=5.0)
+
+    assert written == ["checkpoint"]
+
+
+def test_shutdown_gives_up_after_the_timeout():
+    planner = BackgroundPlanner(max_workers=1)
+    release = threading.Event()
+    written: list[str] = []
+    planner.submit("stuck", 0, release.wait)
+    planner.submit("checkpoint", 0, written.append, "checkpoint")
+
+    started: float = time.perf_counter()
+    planner.shutdown(timeout=0.05)
+    release.set()
+
+    assert time.perf_counter() - started < 1.0
+    assert written == []
@@ -0,0 +1,142 @@
+import numpy as np
+from sc2.game_data import Cost
+from sc2.ids.unit_typeid import UnitTypeId
+
+from bot.production_forecast import Economy, ProductionForecast, mining_rate
+
+COSTS: dict[UnitTypeId, Cost] = {
+    UnitTypeId.DRONE: Cost(50, 0),
+    UnitTypeId.OVERLORD: Cost(100, 0),
+    UnitTypeId.ZERGLING: Cost(50, 0),
+    UnitTypeId.HYDRALISK: Cost(100, 50),
+    UnitTypeId.QUEEN: Cost(150, 0),
+    UnitTypeId.HATCHERY: Cost(300, 0),
+    UnitTypeId.LAIR: Cost(150, 100),
+}
+SUPPLY: dict[UnitTypeId, float] = {
+    UnitTypeId.DRONE: 1,
+    UnitTypeId.OVERLORD: 0,
+    UnitTypeId.ZERGLING: 1,
+    UnitTypeId.HYDRALISK: 2,
+    UnitTypeId.QUEEN: 2,
+}
+
+
+def _economy(**changes) -> Economy:
+    """The first step of a game, with `changes`."""
+    economy = Economy(
+        minerals=50,
+        vespene=0,
+        supply_used=12,
+        supply_cap=14,
+        mineral_workers=np.array([12]),
+        mineral_slots=np.array([16]),
+        gas_workers=np.array([]),
+        gas_slots=np.array([]),
+        larvae=3,
+        inject_remaining=np.array([np.nan]),
+        inject_queen_energy=np.array([]),
+        pending_seconds=np.array([]),
+        pending_supply=np.array([]),
+    )
+    return economy._replace(**changes)
+
+
+def _plan(economy: Economy, drones=26, army=(), townhalls=0, queens=0, structures=()):
+    forecast = ProductionForecast(COSTS.__getitem__, SUPPLY.__getitem__)
+    return forecast.plan(
+        forecast.project(economy),
+        economy,
+        drones,
+        list(army),
+        townhalls,
+        queens,
+        list(structures),
+    )
+
+
+def test_opener_trains_the_twelfth_drone():
+    plan = _plan(_economy())
+
+    assert plan.larvae == {UnitTypeId.DRONE: 1}
+
+
+def test_opener_saves_for_the_thirteen_overlord():
+    assert _plan(_economy(supply_used=13)).larvae == {}
+    assert _plan(_economy(minerals=100, supply_used=13)).larvae == {
+        UnitTypeId.OVERLORD: 1
+    }
+
+
+def test_pending_overlord_frees_the_larvae():
+    plan = _plan(
+        _economy(
+            minerals=200,
+            supply_used=13,
+            pending_seconds=np.array([10.0]),
+            pending_supply=np.array([8.0]),
+        )
+    )
+
+    assert plan.larvae == {UnitTypeId.DRONE: 1}
+
+
+def test_no_overlords_at_max_supply():
+    plan = _plan(
+        _economy(minerals=1000, supply_used=196, supply_cap=200, larvae=10),
+        drones=0,
+        army=[UnitTypeId.ZERGLING],
+    )
+
+    assert UnitTypeId.OVERLORD not in plan.larvae
+    assert plan.larvae[UnitTypeId.ZERGLING] == 4
+
+
+def test_missing_queens_come_before_larvae():
+    economy = _economy(minerals=200, supply_used=20, supply_cap=36)
+
+    plan = _plan(economy, townhalls=1, queens=2)
+
+    assert plan.queens == 1
+    assert plan.larvae == {UnitTypeId.DRONE: 1}
+
+
+def test_extra_queens_only_from_surplus_income():
+    base = dict(
+        supply_used=60,
+        supply_cap=100,
+        mineral_workers=np.array([16, 16, 16]),
+        mineral_slots=np.array([16, 16, 16]),
+        inject_remaining=np.array([np.nan] * 3),
+    )
+
+    larva_starved = _plan(
+        _economy(minerals=1200, larvae=1, **base),
+        drones=0,
+        army=[UnitTypeId.ZERGLING],
+        townhalls=2,
+    )
+    spending = _plan(
+        _economy(minerals=200, larvae=3, **base),
+        drones=0,
+        army=[UnitTypeId.ZERGLING],
+        townhalls=2,
+    )
+
+    assert larva_starved.queens == 2
+    assert spending.queens == 0
+
+
+def test_planned_structures_are_held_back():
+    economy = _economy(minerals=300, supply_used=16, supply_cap=22)
+
+    plan = _plan(economy, structures=[UnitTypeId.HATCHERY])
+
+    assert plan.reserved_minerals > 0
+    assert plan.larvae.get(UnitTypeId.DRONE, 0) < 3
+
+
+def test_mining_rate_caps_surplus_workers():
+    rate = mining_rate(np.array([16, 30]), np.array([16, 16]), 1.0, 0.5)
+
+    assert rate == 16 + 16 + 0.5 * 8
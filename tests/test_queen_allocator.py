@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import numpy as np
+from sc2.ids.ability_id import AbilityId
+
+from bot.queen_allocator import INJECT_CLAIM_LOOPS, QueenAllocator
+
+
+def _columns(*units: tuple[float, float, float, float]) -> SimpleNamespace:
+    """Own columns of (x, y, energy, health fraction) units, tags from 1."""
+    x, y, energy, health = (
+        np.array(column, dtype=np.float64) for column in zip(*units)
+    )
+    return SimpleNamespace(
+        tags=np.arange(1, len(units) + 1, dtype=np.uint64),
+        x=x,
+        y=y,
+        energy=energy,
+        health=health,
+    )
+
+
+def _rows(*rows: int) -> np.ndarray:
+    return np.array(rows, dtype=np.intp)
+
+
+NO_SPOTS = np.zeros((0, 2))
+
+
+def test_each_townhall_gets_its_closest_queen():
+    own = _columns((0, 0, 50, 1), (30, 0, 50, 1), (1, 0, 0, 1), (31, 0, 0, 1))
+
+    assignments = QueenAllocator().allocate(
+        own, 0, _rows(0, 1), _rows(), _rows(), _rows(2, 3), _rows(), NO_SPOTS
+    )
+
+    assert {(a.queen_row, a.target_row) for a in assignments} == {(0, 2), (1, 3)}
+    assert {a.ability for a in assignments} == {AbilityId.EFFECT_INJECTLARVA}
+
+
+def test_injected_townhall_stays_claimed():
+    own = _columns((0, 0, 50, 1), (1, 0, 0, 1))
+    allocator = QueenAllocator()
+    args = (_rows(0), _rows(), _rows(), _rows(1), _rows(), NO_SPOTS)
+
+    assert len(allocator.allocate(own, 0, *args)) == 1
+    assert allocator.allocate(own, 10, *args) == []
+    assert len(allocator.allocate(own, INJECT_CLAIM_LOOPS + 1, *args)) == 1
+
+
+def test_transfuse_comes_first_and_skips_the_queen_itself():
+    # a hurt queen next to a hurt zergling, only the other queen can heal
+    # either and takes the most hurt, the hurt queen goes on to inject
+    own = _columns((0, 0, 60, 0.2), (1, 0, 60, 1), (2, 0, 0, 0.1), (3, 0, 0, 1))
+
+    assignments = QueenAllocator().allocate(
+        own, 0, _rows(0, 1), _rows(), _rows(0, 1), _rows(3), _rows(0, 2), NO_SPOTS
+    )
+
+    by_queen = {a.queen_row: a for a in assignments}
+    assert by_queen[1].ability == AbilityId.TRANSFUSION_TRANSFUSION
+    assert by_queen[1].target_row == 2
+    assert by_queen[0].ability == AbilityId.EFFECT_INJECTLARVA
+
+
+def test_creep_queens_keep_spots_apart():
+    own = _columns((0, 0, 25, 1), (0, 1, 25, 1))
+    spots = np.array([(5.0, 0.0), (6.0, 0.0), (20.0, 0.0)])
+
+    assignments = QueenAllocator().allocate(
+        own, 0, _rows(), _rows(0, 1), _rows(), _rows(), _rows(), spots, spot_spacing=5
+    )
+
+    assert sorted(a.spot for a in assignments) == [0, 2]
+    assert {a.target_row for a in assignments} == {-1}
+
+
+def test_queens_without_energy_cast_nothing():
+    own = _columns((0, 0, 10, 1), (1, 0, 0, 1))
+
+    assert (
+        QueenAllocator().allocate(
+            own, 0, _rows(0), _rows(0), _rows(0), _rows(1), _rows(), NO_SPOTS
+        )
+        == []
+    )
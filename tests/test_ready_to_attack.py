@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+from sc2.position import Point2
+
+from bot.combat_sim import CombatResult
+from bot.consts import MIN_ATTACK_UNITS, MIN_BLIND_ATTACK_UNITS
+from bot.main import MyBot
+
+TARGET = Point2((80, 80))
+
+
+def _bot(scouted: bool, result: CombatResult) -> SimpleNamespace:
+    return SimpleNamespace(
+        state=SimpleNamespace(game_loop=2000),
+        enemy_memory=SimpleNamespace(seen_near=lambda *args: scouted),
+        _predict_fight=lambda army, target: result,
+    )
+
+
+def test_empty_enemy_memory_needs_the_blind_attack_floor():
+    # what the estimate returns with nothing remembered
+    empty = CombatResult(True, 1.0, 0.0, 0.0)
+    bot = _bot(scouted=False, result=empty)
+
+    assert not MyBot._ready_to_attack(bot, [object()] * MIN_ATTACK_UNITS, TARGET)
+    assert MyBot._ready_to_attack(bot, [object()] * MIN_BLIND_ATTACK_UNITS, TARGET)
+
+
+def test_scouted_target_attacks_on_the_estimate():
+    army = [object()] * MIN_ATTACK_UNITS
+
+    assert MyBot._ready_to_attack(
+        _bot(scouted=True, result=CombatResult(True, 0.5, 0.0, 1.0)), army, TARGET
+    )
+    assert not MyBot._ready_to_attack(
+        _bot(scouted=True, result=CombatResult(True, 0.1, 0.0, 1.0)), army, TARGET
+    )
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import numpy as np
+from ares.consts import UnitRole
+from s2clientprotocol import common_pb2, raw_pb2
+from sc2.game_data import GameData
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+from sc2.unit import Unit
+
+from bot.stand_in_server import game_data
+from bot.unit_snapshot import (
+    FLYING,
+    IDLE,
+    NO_ROLE,
+    ROLE_INDEX,
+    STRUCTURE,
+    UnitSnapshot,
+    nearest,
+    towards,
+)
+
+BOT = SimpleNamespace(
+    state=SimpleNamespace(game_loop=0), game_data=GameData(game_data())
+)
+
+
+def _unit(tag: int, type_id: UnitTypeId, x: float, y: float, **fields) -> Unit:
+    proto = raw_pb2.Unit(
+        tag=tag,
+        unit_type=type_id.value,
+        pos=common_pb2.Point(x=x, y=y),
+        alliance=raw_pb2.Self,
+        health=fields.pop("health", 40.0),
+        health_max=40.0,
+        build_progress=1.0,
+        **fields,
+    )
+    return Unit(proto, BOT)
+
+
+def _snapshot(roles: dict) -> UnitSnapshot:
+    own = [
+        _unit(1, UnitTypeId.QUEEN, 10, 10, energy=30.0),
+        _unit(2, UnitTypeId.QUEEN, 20, 10, energy=60.0),
+        _unit(3, UnitTypeId.OVERLORD, 5, 5, is_flying=True),
+        _unit(4, UnitTypeId.HATCHERY, 12, 12),
+    ]
+    enemy = [_unit(9, UnitTypeId.ZERGLING, 40, 40, shield=5.0, health=20.0)]
+    return UnitSnapshot(own, enemy, roles)
+
+
+def test_string_valued_roles_are_stored_by_index():
+    assert all(isinstance(role.value, str) for role in UnitRole)
+
+    own = _snapshot({UnitRole.QUEEN_INJECT: {1}, UnitRole.QUEEN_CREEP: {2}}).own
+
+    assert own.roles.tolist() == [
+        ROLE_INDEX[UnitRole.QUEEN_INJECT],
+        ROLE_INDEX[UnitRole.QUEEN_CREEP],
+        NO_ROLE,
+        NO_ROLE,
+    ]
+    assert own.with_role(UnitRole.QUEEN_INJECT).tolist() == [True, False, False, False]
+    assert not own.with_role(UnitRole.ATTACKING).any()
+
+
+def test_columns_follow_unit_order():
+    snapshot = _snapshot({})
+    own = snapshot.own
+
+    assert own.tags.tolist() == [1, 2, 3, 4]
+    assert own.row_of == {1: 0, 2: 1, 3: 2, 4: 3}
+    assert own.energy.tolist() == [30.0, 60.0, 0.0, 0.0]
+    assert own.has_flag(IDLE).all()
+    assert own.has_flag(FLYING).tolist() == [False, False, True, False]
+    assert own.has_flag(STRUCTURE).tolist() == [False, False, False, True]
+    assert own.of_type([UnitTypeId.QUEEN]).tolist() == [True, True, False, False]
+    assert own.within(Point2((11, 11)), 2).tolist() == [True, False, False, True]
+    assert own.rows(own.has_flag(FLYING))[0].tag == 3
+    # hit points count shields, health is the health fraction alone
+    assert snapshot.enemy.hit_points.tolist() == [25.0]
+    assert snapshot.enemy.health.tolist() == [0.5]
+    assert (snapshot.enemy.roles == NO_ROLE).all()
+
+
+def test_nearest_and_towards():
+    index, distance = nearest(
+        np.array([0.0, 10.0]), np.array([0.0, 0.0]), np.array([1.0, 9.0]), np.zeros(2)
+    )
+    x, y = towards(
+        np.array([0.0, 5.0]), np.zeros(2), np.array([3.0, 5.0]), np.zeros(2), 1
+    )
+
+    assert index.tolist() == [0, 1]
+    assert distance.tolist() == [1.0, 1.0]
+    assert x.tolist() == [1.0, 5.0]
+    assert y.tolist() == [0.0, 0.0]